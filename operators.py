@@ -3,6 +3,7 @@ from bpy.props import (
     PointerProperty,
     CollectionProperty,
     BoolProperty,
+    EnumProperty,
     IntProperty,
     StringProperty,
 )
@@ -1047,6 +1048,7 @@ class OBJECT_OT_deselect_all_materials(bpy.types.Operator):
         return {'FINISHED'}
 
 
+import queue
 import subprocess
 import sys
 from pathlib import Path
@@ -1224,6 +1226,69 @@ class OBJECT_OT_process_images(bpy.types.Operator):
         description="Apply anime-optimized upscaling at 2× via Real-ESRGAN-ncnn-vulkan",
         default=False
     )
+
+    tile_size: IntProperty(
+        name="Tile Size",
+        description="Upscale images larger than this in overlapping tiles (0 = never, at least 64)",
+        default=2048,
+        min=0,
+        max=16384
+    )
+
+    tile_overlap: IntProperty(
+        name="Tile Overlap",
+        description="Overlap between tiles in pixels, feathered to hide the seams (kept below half a tile)",
+        default=32,
+        min=0,
+        max=512
+    )
+
+    preserve_alpha: BoolProperty(
+        name="Preserve Alpha",
+        description="Upscale RGB with the model and alpha with a plain resize, then re-threshold alpha",
+        default=False
+    )
+
+    alpha_resize: EnumProperty(
+        name="Alpha Resize",
+        description="How the alpha channel is resized in Preserve Alpha mode",
+        items=[
+            ('nearest', "Nearest", "Blocky, exact mask"),
+            ('bicubic', "Bicubic", "Smooth mask edges, re-thresholded at 50%"),
+        ],
+        default='nearest'
+    )
+
+    use_cache: BoolProperty(
+        name="Use Upscale Cache",
+        description="Reuse earlier upscale results of identical images instead of running Real-ESRGAN again",
+        default=True
+    )
+
+    alpha_workers: IntProperty(
+        name="Alpha Threads",
+        description="Images thresholded at once in the alpha pre-pass (0 = automatic)",
+        default=0,
+        min=0,
+        max=64
+    )
+
+    png_profile: EnumProperty(
+        name="PNG Profile",
+        description="Encoder settings for the written PNGs (intermediates always use Fast)",
+        items=[
+            ('fast', "Fast", "Lowest compression, quickest to write (previews)"),
+            ('balanced', "Balanced", "Default zlib compression"),
+            ('archival', "Archival", "Maximum compression, slowest to write (final textures)"),
+        ],
+        default='archival'
+    )
+
+    dry_run: BoolProperty(
+        name="Dry Run",
+        description="Only print the planned steps and estimated output sizes to the console",
+        default=False
+    )
     
     def draw(self, context):
         layout = self.layout
@@ -1232,6 +1297,16 @@ class OBJECT_OT_process_images(bpy.types.Operator):
         layout.prop(self, "use_anime_upscale")
         layout.prop(self, "use_regular_upscale_x2")
         layout.prop(self, "use_anime_upscale_x2")
+        layout.prop(self, "tile_size")
+        layout.prop(self, "tile_overlap")
+        layout.prop(self, "preserve_alpha")
+        row = layout.row()
+        row.enabled = self.preserve_alpha
+        row.prop(self, "alpha_resize")
+        layout.prop(self, "use_cache")
+        layout.prop(self, "alpha_workers")
+        layout.prop(self, "png_profile")
+        layout.prop(self, "dry_run")
     
     def execute(self, context):
         from . import upscale_operator
@@ -1240,13 +1315,67 @@ class OBJECT_OT_process_images(bpy.types.Operator):
             'regular_upscale':       self.use_regular_upscale,
             'regular_upscale_x2':    self.use_regular_upscale_x2,
             'anime_upscale':         self.use_anime_upscale,
-            'anime_upscale_x2':      self.use_anime_upscale_x2
+            'anime_upscale_x2':      self.use_anime_upscale_x2,
+            'tile_size':             self.tile_size,
+            'tile_overlap':          self.tile_overlap,
+            'preserve_alpha':        self.preserve_alpha,
+            'alpha_resize':          self.alpha_resize,
+            'use_cache':             self.use_cache,
+            'alpha_workers':         self.alpha_workers,
+            'png_profile':           self.png_profile,
+            'dry_run':               self.dry_run
         }
         
         from . import thresholdpng
-        thresholdpng.process_images(self.directory,options)
-        
+        if self.dry_run:
+            thresholdpng.process_images(self.directory, options)
+            return {'FINISHED'}
+
+        # Threshold and upscale on a worker thread; modal() polls it on a timer,
+        # shows progress and streams the per-image results into the info report
+        from .realesrgan.methods import JobControl
+        self._control = JobControl()
+        self._events = queue.Queue()
+        self._thread = thresholdpng.process_images_in_background(
+            self.directory, options, self._control, self._events.put)
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.progress_begin(0, 100)
+        wm.modal_handler_add(self)
+        self.report({'INFO'}, "Processing images... (Esc to cancel)")
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC' and not self._control.cancelled:
+            # Queued jobs are dropped and the running Real-ESRGAN processes terminated
+            self._control.cancel()
+            self.report({'WARNING'}, "Cancelling image processing...")
+            return {'RUNNING_MODAL'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        self._drain_events(context)
+        if self._thread.is_alive():
+            return {'PASS_THROUGH'}
+        self._drain_events(context)
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        if self._control.cancelled:
+            self.report({'WARNING'}, "Image processing cancelled")
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Image processing complete")
         return {'FINISHED'}
+
+    def _drain_events(self, context):
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                return
+            self.report({'INFO'} if event['ok'] else {'WARNING'}, event['message'])
+            if event['total']:
+                context.window_manager.progress_update(100 * event['done'] // event['total'])
     
     def invoke(self, context, event):
         # Open the file browser
@@ -1,33 +1,119 @@
-import struct, sys, os
+import sys, os
+import argparse
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-# Datos exactos conocidos
+from bntx import BNTXFile
+from astc_decode import decode_astc_auto
+from bntx_extract import ASTC_MAGIC, astc_header, expand_inputs, write_vectored
+from dsspng import array_to_image, save_png
+
+# Valores por defecto si no hay un .bntx hermano del que leer el tamaño real
 BLOCK_W, BLOCK_H, BLOCK_D = 8, 8, 1     # prueba 6x6 si 8x8 no da color
 WIDTH, HEIGHT, DEPTH = 512, 1024, 1
 
-def main(path):
+
+def bntx_metadata(astc_path: Path):
+    """
+    (bloque_w, bloque_h, ancho, alto) de la textura ASTC del .bntx con el mismo
+    nombre que `astc_path` (la textura con su mismo nombre, o la única ASTC
+    avisando), o None si no hay .bntx. ValueError si hay varias y ninguna coincide.
+    """
+    bntx_path = astc_path.with_suffix(".bntx")
+    if not bntx_path.exists():
+        return None
+    with BNTXFile(bntx_path) as bntx:
+        candidates = [t for t in bntx.textures() if t.is_astc]
+    if not candidates:
+        return None
+    matches = [t for t in candidates if t.name == astc_path.stem]
+    if matches:
+        tex = matches[0]
+    elif len(candidates) == 1:
+        tex = candidates[0]
+        print(f"[WARN] {astc_path.name}: ninguna textura de {bntx_path.name} se llama "
+              f"'{astc_path.stem}'; uso la única ASTC, '{tex.name}'")
+    else:
+        # Con varias texturas no hay forma de saber cuál es: elegir mal daría una cabecera con otro tamaño
+        raise ValueError(f"ninguna textura ASTC de {bntx_path.name} se llama '{astc_path.stem}' "
+                         f"(hay: {', '.join(t.name for t in candidates)})")
+    return tex.block_size + (tex.width, tex.height)
+
+
+def add_header(path, block=(BLOCK_W, BLOCK_H), size=(WIDTH, HEIGHT), to_png=False, decoder=None):
+    """
+    Escribe <nombre>_<W>x<H>_header.astc con la cabecera de 16 bytes delante de
+    los datos. Los datos se leen por mmap y se escriben tal cual (sin copia).
+    Con `to_png` se decodifican en proceso y se escribe <nombre>_<W>x<H>.png.
+    """
+    path = Path(path)
+    meta = bntx_metadata(path)
+    block_w, block_h, width, height = meta if meta else (*block, *size)
+
+    suffix = ".png" if to_png else "_header.astc"
+    out_path = path.with_name(f"{path.stem}_{width}x{height}{suffix}")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        view = memoryview(data)
+        try:
+            if to_png:
+                arr = decode_astc_auto(view, width, height, block_w, block_h, decoder=decoder)
+                save_png(array_to_image(arr), out_path)
+            else:
+                write_vectored(out_path, astc_header(block_w, block_h, width, height), view)
+        finally:
+            view.release()
+    return out_path, meta is not None
+
+
+def has_header(path: Path) -> bool:
     with open(path, "rb") as f:
-        data = f.read()
-
-    # Cabecera ASTC 16 bytes (4 + 3 + 9)
-    header = struct.pack(
-        "<4s3B9B",
-        b"\x13\xAB\xA1\x5C",          # Magic
-        BLOCK_W, BLOCK_H, BLOCK_D,   # Tamaño de bloque
-        WIDTH & 0xFF, (WIDTH >> 8) & 0xFF, (WIDTH >> 16) & 0xFF,
-        HEIGHT & 0xFF, (HEIGHT >> 8) & 0xFF, (HEIGHT >> 16) & 0xFF,
-        DEPTH & 0xFF, (DEPTH >> 8) & 0xFF, (DEPTH >> 16) & 0xFF
-    )
-
-    out_path = path.replace(".astc", f"_{WIDTH}x{HEIGHT}_header.astc")
-    with open(out_path, "wb") as f:
-        f.write(header + data)
-
-    print(f"[+] Header injected → {out_path}")
-    print(f"Now decode it with:")
-    print(f'  astcenc -ds "{out_path}" "{out_path.replace(".astc", ".png")}"')
+        return f.read(4) == ASTC_MAGIC
+
+
+def run_batch(inputs, block, size, jobs=None, to_png=False, decoder=None):
+    # Los .astc que ya llevan cabecera (salidas anteriores, extract_astc_from_bntx) se saltan
+    files = [p for p in expand_inputs(inputs, ".astc") if not has_header(p)]
+    errors = []
+
+    def _one(p):
+        try:
+            return p, add_header(p, block, size, to_png, decoder), None
+        except Exception as e:
+            return p, None, f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        for p, result, err in pool.map(_one, files):
+            if err:
+                print(f"[FAIL] {p}: {err}")
+                errors.append((p, err))
+            else:
+                out_path, from_bntx = result
+                print(f"[+] {out_path}" + ("" if from_bntx else " (tamaño por defecto)"))
+    print(f"{len(files) - len(errors)} {'PNG' if to_png else 'headers'} escritos, {len(errors)} errores")
+    return errors
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python add_astc_header.py <file.astc>")
-        sys.exit(1)
-    main(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Añade la cabecera ASTC de 16 bytes a volcados .astc.")
+    parser.add_argument("inputs", nargs="+", help="Archivos .astc, carpetas o patrones glob")
+    parser.add_argument("--block", default=f"{BLOCK_W}x{BLOCK_H}", help="Bloque si no hay .bntx hermano (p.ej. 6x6)")
+    parser.add_argument("--size", default=f"{WIDTH}x{HEIGHT}", help="Tamaño si no hay .bntx hermano (p.ej. 512x1024)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Hilos en paralelo")
+    parser.add_argument("--png", action="store_true", help="Decodificar a PNG en proceso en vez de escribir .astc")
+    parser.add_argument("--astc-decoder", choices=("auto", "builtin", "astcenc"), default=None,
+                        help="Backend ASTC (auto: astcenc si está en el PATH)")
+    args = parser.parse_args()
+
+    block = tuple(int(v) for v in args.block.lower().split("x"))
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+    if len(args.inputs) == 1 and Path(args.inputs[0]).is_file():
+        out_path, _ = add_header(args.inputs[0], block, size, args.png, args.astc_decoder)
+        if args.png:
+            print(f"[+] Decoded → {out_path}")
+        else:
+            print(f"[+] Header injected → {out_path}")
+            print("Now decode it with --png, or with:")
+            print(f'  astcenc -ds "{out_path}" "{out_path.with_suffix(".png")}"')
+    else:
+        sys.exit(1 if run_batch(args.inputs, block, size, args.jobs, args.png, args.astc_decoder) else 0)
@@ -0,0 +1,678 @@
+# astc_decode.py
+"""
+Decodificador ASTC LDR en proceso (sin astcenc) para las texturas ASTC de Switch.
+
+Soporta bloques 2D de cualquier tamaño (4x4, 6x6, 8x8, ...), 1-4 particiones,
+doble plano, todas las rejillas de pesos y los modos de endpoint LDR (0, 1, 4,
+5, 6, 8, 9, 10, 12, 13) más los bloques void-extent. Los modos HDR y los bloques
+inválidos salen en magenta, como hace astcenc con el perfil LDR.
+
+Los bloques se agrupan por configuración (modo de bloque, particiones y modos
+de endpoint): todo lo que depende de la configuración se calcula una vez por
+grupo y el resto (ISE, pesos, endpoints, interpolación) se decodifica con NumPy
+para todos los bloques del grupo a la vez.
+
+Si hay un `astcenc` en el PATH se puede usar como backend acelerado
+(decode_astc_auto / ASTC_DECODER).
+"""
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+ASTC_MAGIC = b"\x13\xAB\xA1\x5C"
+ASTC_HEADER_SIZE = 16
+BLOCK_BYTES = 16
+
+# "auto": astcenc si está en el PATH, si no el decodificador NumPy.
+# "builtin" / "astcenc" fuerzan uno de los dos.
+ASTC_DECODER = "auto"
+ASTCENC_NAMES = ("astcenc", "astcenc-avx2", "astcenc-sse4.1", "astcenc-sse2", "astcenc-neon")
+
+# Bloques por tanda (cada bloque ocupa 128 bytes como array de bits)
+CHUNK_BLOCKS = 1 << 15
+
+ERROR_COLOR = (255, 0, 255, 255)
+
+# Niveles de cuantización ISE: (rango, trits, quints, bits)
+QUANT_LEVELS = (
+    (2, 0, 0, 1), (3, 1, 0, 0), (4, 0, 0, 2), (5, 0, 1, 0), (6, 1, 0, 1), (8, 0, 0, 3),
+    (10, 0, 1, 1), (12, 1, 0, 2), (16, 0, 0, 4), (20, 0, 1, 2), (24, 1, 0, 3), (32, 0, 0, 5),
+    (40, 0, 1, 3), (48, 1, 0, 4), (64, 0, 0, 6), (80, 0, 1, 4), (96, 1, 0, 5), (128, 0, 0, 7),
+    (160, 0, 1, 5), (192, 1, 0, 6), (256, 0, 0, 8),
+)
+
+# Descuantización trit/quint (patrón de B en MSB->LSB, letras = bits de la mantisa
+# desde 'a' = bit 0; C = multiplicador). Tablas C.2.13 / C.2.17 de la especificación.
+_COLOR_TRIT_BC = {1: ("", 204), 2: ("b000b0bb0", 93), 3: ("cb000cbcb", 44),
+                  4: ("dcb000dcb", 22), 5: ("edcb000ed", 11), 6: ("fedcb000f", 5)}
+_COLOR_QUINT_BC = {1: ("", 113), 2: ("b0000bb00", 54), 3: ("cb0000cbc", 26),
+                   4: ("dcb0000dc", 13), 5: ("edcb0000e", 6)}
+_WEIGHT_TRIT_BC = {1: ("", 50), 2: ("b000b0b", 23), 3: ("cb000cb", 11)}
+_WEIGHT_QUINT_BC = {1: ("", 28), 2: ("b0000b0", 13)}
+
+HDR_ENDPOINT_MODES = {2, 3, 7, 11, 14, 15}
+
+
+class ASTCDecodeError(ValueError):
+    pass
+
+
+# =======================
+#  CABECERA .astc
+# =======================
+
+def read_astc_header(data) -> dict:
+    """Parsea la cabecera de 16 bytes de un .astc -> {block_w, block_h, width, height, depth}."""
+    if len(data) < ASTC_HEADER_SIZE or bytes(data[:4]) != ASTC_MAGIC:
+        raise ASTCDecodeError("no es un .astc (falta la cabecera)")
+    block_w, block_h, block_d = data[4], data[5], data[6]
+    width, height, depth = (int.from_bytes(bytes(data[o:o + 3]), "little") for o in (7, 10, 13))
+    if block_d != 1 or depth > 1:
+        raise ASTCDecodeError("texturas ASTC 3D no soportadas")
+    return {"block_w": block_w, "block_h": block_h, "width": width, "height": height, "depth": depth}
+
+
+# =======================
+#  TABLAS
+# =======================
+
+def _trit_table() -> np.ndarray:
+    """T (8 bits) -> 5 trits."""
+    table = np.zeros((256, 5), dtype=np.uint8)
+    for t in range(256):
+        bit = lambda i: (t >> i) & 1
+        if (t >> 2) & 7 == 7:
+            c = ((t >> 5) & 7) << 2 | (t & 3)
+            t4 = t3 = 2
+        else:
+            c = t & 0x1F
+            if (t >> 5) & 3 == 3:
+                t4, t3 = 2, bit(7)
+            else:
+                t4, t3 = bit(7), (t >> 5) & 3
+        if c & 3 == 3:
+            t2, t1 = 2, (c >> 4) & 1
+            t0 = ((c >> 3) & 1) << 1 | ((c >> 2) & 1) & ~((c >> 3) & 1) & 1
+        elif (c >> 2) & 3 == 3:
+            t2, t1, t0 = 2, 2, c & 3
+        else:
+            t2, t1 = (c >> 4) & 1, (c >> 2) & 3
+            t0 = ((c >> 1) & 1) << 1 | (c & 1) & ~((c >> 1) & 1) & 1
+        table[t] = (t0, t1, t2, t3, t4)
+    return table
+
+
+def _quint_table() -> np.ndarray:
+    """Q (7 bits) -> 3 quints."""
+    table = np.zeros((128, 3), dtype=np.uint8)
+    for q in range(128):
+        if (q >> 1) & 3 == 3 and (q >> 5) & 3 == 0:
+            b0 = q & 1
+            q2 = (b0 << 2) | ((((q >> 4) & 1) & ~b0 & 1) << 1) | (((q >> 3) & 1) & ~b0 & 1)
+            q1 = q0 = 4
+        else:
+            if (q >> 1) & 3 == 3:
+                q2 = 4
+                c = ((q >> 3) & 3) << 3 | ((~(q >> 5)) & 3) << 1 | (q & 1)
+            else:
+                q2 = (q >> 5) & 3
+                c = q & 0x1F
+            if c & 7 == 5:
+                q1, q0 = 4, (c >> 3) & 3
+            else:
+                q1, q0 = (c >> 3) & 3, c & 7
+        table[q] = (q0, q1, q2)
+    return table
+
+
+TRIT_TABLE = _trit_table()
+QUINT_TABLE = _quint_table()
+
+
+def _pattern_value(pattern: str, mantissa: int) -> int:
+    value = 0
+    for ch in pattern:
+        value = (value << 1) | (0 if ch == "0" else (mantissa >> (ord(ch) - ord("a"))) & 1)
+    return value
+
+
+@lru_cache(maxsize=None)
+def color_unquant_table(level: int) -> np.ndarray:
+    """Valor ISE -> endpoint 0..255 para el nivel `level`."""
+    rng, trits, quints, bits = QUANT_LEVELS[level]
+    out = np.zeros(rng, dtype=np.int32)
+    for v in range(rng):
+        if not trits and not quints:
+            # Replicación de bits hasta 8
+            r, n = v, bits
+            while n < 8:
+                r = (r << bits) | v
+                n += bits
+            out[v] = r >> (n - 8)
+            continue
+        d, m = v >> bits, v & ((1 << bits) - 1)
+        pattern, c = (_COLOR_TRIT_BC if trits else _COLOR_QUINT_BC)[bits]
+        a = 0x1FF if m & 1 else 0
+        t = d * c + _pattern_value(pattern, m)
+        t ^= a
+        out[v] = (a & 0x80) | (t >> 2)
+    return out
+
+
+@lru_cache(maxsize=None)
+def weight_unquant_table(level: int) -> np.ndarray:
+    """Valor ISE -> peso 0..64 para el nivel `level`."""
+    rng, trits, quints, bits = QUANT_LEVELS[level]
+    if rng == 3:
+        return np.array([0, 32, 64], dtype=np.int32)
+    if rng == 5:
+        return np.array([0, 16, 32, 48, 64], dtype=np.int32)
+    out = np.zeros(rng, dtype=np.int32)
+    for v in range(rng):
+        if not trits and not quints:
+            r, n = v, bits
+            while n < 6:
+                r = (r << bits) | v
+                n += bits
+            w = r >> (n - 6)
+        else:
+            d, m = v >> bits, v & ((1 << bits) - 1)
+            pattern, c = (_WEIGHT_TRIT_BC if trits else _WEIGHT_QUINT_BC)[bits]
+            a = 0x7F if m & 1 else 0
+            t = (d * c + _pattern_value(pattern, m)) ^ a
+            w = (a & 0x20) | (t >> 2)
+        out[v] = w + 1 if w > 32 else w
+    return out
+
+
+def ise_bit_count(count: int, level: int) -> int:
+    _, trits, quints, bits = QUANT_LEVELS[level]
+    total = count * bits
+    if trits:
+        total += (8 * count + 4) // 5
+    if quints:
+        total += (7 * count + 2) // 3
+    return total
+
+
+@lru_cache(maxsize=None)
+def _ise_layout(count: int, level: int, start: int):
+    """
+    Posiciones de bit de una secuencia ISE de `count` valores desde `start`:
+    (mantisas (count, bits), bits de trit/quint por grupo (grupos, 8 ó 7)).
+    Los bits que faltan en el último grupo incompleto apuntan a la columna 128
+    (siempre cero).
+    """
+    _, trits, quints, bits = QUANT_LEVELS[level]
+    mantissa = np.zeros((count, bits), dtype=np.intp)
+    if trits or quints:
+        group, tq_bits = (5, (2, 2, 1, 2, 1)) if trits else (3, (3, 2, 2))
+        groups = (count + group - 1) // group
+        packed = np.full((groups, sum(tq_bits)), 128, dtype=np.intp)
+    else:
+        group, tq_bits, packed = 1, (0,), None
+
+    pos = start
+    for i in range(count):
+        mantissa[i] = np.arange(pos, pos + bits)
+        pos += bits
+        if packed is not None:
+            g, j = divmod(i, group)
+            first = sum(tq_bits[:j])
+            packed[g, first:first + tq_bits[j]] = np.arange(pos, pos + tq_bits[j])
+            pos += tq_bits[j]
+    return mantissa, packed
+
+
+def _read_ise(bits_ext: np.ndarray, count: int, level: int, start: int) -> np.ndarray:
+    """Decodifica `count` valores ISE de cada bloque -> (N, count) int32."""
+    _, trits, quints, bits = QUANT_LEVELS[level]
+    mantissa_pos, packed_pos = _ise_layout(count, level, start)
+    values = np.zeros((bits_ext.shape[0], count), dtype=np.int32)
+    if bits:
+        values = bits_ext[:, mantissa_pos].astype(np.int32) @ (1 << np.arange(bits, dtype=np.int32))
+    if packed_pos is not None:
+        width = packed_pos.shape[1]
+        packed = bits_ext[:, packed_pos].astype(np.int32) @ (1 << np.arange(width, dtype=np.int32))
+        digits = (TRIT_TABLE if trits else QUINT_TABLE)[packed].reshape(bits_ext.shape[0], -1)[:, :count]
+        values = values + (digits.astype(np.int32) << bits)
+    return values
+
+
+def _field(bits: np.ndarray, start: int, length: int) -> np.ndarray:
+    """Campo de `length` bits desde `start` de cada bloque -> (N,) int64."""
+    if length <= 0:
+        return np.zeros(bits.shape[0], dtype=np.int64)
+    return bits[:, start:start + length].astype(np.int64) @ (1 << np.arange(length, dtype=np.int64))
+
+
+# =======================
+#  MODO DE BLOQUE
+# =======================
+
+@lru_cache(maxsize=None)
+def decode_block_mode(mode: int, block_w: int, block_h: int):
+    """
+    Modo de bloque (11 bits) -> (rejilla_x, rejilla_y, doble_plano, nivel_pesos, bits_pesos),
+    o None si el modo es reservado o inválido para este tamaño de bloque.
+    """
+    r = (mode >> 4) & 1
+    h = (mode >> 9) & 1
+    d = (mode >> 10) & 1
+    a = (mode >> 5) & 3
+    if mode & 3:
+        r |= (mode & 3) << 1
+        b = (mode >> 7) & 3
+        kind = (mode >> 2) & 3
+        if kind == 0:
+            x, y = b + 4, a + 2
+        elif kind == 1:
+            x, y = b + 8, a + 2
+        elif kind == 2:
+            x, y = a + 2, b + 8
+        else:
+            b &= 1
+            x, y = (b + 2, a + 2) if mode & 0x100 else (a + 2, b + 6)
+    else:
+        r |= ((mode >> 2) & 3) << 1
+        if (mode >> 2) & 3 == 0:
+            return None
+        b = (mode >> 9) & 3
+        kind = (mode >> 7) & 3
+        if kind == 0:
+            x, y = 12, a + 2
+        elif kind == 1:
+            x, y = a + 2, 12
+        elif kind == 2:
+            x, y = a + 6, b + 6
+            d = h = 0
+        else:
+            if (mode >> 5) & 3 == 0:
+                x, y = 6, 10
+            elif (mode >> 5) & 3 == 1:
+                x, y = 10, 6
+            else:
+                return None
+
+    count = x * y * (d + 1)
+    level = (r - 2) + 6 * h
+    if x > block_w or y > block_h or count > 64:
+        return None
+    weight_bits = ise_bit_count(count, level)
+    if not 24 <= weight_bits <= 96:
+        return None
+    return x, y, bool(d), level, weight_bits
+
+
+@lru_cache(maxsize=None)
+def _color_level(integer_count: int, color_bits: int):
+    """Nivel de cuantización más alto con el que caben los endpoints, o None (< rango 6)."""
+    for level in range(len(QUANT_LEVELS) - 1, -1, -1):
+        if ise_bit_count(integer_count, level) <= color_bits:
+            return level if level >= 4 else None
+    return None
+
+
+# =======================
+#  REJILLA DE PESOS Y PARTICIONES
+# =======================
+
+@lru_cache(maxsize=None)
+def weight_infill(block_w: int, block_h: int, grid_x: int, grid_y: int):
+    """
+    Interpolación bilineal de la rejilla de pesos a los texels del bloque:
+    (índices (texels, 4), factores (texels, 4)) sobre los pesos de un plano.
+    """
+    ds = (1024 + block_w // 2) // (block_w - 1) if block_w > 1 else 0
+    dt = (1024 + block_h // 2) // (block_h - 1) if block_h > 1 else 0
+    t, s = np.mgrid[0:block_h, 0:block_w]
+    gs = ((ds * s) * (grid_x - 1) + 32) >> 6
+    gt = ((dt * t) * (grid_y - 1) + 32) >> 6
+    js, fs = gs >> 4, gs & 0xF
+    jt, ft = gt >> 4, gt & 0xF
+    v0 = js + jt * grid_x
+    w11 = (fs * ft + 8) >> 4
+    factors = np.stack([16 - fs - ft + w11, fs - w11, ft - w11, w11], axis=-1).reshape(-1, 4)
+    idx = np.stack([v0, v0 + 1, v0 + grid_x, v0 + grid_x + 1], axis=-1).reshape(-1, 4)
+    # Los vecinos fuera de la rejilla siempre llevan factor 0
+    idx = np.where(factors > 0, idx, 0)
+    return idx.astype(np.intp), factors.astype(np.int32)
+
+
+def _hash52(p: np.ndarray) -> np.ndarray:
+    p = p.astype(np.uint32)
+    p ^= p >> np.uint32(15)
+    p -= p << np.uint32(17)
+    p += p << np.uint32(7)
+    p += p << np.uint32(4)
+    p ^= p >> np.uint32(5)
+    p += p << np.uint32(16)
+    p ^= p >> np.uint32(7)
+    p ^= p >> np.uint32(3)
+    p ^= p << np.uint32(6)
+    p ^= p >> np.uint32(17)
+    return p
+
+
+def partition_table(seeds: np.ndarray, partitions: int, block_w: int, block_h: int) -> np.ndarray:
+    """Partición de cada texel para cada semilla de 10 bits -> (len(seeds), texels) uint8."""
+    t, s = np.mgrid[0:block_h, 0:block_w]
+    x = s.reshape(1, -1).astype(np.int64)
+    y = t.reshape(1, -1).astype(np.int64)
+    if block_w * block_h < 31:
+        x, y = x << 1, y << 1
+
+    seed = seeds.astype(np.int64) + (partitions - 1) * 1024
+    rnum = _hash52(seed).astype(np.int64)
+    sq = [(((rnum >> sh) & 0xF) ** 2) for sh in (0, 4, 8, 12, 16, 20, 24, 28, 18, 22, 26)]
+    sq.append((((rnum >> 30) | (rnum << 2)) & 0xF) ** 2)
+
+    odd = (seed & 1).astype(bool)
+    s2 = (seed & 2).astype(bool)
+    three = 6 if partitions == 3 else 5
+    sh1 = np.where(odd, np.where(s2, 4, 5), three)
+    sh2 = np.where(odd, three, np.where(s2, 4, 5))
+    sh3 = np.where(seed & 0x10, sh1, sh2)
+    shifts = (sh1, sh2, sh1, sh2, sh1, sh2, sh1, sh2, sh3, sh3, sh3, sh3)
+    sq = [(v >> sh)[:, None] for v, sh in zip(sq, shifts)]
+
+    # z = 0 en texturas 2D, así que seed9..seed12 sólo cuentan a través de rnum
+    a = (sq[0] * x + sq[1] * y + (rnum >> 14)[:, None]) & 0x3F
+    b = (sq[2] * x + sq[3] * y + (rnum >> 10)[:, None]) & 0x3F
+    c = (sq[4] * x + sq[5] * y + (rnum >> 6)[:, None]) & 0x3F
+    d = (sq[6] * x + sq[7] * y + (rnum >> 2)[:, None]) & 0x3F
+    if partitions < 4:
+        d = np.zeros_like(d)
+    if partitions < 3:
+        c = np.zeros_like(c)
+
+    return np.where((a >= b) & (a >= c) & (a >= d), 0,
+                    np.where((b >= c) & (b >= d), 1,
+                             np.where(c >= d, 2, 3))).astype(np.uint8)
+
+
+# =======================
+#  ENDPOINTS
+# =======================
+
+def _bit_transfer_signed(a, b):
+    b = (b >> 1) | (a & 0x80)
+    a = (a >> 1) & 0x3F
+    a = np.where(a & 0x20, a - 0x40, a)
+    return a, b
+
+
+def _blue_contract(r, g, b, a):
+    return (r + b) >> 1, (g + b) >> 1, b, a
+
+
+def decode_endpoints(mode: int, v: np.ndarray):
+    """
+    Valores descuantizados (N, k) de un modo de endpoint LDR -> (e0, e1), cada uno
+    (N, 4) int32 RGBA 0..255.
+    """
+    v = [v[:, i] for i in range(v.shape[1])]
+    full = np.full_like(v[0], 255)
+    if mode == 0:
+        e0 = (v[0], v[0], v[0], full)
+        e1 = (v[1], v[1], v[1], full)
+    elif mode == 1:
+        l0 = (v[0] >> 2) | (v[1] & 0xC0)
+        l1 = np.minimum(l0 + (v[1] & 0x3F), 255)
+        e0 = (l0, l0, l0, full)
+        e1 = (l1, l1, l1, full)
+    elif mode == 4:
+        e0 = (v[0], v[0], v[0], v[2])
+        e1 = (v[1], v[1], v[1], v[3])
+    elif mode == 5:
+        v1, v0 = _bit_transfer_signed(v[1], v[0])
+        v3, v2 = _bit_transfer_signed(v[3], v[2])
+        e0 = (v0, v0, v0, v2)
+        l1 = v0 + v1
+        e1 = (l1, l1, l1, v2 + v3)
+    elif mode == 6:
+        e0 = ((v[0] * v[3]) >> 8, (v[1] * v[3]) >> 8, (v[2] * v[3]) >> 8, full)
+        e1 = (v[0], v[1], v[2], full)
+    elif mode == 10:
+        e0 = ((v[0] * v[3]) >> 8, (v[1] * v[3]) >> 8, (v[2] * v[3]) >> 8, v[4])
+        e1 = (v[0], v[1], v[2], v[5])
+    elif mode in (8, 12):
+        a0, a1 = (v[6], v[7]) if mode == 12 else (full, full)
+        swap = (v[1] + v[3] + v[5]) < (v[0] + v[2] + v[4])
+        d0 = (v[0], v[2], v[4], a0)
+        d1 = (v[1], v[3], v[5], a1)
+        s0 = _blue_contract(v[1], v[3], v[5], a1)
+        s1 = _blue_contract(v[0], v[2], v[4], a0)
+        e0 = tuple(np.where(swap, s, d) for s, d in zip(s0, d0))
+        e1 = tuple(np.where(swap, s, d) for s, d in zip(s1, d1))
+    elif mode in (9, 13):
+        v1, v0 = _bit_transfer_signed(v[1], v[0])
+        v3, v2 = _bit_transfer_signed(v[3], v[2])
+        v5, v4 = _bit_transfer_signed(v[5], v[4])
+        if mode == 13:
+            v7, v6 = _bit_transfer_signed(v[7], v[6])
+        else:
+            v6, v7 = full, np.zeros_like(full)
+        swap = (v1 + v3 + v5) < 0
+        d0 = (v0, v2, v4, v6)
+        d1 = (v0 + v1, v2 + v3, v4 + v5, v6 + v7)
+        s0 = _blue_contract(v0 + v1, v2 + v3, v4 + v5, v6 + v7)
+        s1 = _blue_contract(v0, v2, v4, v6)
+        e0 = tuple(np.where(swap, s, d) for s, d in zip(s0, d0))
+        e1 = tuple(np.where(swap, s, d) for s, d in zip(s1, d1))
+    else:
+        raise ASTCDecodeError(f"modo de endpoint HDR {mode}")
+    e0 = np.clip(np.stack(e0, axis=-1), 0, 255).astype(np.int32)
+    e1 = np.clip(np.stack(e1, axis=-1), 0, 255).astype(np.int32)
+    return e0, e1
+
+
+# =======================
+#  DECODIFICACIÓN DE BLOQUES
+# =======================
+
+def _decode_group(bits_ext, cfg, block_w, block_h, srgb, out):
+    """Decodifica un grupo de bloques con la misma configuración; escribe en `out` (N, texels, 4)."""
+    grid_x, grid_y, dual, weight_level, weight_bits, partitions, modes, color_level, color_start, extra_bits = cfg
+    n = bits_ext.shape[0]
+    texels = block_w * block_h
+
+    # Pesos: ISE leído desde el bit 127 hacia abajo
+    reversed_bits = np.concatenate([bits_ext[:, 127::-1], bits_ext[:, 128:]], axis=1)
+    planes = 2 if dual else 1
+    weights = weight_unquant_table(weight_level)[
+        _read_ise(reversed_bits, grid_x * grid_y * planes, weight_level, 0)]
+    idx, factors = weight_infill(block_w, block_h, grid_x, grid_y)
+    plane_weights = [((weights[:, p::planes][:, idx] * factors).sum(axis=-1) + 8) >> 4 for p in range(planes)]
+
+    # Endpoints
+    counts = [((m >> 2) + 1) * 2 for m in modes]
+    values = color_unquant_table(color_level)[_read_ise(bits_ext, sum(counts), color_level, color_start)]
+    e0 = np.empty((n, partitions, 4), dtype=np.int32)
+    e1 = np.empty((n, partitions, 4), dtype=np.int32)
+    offset = 0
+    for p, (mode, count) in enumerate(zip(modes, counts)):
+        e0[:, p], e1[:, p] = decode_endpoints(mode, values[:, offset:offset + count])
+        offset += count
+
+    if partitions > 1:
+        seeds = _field(bits_ext, 13, 10)
+        unique_seeds, inverse = np.unique(seeds, return_inverse=True)
+        part = partition_table(unique_seeds, partitions, block_w, block_h)[inverse]   # (N, texels)
+        part = part[:, :, None].astype(np.intp)
+        e0 = np.take_along_axis(e0, part, axis=1)
+        e1 = np.take_along_axis(e1, part, axis=1)
+    else:
+        e0 = np.broadcast_to(e0, (n, texels, 4))
+        e1 = np.broadcast_to(e1, (n, texels, 4))
+
+    w = np.repeat(plane_weights[0][:, :, None], 4, axis=2)
+    if dual:
+        component = _field(bits_ext, 128 - weight_bits - extra_bits - 2, 2)
+        channel = np.arange(4)[None, None, :] == component[:, None, None]
+        w = np.where(channel, plane_weights[1][:, :, None], w)
+
+    # Interpolación en 16 bits (sRGB: e<<8 | 0x80; lineal: e*257)
+    if srgb:
+        c0, c1 = (e0 << 8) | 0x80, (e1 << 8) | 0x80
+    else:
+        c0, c1 = e0 * 257, e1 * 257
+    c = (c0 * (64 - w) + c1 * w + 32) >> 6
+    out[:] = (c >> 8) if srgb else (c * 255 + 32767) // 65535
+
+
+def _void_extent(bits_ext, srgb):
+    """Bloques void-extent -> color constante (N, 4); los HDR salen en magenta."""
+    color = np.stack([_field(bits_ext, 64 + 16 * i, 16) for i in range(4)], axis=-1)
+    rgba = color >> 8 if srgb else (color * 255 + 32767) // 65535
+    hdr = bits_ext[:, 9].astype(bool)
+    rgba[hdr] = ERROR_COLOR
+    return rgba
+
+
+def decode_astc_blocks(blocks: np.ndarray, block_w: int, block_h: int, srgb=False) -> np.ndarray:
+    """Bloques ASTC (N, 16) -> texels (N, block_h * block_w, 4) RGBA uint8."""
+    n = blocks.shape[0]
+    texels = block_w * block_h
+    out = np.empty((n, texels, 4), dtype=np.uint8)
+    out[:] = ERROR_COLOR
+
+    bits_ext = np.zeros((n, 129), dtype=np.uint8)
+    bits_ext[:, :128] = np.unpackbits(blocks, axis=1, bitorder="little")
+
+    mode = _field(bits_ext, 0, 11)
+    void = (mode & 0x1FF) == 0x1FC
+    if void.any():
+        out[void] = _void_extent(bits_ext[void], srgb)[:, None, :]
+
+    partitions = _field(bits_ext, 11, 2) + 1
+    cem = np.where(partitions == 1, _field(bits_ext, 13, 4), _field(bits_ext, 23, 6))
+    key = mode | (partitions << 11) | (cem << 14)
+    key[void] = -1
+
+    keys, inverse = np.unique(key, return_inverse=True)
+    for k, key_value in enumerate(keys):
+        if key_value < 0:
+            continue
+        members = np.flatnonzero(inverse == k)
+        m, pc, cem_low = int(key_value) & 0x7FF, (int(key_value) >> 11) & 7, int(key_value) >> 14
+        block_mode = decode_block_mode(m, block_w, block_h)
+        if block_mode is None or (pc == 4 and block_mode[2]):
+            continue
+        grid_x, grid_y, dual, weight_level, weight_bits = block_mode
+        group_bits = bits_ext[members]
+
+        # Con varias particiones y modos distintos, parte del CEM va justo debajo de los pesos
+        extra_bits = 3 * pc - 4 if pc > 1 and cem_low & 3 else 0
+        extra = _field(group_bits, 128 - weight_bits - extra_bits, extra_bits)
+        for extra_value in np.unique(extra):
+            sub = members[extra == extra_value]
+            modes = _endpoint_modes(pc, cem_low | (int(extra_value) << 6))
+            if any(md in HDR_ENDPOINT_MODES for md in modes):
+                continue
+            integer_count = sum(((md >> 2) + 1) * 2 for md in modes)
+            color_bits = (111 if pc == 1 else 99) - weight_bits - extra_bits - (2 if dual else 0)
+            color_level = _color_level(integer_count, max(0, color_bits)) if integer_count <= 18 else None
+            if color_level is None:
+                continue
+            cfg = (grid_x, grid_y, dual, weight_level, weight_bits, pc, modes, color_level,
+                   17 if pc == 1 else 29, extra_bits)
+            group_out = np.empty((sub.size, texels, 4), dtype=np.uint8)
+            _decode_group(bits_ext[sub], cfg, block_w, block_h, srgb, group_out)
+            out[sub] = group_out
+    return out
+
+
+def _endpoint_modes(partitions: int, cem: int):
+    """Campo CEM (con los bits extra ya unidos arriba) -> modo de endpoint de cada partición."""
+    if partitions == 1:
+        return (cem & 0xF,)
+    base = cem & 3
+    if base == 0:
+        return ((cem >> 2) & 0xF,) * partitions
+    base -= 1
+    classes = [((cem >> (2 + i)) & 1) + base for i in range(partitions)]
+    low = [(cem >> (2 + partitions + 2 * i)) & 3 for i in range(partitions)]
+    return tuple((c << 2) | l for c, l in zip(classes, low))
+
+
+def decode_astc(data, width: int, height: int, block_w: int, block_h: int, srgb=False) -> np.ndarray:
+    """Decodifica una superficie ASTC 2D completa (datos lineales, sin cabecera) -> (H, W, 4) RGBA."""
+    bw = max(1, (width + block_w - 1) // block_w)
+    bh = max(1, (height + block_h - 1) // block_h)
+    n = bw * bh
+    raw = np.frombuffer(data, dtype=np.uint8, count=n * BLOCK_BYTES)
+    blocks = raw.reshape(n, BLOCK_BYTES)
+
+    texels = np.empty((n, block_w * block_h, 4), dtype=np.uint8)
+    for start in range(0, n, CHUNK_BLOCKS):
+        texels[start:start + CHUNK_BLOCKS] = decode_astc_blocks(
+            blocks[start:start + CHUNK_BLOCKS], block_w, block_h, srgb)
+
+    img = texels.reshape(bh, bw, block_h, block_w, 4).transpose(0, 2, 1, 3, 4)
+    img = img.reshape(bh * block_h, bw * block_w, 4)[:height, :width]
+    return np.ascontiguousarray(img)
+
+
+# =======================
+#  BACKEND astcenc
+# =======================
+
+def find_astcenc():
+    """Ruta del primer astcenc del PATH, o None."""
+    for name in ASTCENC_NAMES:
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+
+def decode_with_astcenc(exe, data, width: int, height: int, block_w: int, block_h: int, srgb=False) -> np.ndarray:
+    """
+    Decodifica con astcenc. astcenc sólo trabaja con archivos, así que usa un
+    directorio temporal que se borra al terminar.
+    """
+    header = struct.pack("<4s3B", ASTC_MAGIC, block_w, block_h, 1)
+    header += b"".join(v.to_bytes(3, "little") for v in (width, height, 1))
+    with tempfile.TemporaryDirectory(prefix="astc_") as tmp:
+        src, dst = os.path.join(tmp, "in.astc"), os.path.join(tmp, "out.png")
+        with open(src, "wb") as f:
+            f.write(header)
+            f.write(data)
+        subprocess.run([exe, "-ds" if srgb else "-dl", src, dst], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        with Image.open(dst) as img:
+            return np.asarray(img.convert("RGBA")).copy()
+
+
+def decode_astc_auto(data, width: int, height: int, block_w: int, block_h: int, srgb=False,
+                     decoder=None) -> np.ndarray:
+    """decode_astc con el backend elegido en `decoder` (por defecto ASTC_DECODER)."""
+    decoder = decoder or ASTC_DECODER
+    exe = find_astcenc() if decoder in ("auto", "astcenc") else None
+    if decoder == "astcenc" and exe is None:
+        raise ASTCDecodeError("astcenc no encontrado en el PATH")
+    if exe:
+        return decode_with_astcenc(exe, data, width, height, block_w, block_h, srgb)
+    return decode_astc(data, width, height, block_w, block_h, srgb)
+
+
+def decode_astc_file(astc_path: Path, decoder=None):
+    """Lee un .astc con cabecera y lo decodifica. Devuelve (array RGBA, header)."""
+    data = Path(astc_path).read_bytes()
+    header = read_astc_header(data)
+    bw = (header["width"] + header["block_w"] - 1) // header["block_w"]
+    bh = (header["height"] + header["block_h"] - 1) // header["block_h"]
+    payload = memoryview(data)[ASTC_HEADER_SIZE:]
+    if len(payload) < bw * bh * BLOCK_BYTES:
+        raise ASTCDecodeError(f"datos truncados: {len(payload)} < {bw * bh * BLOCK_BYTES} bytes")
+    arr = decode_astc_auto(payload, header["width"], header["height"],
+                           header["block_w"], header["block_h"], decoder=decoder)
+    return arr, header
@@ -0,0 +1,270 @@
+# bntx.py
+"""
+Lector de contenedores BNTX (texturas de Switch).
+
+Recorre la cabecera BNTX/NX, el array de punteros a BRTI (info de cada textura) y
+la sección BRTD (datos), y devuelve cada textura con su formato real, tamaño,
+bloque, offsets de mips y capas. El archivo se lee con mmap y los datos se
+entregan como memoryview (sin copias), así que un BNTX con muchas texturas se
+procesa en una sola pasada.
+
+Los datos siguen en el layout block-linear de la GPU (ver tegra_swizzle).
+"""
+import mmap
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BNTX_MAGIC = b"BNTX"
+NX_MAGIC = b"NX  "
+BRTI_MAGIC = b"BRTI"
+BRTD_MAGIC = b"BRTD"
+
+# Tipo de formato (byte alto de `format`) -> (nombre, ancho bloque, alto bloque, bytes por bloque)
+FORMAT_TYPES = {
+    0x02: ("R8", 1, 1, 1),
+    0x07: ("R5G6B5", 1, 1, 2),
+    0x09: ("R8G8", 1, 1, 2),
+    0x0A: ("R16", 1, 1, 2),
+    0x0B: ("R8G8B8A8", 1, 1, 4),
+    0x0C: ("B8G8R8A8", 1, 1, 4),
+    0x0E: ("R10G10B10A2", 1, 1, 4),
+    0x1A: ("BC1", 4, 4, 8),
+    0x1B: ("BC2", 4, 4, 16),
+    0x1C: ("BC3", 4, 4, 16),
+    0x1D: ("BC4", 4, 4, 8),
+    0x1E: ("BC5", 4, 4, 16),
+    0x1F: ("BC6H", 4, 4, 16),
+    0x20: ("BC7", 4, 4, 16),
+    0x2D: ("ASTC_4x4", 4, 4, 16),
+    0x2E: ("ASTC_5x4", 5, 4, 16),
+    0x2F: ("ASTC_5x5", 5, 5, 16),
+    0x30: ("ASTC_6x5", 6, 5, 16),
+    0x31: ("ASTC_6x6", 6, 6, 16),
+    0x32: ("ASTC_8x5", 8, 5, 16),
+    0x33: ("ASTC_8x6", 8, 6, 16),
+    0x34: ("ASTC_8x8", 8, 8, 16),
+    0x35: ("ASTC_10x5", 10, 5, 16),
+    0x36: ("ASTC_10x6", 10, 6, 16),
+    0x37: ("ASTC_10x8", 10, 8, 16),
+    0x38: ("ASTC_10x10", 10, 10, 16),
+    0x39: ("ASTC_12x10", 12, 10, 16),
+    0x3A: ("ASTC_12x12", 12, 12, 16),
+}
+
+# Byte bajo de `format`
+FORMAT_VARIANTS = {1: "UNORM", 2: "SNORM", 3: "UINT", 4: "SINT", 5: "FLOAT", 6: "SRGB", 10: "UFLOAT"}
+
+# Cabecera BNTX (0x20) + cabecera NX (0x28)
+_BNTX_HEADER = "4s4xI2sBBIHHII"
+_NX_HEADER = "4sIqqqq"
+# BRTI tras su cabecera de bloque (magic, next, size, pad = 0x10 bytes)
+_BRTI_INFO = "2B4H2x2I3i3I20x3IB3x4q"
+
+
+class BNTXError(ValueError):
+    pass
+
+
+@dataclass
+class BNTXTexture:
+    name: str
+    format_type: int
+    format_variant: int
+    width: int
+    height: int
+    depth: int
+    mip_count: int
+    array_layers: int
+    tile_mode: int
+    block_height_log2: int
+    image_size: int
+    alignment: int
+    comp_sel: int
+    dim: int
+    data_offset: int                      # offset absoluto en el archivo (mip 0, capa 0)
+    mip_offsets: list = field(default_factory=list)  # relativos a data_offset
+    data: memoryview = None               # image_size bytes, todas las capas y mips
+
+    @property
+    def format_name(self) -> str:
+        base = FORMAT_TYPES.get(self.format_type, (f"0x{self.format_type:02X}",))[0]
+        return f"{base}_{FORMAT_VARIANTS.get(self.format_variant, self.format_variant)}"
+
+    @property
+    def block_size(self):
+        """(ancho, alto) del bloque de compresión (1x1 sin comprimir)."""
+        fmt = FORMAT_TYPES.get(self.format_type)
+        return (fmt[1], fmt[2]) if fmt else (1, 1)
+
+    @property
+    def bytes_per_block(self) -> int:
+        fmt = FORMAT_TYPES.get(self.format_type)
+        if fmt is None:
+            raise BNTXError(f"formato desconocido 0x{self.format_type:02X} en {self.name}")
+        return fmt[3]
+
+    @property
+    def is_astc(self) -> bool:
+        return 0x2D <= self.format_type <= 0x3A
+
+    @property
+    def layer_size(self) -> int:
+        return self.image_size // max(1, self.array_layers)
+
+    def layer(self, index: int = 0) -> memoryview:
+        """Datos (swizzled) de una capa, con todos sus mips."""
+        size = self.layer_size
+        return self.data[index * size:(index + 1) * size]
+
+    def mip(self, level: int = 0, layer: int = 0) -> memoryview:
+        """Datos (swizzled) de un mip de una capa."""
+        start = self.mip_offsets[level]
+        end = self.mip_offsets[level + 1] if level + 1 < len(self.mip_offsets) else self.layer_size
+        return self.layer(layer)[start:end]
+
+
+class BNTXFile:
+    """
+    Abre un .bntx con mmap. Uso:
+
+        with BNTXFile(path) as bntx:
+            for tex in bntx.textures():
+                ...  # tex.data es un memoryview válido mientras el archivo esté abierto
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = None
+        self._mmap = None
+        self.buf = None
+        self.endian = "<"
+        self.version = 0
+        self.texture_count = 0
+        self._info_ptrs = 0
+        self._data_block = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap de un archivo vacío
+            self.close()
+            raise BNTXError(f"{self.path.name}: archivo vacío")
+        self.buf = memoryview(self._mmap)
+        self._parse_header()
+
+    def close(self):
+        if self.buf is not None:
+            self.buf.release()
+            self.buf = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Aún hay memoryviews de texturas vivos; se cierra al recogerlos
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _parse_header(self):
+        buf = self.buf
+        if len(buf) < 0x48 or bytes(buf[:4]) != BNTX_MAGIC:
+            raise BNTXError(f"{self.path.name}: no es un BNTX")
+        bom = bytes(buf[0x0C:0x0E])
+        self.endian = "<" if bom == b"\xFF\xFE" else ">"
+        _, self.version, _, _, _, _, _, _, _, _ = struct.unpack_from(self.endian + _BNTX_HEADER, buf, 0)
+
+        magic, count, info_ptrs, data_block, _, _ = struct.unpack_from(self.endian + _NX_HEADER, buf, 0x20)
+        if magic != NX_MAGIC:
+            raise BNTXError(f"{self.path.name}: falta la cabecera NX")
+        if data_block + 0x10 > len(buf) or bytes(buf[data_block:data_block + 4]) != BRTD_MAGIC:
+            raise BNTXError(f"{self.path.name}: sección BRTD no encontrada en 0x{data_block:X}")
+        self.texture_count = count
+        self._info_ptrs = info_ptrs
+        self._data_block = data_block
+
+    def _u64(self, off: int) -> int:
+        return struct.unpack_from(self.endian + "q", self.buf, off)[0]
+
+    def _string(self, off: int) -> str:
+        # Tabla de strings: u16 longitud + bytes
+        length = struct.unpack_from(self.endian + "H", self.buf, off)[0]
+        return bytes(self.buf[off + 2:off + 2 + length]).decode("utf-8", errors="replace")
+
+    def textures(self):
+        """Genera un BNTXTexture por cada BRTI, en orden."""
+        for i in range(self.texture_count):
+            yield self.texture(i)
+
+    def texture(self, index: int) -> BNTXTexture:
+        brti = self._u64(self._info_ptrs + index * 8)
+        if bytes(self.buf[brti:brti + 4]) != BRTI_MAGIC:
+            raise BNTXError(f"{self.path.name}: BRTI #{index} no encontrado en 0x{brti:X}")
+
+        (flags, dim, tile_mode, swizzle, mip_count, num_samples, fmt, access_flags,
+         width, height, depth, array_layers, layout, layout2, image_size, alignment,
+         comp_sel, tex_type, name_addr, parent_addr, ptrs_addr, user_data_addr
+         ) = struct.unpack_from(self.endian + _BRTI_INFO, self.buf, brti + 0x10)
+
+        mip_count = max(1, mip_count)
+        ptrs = [self._u64(ptrs_addr + m * 8) for m in range(mip_count)]
+        data_offset = ptrs[0]
+        if data_offset + image_size > len(self.buf):
+            raise BNTXError(f"{self.path.name}: datos de la textura #{index} fuera del archivo")
+
+        return BNTXTexture(
+            name=self._string(name_addr) if name_addr else f"texture_{index}",
+            format_type=fmt >> 8,
+            format_variant=fmt & 0xFF,
+            width=width,
+            height=height,
+            depth=max(1, depth),
+            mip_count=mip_count,
+            array_layers=max(1, array_layers),
+            tile_mode=tile_mode,
+            block_height_log2=layout & 7,
+            image_size=image_size,
+            alignment=alignment,
+            comp_sel=comp_sel,
+            dim=dim,
+            data_offset=data_offset,
+            mip_offsets=[p - data_offset for p in ptrs],
+            data=self.buf[data_offset:data_offset + image_size],
+        )
+
+
+def read_textures(path):
+    """
+    Atajo: lista de texturas de un BNTX. Las memoryviews siguen apuntando al mmap,
+    que se mantiene abierto hasta que se liberan todas.
+    """
+    bntx = BNTXFile(path)
+    bntx.open()
+    return list(bntx.textures())
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Uso: python bntx.py <archivo.bntx> [...]")
+        sys.exit(1)
+    for p in sys.argv[1:]:
+        with BNTXFile(p) as f:
+            print(f"{p}: {f.texture_count} texturas (versión 0x{f.version:08X})")
+            for t in f.textures():
+                bw, bh = t.block_size
+                print(f"  {t.name}: {t.format_name} {t.width}x{t.height} bloque {bw}x{bh} "
+                      f"mips={t.mip_count} capas={t.array_layers} tam={t.image_size} "
+                      f"blockHeight={1 << t.block_height_log2} @0x{t.data_offset:X}")
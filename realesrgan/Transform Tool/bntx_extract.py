@@ -0,0 +1,258 @@
+# bntx_extract.py
+"""
+Extracción nativa de texturas BNTX (sustituye a quickbms + Switch_BNTX.bms).
+
+Cada textura se lee con bntx.BNTXFile, se deswizzlea con tegra_swizzle y se
+escribe como .dds (BC1-BC7 y formatos sin comprimir, que luego convierte dsspng)
+o como .astc con su cabecera de 16 bytes. Con `to_png` las texturas que se pueden
+decodificar en proceso (ASTC, BC1-BC5, RGBA8/BGRA8, R8) se escriben directamente
+como PNG, sin archivos intermedios. Sólo se exporta el mip 0; las texturas con
+varias capas (arrays, cubemaps) se exportan como <nombre>_<capa>.
+"""
+import glob
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from astc_decode import decode_astc_auto
+from bntx import BNTXFile
+from dds_decode import bc5_to_rgba, decode_bc
+from dsspng import array_to_image, save_png
+from tegra_swizzle import deswizzle, mip_block_heights
+
+# format_type BNTX -> FourCC DDS clásico (lo que reconoce dsspng.detect_dds_format)
+DDS_FOURCC = {
+    0x1A: b"DXT1",
+    0x1B: b"DXT3",
+    0x1C: b"DXT5",
+    0x1D: b"ATI1",
+    0x1E: b"ATI2",
+}
+
+# (format_type, variante) -> DXGI_FORMAT para la cabecera DX10
+DXGI_FORMATS = {
+    (0x02, 1): 61,    # R8_UNORM
+    (0x07, 1): 85,    # B5G6R5_UNORM
+    (0x09, 1): 49,    # R8G8_UNORM
+    (0x0B, 1): 28,    # R8G8B8A8_UNORM
+    (0x0B, 6): 29,    # R8G8B8A8_UNORM_SRGB
+    (0x0C, 1): 87,    # B8G8R8A8_UNORM
+    (0x0C, 6): 91,    # B8G8R8A8_UNORM_SRGB
+    (0x0E, 1): 24,    # R10G10B10A2_UNORM
+    (0x1A, 6): 72,    # BC1_UNORM_SRGB
+    (0x1B, 6): 75,    # BC2_UNORM_SRGB
+    (0x1C, 6): 78,    # BC3_UNORM_SRGB
+    (0x1D, 2): 81,    # BC4_SNORM
+    (0x1E, 2): 84,    # BC5_SNORM
+    (0x1F, 5): 96,    # BC6H_SF16
+    (0x1F, 10): 95,   # BC6H_UF16
+    (0x20, 1): 98,    # BC7_UNORM
+    (0x20, 6): 99,    # BC7_UNORM_SRGB
+}
+
+ASTC_MAGIC = b"\x13\xAB\xA1\x5C"
+
+WINDOWS_RESERVED_NAMES = {"CON", "PRN", "AUX", "NUL", *(f"COM{i}" for i in range(1, 10)),
+                          *(f"LPT{i}" for i in range(1, 10))}
+
+
+def astc_header(block_w: int, block_h: int, width: int, height: int, depth: int = 1) -> bytes:
+    """Cabecera ASTC estándar de 16 bytes (magic, bloque, tamaño en 24 bits)."""
+    return struct.pack(
+        "<4s3B9B",
+        ASTC_MAGIC,
+        block_w, block_h, 1,
+        width & 0xFF, (width >> 8) & 0xFF, (width >> 16) & 0xFF,
+        height & 0xFF, (height >> 8) & 0xFF, (height >> 16) & 0xFF,
+        depth & 0xFF, (depth >> 8) & 0xFF, (depth >> 16) & 0xFF,
+    )
+
+
+def write_vectored(path, *buffers):
+    """
+    Escribe cabecera + datos sin concatenarlos (sin copia): una llamada writev con
+    todos los buffers (memoryview/bytes/arrays contiguos) donde existe; en Windows,
+    escrituras seguidas sobre el archivo sin buffer.
+    """
+    views = [memoryview(b).cast("B") for b in buffers]
+    if hasattr(os, "writev"):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            while views:
+                n = os.writev(fd, views)
+                # writev puede escribir de menos: descartar lo ya escrito y seguir
+                while views and n >= len(views[0]):
+                    n -= len(views[0])
+                    views.pop(0)
+                if views and n:
+                    views[0] = views[0][n:]
+        finally:
+            os.close(fd)
+    else:
+        with open(path, "wb", buffering=0) as f:
+            for view in views:
+                while view:
+                    view = view[f.write(view):]
+
+
+def expand_inputs(patterns, suffix: str):
+    """
+    Lista de rutas con extensión `suffix` a partir de archivos, carpetas (recursivo)
+    o patrones glob. Sin duplicados, ordenada.
+    """
+    found = set()
+    for pattern in patterns:
+        p = Path(pattern)
+        if p.is_dir():
+            found.update(q for q in p.rglob("*") if q.suffix.lower() == suffix)
+        elif p.is_file():
+            found.add(p)
+        else:
+            found.update(Path(q) for q in glob.glob(str(pattern), recursive=True)
+                         if q.lower().endswith(suffix))
+    return sorted(found)
+
+
+def dds_header(tex, payload_size: int) -> bytes:
+    """Cabecera DDS (y DX10 si hace falta) para el mip 0 de `tex`. Lanza KeyError si no hay formato."""
+    key = (tex.format_type, tex.format_variant)
+    fourcc = None if key in DXGI_FORMATS else DDS_FOURCC.get(tex.format_type)
+    if fourcc is None and key not in DXGI_FORMATS:
+        raise KeyError(f"formato {tex.format_name} sin equivalente DDS")
+
+    flags = 0x1 | 0x2 | 0x4 | 0x1000 | 0x80000   # CAPS|HEIGHT|WIDTH|PIXELFORMAT|LINEARSIZE
+    pixel_format = struct.pack("<II4s5I", 32, 0x4, fourcc or b"DX10", 0, 0, 0, 0, 0)
+    header = struct.pack(
+        "<4s7I44x32sI16x",
+        b"DDS ", 124, flags, tex.height, tex.width, payload_size, 0, 1,
+        pixel_format, 0x1000,
+    )
+    if fourcc is None:
+        # dxgiFormat, TEXTURE2D, miscFlag, arraySize, miscFlags2
+        header += struct.pack("<5I", DXGI_FORMATS[key], 3, 0, 1, 0)
+    return header
+
+
+def deswizzle_mip0(tex, layer: int = 0):
+    """Mip 0 de una capa deswizzleado -> array uint8 (filas de bloques, bytes)."""
+    blk_w, blk_h = tex.block_size
+    block_height = mip_block_heights(tex.height, blk_h, tex.block_height_log2, 1)[0]
+    return deswizzle(tex.mip(0, layer), tex.width, tex.height, blk_w, blk_h,
+                     tex.bytes_per_block, block_height, tex.tile_mode)
+
+
+def decode_texture(tex, layer: int = 0, decoder=None):
+    """
+    Mip 0 de una capa decodificado a array (H, W, 4), o (H, W) para R8/BC4.
+    Devuelve None si el formato no tiene decodificador en proceso (BC6H/BC7...).
+    `decoder` elige el backend ASTC (ver astc_decode.ASTC_DECODER).
+    """
+    if tex.is_astc:
+        blk_w, blk_h = tex.block_size
+        return decode_astc_auto(deswizzle_mip0(tex, layer), tex.width, tex.height, blk_w, blk_h,
+                                srgb=tex.format_variant == 6, decoder=decoder)
+    if 0x1A <= tex.format_type <= 0x1E and tex.format_variant in (1, 6):
+        fmt = "BC" + str(tex.format_type - 0x19)
+        arr = decode_bc(deswizzle_mip0(tex, layer), tex.width, tex.height, fmt)
+        # BC5 como lo deja texconv con R8G8B8A8_UNORM (swizzle r,g,1,1)
+        return bc5_to_rgba(arr, fill_blue=255) if fmt == "BC5" else arr
+    if tex.format_type in (0x02, 0x0B, 0x0C):
+        channels = 1 if tex.format_type == 0x02 else 4
+        arr = deswizzle_mip0(tex, layer)[:, :tex.width * channels]
+        if channels == 1:
+            return np.ascontiguousarray(arr)
+        arr = arr.reshape(tex.height, tex.width, 4)
+        return np.ascontiguousarray(arr[..., [2, 1, 0, 3]] if tex.format_type == 0x0C else arr)
+    return None
+
+
+def safe_file_name(name: str, default: str = "texture") -> str:
+    """`name` válido como nombre de archivo: sin separadores de ruta ni caracteres reservados."""
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name).strip(".") or default
+    # Nombres de dispositivo de Windows (CON, NUL, COM1...), también con extensión
+    if name.split(".")[0].upper() in WINDOWS_RESERVED_NAMES:
+        name = "_" + name
+    return name
+
+
+def texture_file_name(tex, layer: int) -> str:
+    name = safe_file_name(tex.name)
+    return f"{name}_{layer}" if tex.array_layers > 1 else name
+
+
+def extract_bntx(bntx_path, out_dir, to_png=False, decoder=None):
+    """
+    Extrae todas las texturas de un .bntx a `out_dir`; con `to_png`, las que se
+    pueden decodificar salen ya como .png (el resto como .dds/.astc).
+    Devuelve (escritos: [Path], errores: [(nombre, mensaje)]).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written, errors = [], []
+    with BNTXFile(bntx_path) as bntx:
+        for tex in bntx.textures():
+            for layer in range(tex.array_layers):
+                name = texture_file_name(tex, layer)
+                try:
+                    arr = decode_texture(tex, layer, decoder) if to_png else None
+                    if arr is not None:
+                        out = out_dir / (name + ".png")
+                        save_png(array_to_image(arr), out)
+                        written.append(out)
+                        continue
+
+                    payload = deswizzle_mip0(tex, layer)
+                    if tex.is_astc:
+                        blk_w, blk_h = tex.block_size
+                        out = out_dir / (name + ".astc")
+                        header = astc_header(blk_w, blk_h, tex.width, tex.height)
+                    else:
+                        out = out_dir / (name + ".dds")
+                        header = dds_header(tex, payload.nbytes)
+                    write_vectored(out, header, payload)
+                    written.append(out)
+                except Exception as e:
+                    errors.append((f"{Path(bntx_path).name}:{name}", f"{type(e).__name__}: {e}"))
+    return written, errors
+
+
+def extract_tree(input_dir, out_dir, to_png=False, decoder=None):
+    """
+    Extrae todos los .bntx de `input_dir` (recursivo) a out_dir/<nombre_bntx>/,
+    el mismo layout que dejaba quickbms (flatten_dds_in_textures lo aplana).
+    Devuelve (nº de .bntx, escritos, errores).
+    """
+    input_dir, out_dir = Path(input_dir), Path(out_dir)
+    files = sorted(p for p in input_dir.rglob("*.bntx") if out_dir not in p.parents)
+    written, errors = [], []
+    for path in files:
+        try:
+            w, e = extract_bntx(path, out_dir / path.stem, to_png, decoder)
+        except Exception as exc:
+            w, e = [], [(path.name, f"{type(exc).__name__}: {exc}")]
+        written += w
+        errors += e
+    return len(files), written, errors
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extrae las texturas de archivos .bntx (DDS/ASTC o PNG).")
+    parser.add_argument("src", help="Carpeta o archivo .bntx")
+    parser.add_argument("dst", help="Carpeta de salida")
+    parser.add_argument("--png", action="store_true", help="Decodificar en proceso y escribir PNG directamente")
+    parser.add_argument("--astc-decoder", choices=("auto", "builtin", "astcenc"), default=None,
+                        help="Backend ASTC (auto: astcenc si está en el PATH)")
+    args = parser.parse_args()
+
+    src, dst = Path(args.src), Path(args.dst)
+    if src.is_dir():
+        count, written, errors = extract_tree(src, dst, args.png, args.astc_decoder)
+    else:
+        count, (written, errors) = 1, extract_bntx(src, dst, args.png, args.astc_decoder)
+    for name, msg in errors:
+        print(f"[FAIL] {name}: {msg}")
+    print(f"{count} BNTX -> {len(written)} texturas, {len(errors)} errores")
@@ -0,0 +1,256 @@
+# dds_decode.py
+"""
+Decodificador DDS en proceso (sin texconv) para los formatos comprimidos por bloques
+que reconoce dsspng.detect_dds_format: DXT1/3/5 (BC1-3), ATI1/BC4, ATI2/BC5 y sus
+equivalentes con cabecera DX10.
+
+Cada formato se decodifica como una rejilla de bloques completa con NumPy (sin
+bucles por bloque). Sólo se decodifica el mip 0 de la primera capa.
+"""
+import struct
+from pathlib import Path
+
+import numpy as np
+
+DDS_MAGIC = b"DDS "
+DDS_HEADER_SIZE = 128
+DX10_HEADER_SIZE = 20
+
+# FourCC -> formato BC
+FOURCC_FORMATS = {
+    "DXT1": "BC1",
+    "DXT2": "BC2",
+    "DXT3": "BC2",
+    "DXT4": "BC3",
+    "DXT5": "BC3",
+    "ATI1": "BC4",
+    "BC4U": "BC4",
+    "BC4 ": "BC4",
+    "ATI2": "BC5",
+    "BC5U": "BC5",
+    "BC5 ": "BC5",
+}
+
+# DXGI_FORMAT (cabecera DX10) -> formato BC. Sólo variantes TYPELESS/UNORM/SRGB:
+# las SNORM necesitan otra interpretación y se dejan a texconv.
+DXGI_FORMATS = {
+    70: "BC1", 71: "BC1", 72: "BC1",
+    73: "BC2", 74: "BC2", 75: "BC2",
+    76: "BC3", 77: "BC3", 78: "BC3",
+    79: "BC4", 80: "BC4",
+    82: "BC5", 83: "BC5",
+}
+
+BLOCK_BYTES = {"BC1": 8, "BC2": 16, "BC3": 16, "BC4": 8, "BC5": 16}
+
+# Bloques decodificados por tanda: acota la memoria de los arrays de índices
+# intermedios (16 índices por bloque) en texturas de 4K/8K.
+CHUNK_BLOCKS = 1 << 16
+
+
+class DDSDecodeError(ValueError):
+    pass
+
+
+def read_dds_header(data) -> dict:
+    """
+    Parsea la cabecera DDS (y DX10 si la hay) de `data` (bytes/memoryview).
+    Devuelve dict con {width, height, mip_count, fourCC, dxgi_format, format, data_offset};
+    `format` es "BC1".."BC5" o None si no lo soporta este decodificador.
+    """
+    if len(data) < DDS_HEADER_SIZE or bytes(data[:4]) != DDS_MAGIC:
+        raise DDSDecodeError("no es un DDS")
+    height, width = struct.unpack_from("<II", data, 12)
+    mip_count = struct.unpack_from("<I", data, 28)[0]
+    fourcc = bytes(data[84:88]).decode("ascii", errors="ignore")
+
+    dxgi_format = None
+    data_offset = DDS_HEADER_SIZE
+    if fourcc == "DX10":
+        if len(data) < DDS_HEADER_SIZE + DX10_HEADER_SIZE:
+            raise DDSDecodeError("cabecera DX10 truncada")
+        dxgi_format = struct.unpack_from("<I", data, DDS_HEADER_SIZE)[0]
+        data_offset += DX10_HEADER_SIZE
+        fmt = DXGI_FORMATS.get(dxgi_format)
+    else:
+        fmt = FOURCC_FORMATS.get(fourcc)
+
+    return {
+        "width": width,
+        "height": height,
+        "mip_count": max(1, mip_count),
+        "fourCC": fourcc,
+        "dxgi_format": dxgi_format,
+        "format": fmt,
+        "data_offset": data_offset,
+    }
+
+
+def can_decode(info: dict) -> bool:
+    """True si `info` (de detect_dds_format o read_dds_header) es un formato soportado."""
+    if not info.get("valid", True):
+        return False
+    if info.get("dxgi_format") is not None:
+        return info["dxgi_format"] in DXGI_FORMATS
+    return info.get("fourCC") in FOURCC_FORMATS
+
+
+# =======================
+#  DECODIFICACIÓN DE BLOQUES
+# =======================
+
+def _u64(blocks: np.ndarray, start: int, count: int) -> np.ndarray:
+    """Junta `count` bytes little-endian de cada bloque en un uint64 por bloque."""
+    out = np.zeros(blocks.shape[0], dtype=np.uint64)
+    for i in range(count):
+        out |= blocks[:, start + i].astype(np.uint64) << np.uint64(8 * i)
+    return out
+
+
+def _indices(bits: np.ndarray, width: int) -> np.ndarray:
+    """Extrae los 16 índices de `width` bits de cada bloque -> (N, 16) uint8."""
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(width)
+    mask = np.uint64((1 << width) - 1)
+    return ((bits[:, None] >> shifts) & mask).astype(np.uint8)
+
+
+def _expand_565(c: np.ndarray) -> np.ndarray:
+    r = (c >> 11) & 0x1F
+    g = (c >> 5) & 0x3F
+    b = c & 0x1F
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=-1)
+
+
+def decode_bc1_blocks(blocks: np.ndarray, four_color_only=False) -> np.ndarray:
+    """
+    Bloques de color BC1 (N, 8) -> texels (N, 16, 4) RGBA uint8.
+    `four_color_only`: BC2/BC3 siempre usan la paleta de 4 colores.
+    """
+    c0 = blocks[:, 0].astype(np.int32) | (blocks[:, 1].astype(np.int32) << 8)
+    c1 = blocks[:, 2].astype(np.int32) | (blocks[:, 3].astype(np.int32) << 8)
+    rgb0 = _expand_565(c0)
+    rgb1 = _expand_565(c1)
+
+    four = np.ones_like(c0, dtype=bool) if four_color_only else (c0 > c1)
+    four3 = four[:, None]
+
+    pal = np.empty((blocks.shape[0], 4, 4), dtype=np.uint8)
+    pal[:, 0, :3] = rgb0
+    pal[:, 1, :3] = rgb1
+    pal[:, 2, :3] = np.where(four3, (2 * rgb0 + rgb1 + 1) // 3, (rgb0 + rgb1 + 1) // 2)
+    pal[:, 3, :3] = np.where(four3, (rgb0 + 2 * rgb1 + 1) // 3, 0)
+    pal[:, :3, 3] = 255
+    pal[:, 3, 3] = np.where(four, 255, 0)
+
+    idx = _indices(_u64(blocks, 4, 4), 2)
+    return np.take_along_axis(pal, idx[:, :, None].astype(np.intp), axis=1)
+
+
+def decode_bc4_blocks(blocks: np.ndarray) -> np.ndarray:
+    """Bloques BC4 (N, 8) -> texels (N, 16) uint8 (un canal)."""
+    a0 = blocks[:, 0].astype(np.int32)
+    a1 = blocks[:, 1].astype(np.int32)
+    eight = (a0 > a1)[:, None]
+
+    i = np.arange(1, 7, dtype=np.int32)
+    interp8 = ((7 - i) * a0[:, None] + i * a1[:, None] + 3) // 7
+    j = np.arange(1, 5, dtype=np.int32)
+    interp6 = ((5 - j) * a0[:, None] + j * a1[:, None] + 2) // 5
+    interp6 = np.concatenate(
+        [interp6, np.zeros_like(a0)[:, None], np.full_like(a0, 255)[:, None]], axis=1
+    )
+
+    pal = np.empty((blocks.shape[0], 8), dtype=np.uint8)
+    pal[:, 0] = a0
+    pal[:, 1] = a1
+    pal[:, 2:] = np.where(eight, interp8, interp6)
+
+    idx = _indices(_u64(blocks, 2, 6), 3)
+    return np.take_along_axis(pal, idx.astype(np.intp), axis=1)
+
+
+def decode_bc2_blocks(blocks: np.ndarray) -> np.ndarray:
+    """Bloques BC2 (N, 16) -> texels (N, 16, 4): alfa explícito de 4 bits + color BC1."""
+    out = decode_bc1_blocks(blocks[:, 8:], four_color_only=True)
+    alpha4 = _indices(_u64(blocks, 0, 8), 4)
+    out[:, :, 3] = alpha4 * 17
+    return out
+
+
+def decode_bc3_blocks(blocks: np.ndarray) -> np.ndarray:
+    """Bloques BC3 (N, 16) -> texels (N, 16, 4): alfa tipo BC4 + color BC1."""
+    out = decode_bc1_blocks(blocks[:, 8:], four_color_only=True)
+    out[:, :, 3] = decode_bc4_blocks(blocks[:, :8])
+    return out
+
+
+def decode_bc5_blocks(blocks: np.ndarray) -> np.ndarray:
+    """Bloques BC5 (N, 16) -> texels (N, 16, 2): dos bloques BC4 (R y G)."""
+    return np.stack([decode_bc4_blocks(blocks[:, :8]), decode_bc4_blocks(blocks[:, 8:])], axis=-1)
+
+
+_BLOCK_DECODERS = {
+    "BC1": (decode_bc1_blocks, 4),
+    "BC2": (decode_bc2_blocks, 4),
+    "BC3": (decode_bc3_blocks, 4),
+    "BC4": (decode_bc4_blocks, 1),
+    "BC5": (decode_bc5_blocks, 2),
+}
+
+
+def decode_bc(data, width: int, height: int, fmt: str) -> np.ndarray:
+    """
+    Decodifica una superficie BC completa (mip 0) a un array:
+    BC1-3 -> (H, W, 4) RGBA, BC4 -> (H, W), BC5 -> (H, W, 2) RG.
+    """
+    decode_blocks, channels = _BLOCK_DECODERS[fmt]
+    block_bytes = BLOCK_BYTES[fmt]
+    bw = max(1, (width + 3) // 4)
+    bh = max(1, (height + 3) // 4)
+    n = bw * bh
+
+    raw = np.frombuffer(data, dtype=np.uint8, count=n * block_bytes)
+    blocks = raw.reshape(n, block_bytes)
+
+    texels = np.empty((n, 16, channels), dtype=np.uint8)
+    for start in range(0, n, CHUNK_BLOCKS):
+        chunk = decode_blocks(blocks[start:start + CHUNK_BLOCKS])
+        texels[start:start + CHUNK_BLOCKS] = chunk.reshape(chunk.shape[0], 16, channels)
+
+    # (bh, bw, 4, 4, C) -> (bh, 4, bw, 4, C) -> (H', W', C) y recorte a tamaño real
+    img = texels.reshape(bh, bw, 4, 4, channels).transpose(0, 2, 1, 3, 4)
+    img = img.reshape(bh * 4, bw * 4, channels)[:height, :width]
+    if channels == 1:
+        img = img[:, :, 0]
+    return np.ascontiguousarray(img)
+
+
+def decode_dds(dds_path: Path):
+    """
+    Lee y decodifica un DDS BC1-BC5. Devuelve (array, header) con el array en el
+    formato de decode_bc. Lanza DDSDecodeError si el formato no está soportado.
+    """
+    data = Path(dds_path).read_bytes()
+    header = read_dds_header(data)
+    fmt = header["format"]
+    if fmt is None:
+        raise DDSDecodeError(f"formato no soportado: {header['fourCC']} / DXGI {header['dxgi_format']}")
+
+    width, height = header["width"], header["height"]
+    needed = max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * BLOCK_BYTES[fmt]
+    payload = memoryview(data)[header["data_offset"]:]
+    if len(payload) < needed:
+        raise DDSDecodeError(f"datos truncados: {len(payload)} < {needed} bytes")
+    return decode_bc(payload, width, height, fmt), header
+
+
+def bc5_to_rgba(rg: np.ndarray, fill_blue=0) -> np.ndarray:
+    """
+    RG (H, W, 2) -> RGBA (H, W, 4) como lo deja texconv al pedir R8G8B8A8_UNORM:
+    B = `fill_blue` (0, o 255 para el swizzle r,g,1,1) y A = 255.
+    """
+    out = np.empty(rg.shape[:2] + (4,), dtype=np.uint8)
+    out[..., :2] = rg
+    out[..., 2] = fill_blue
+    out[..., 3] = 255
+    return out
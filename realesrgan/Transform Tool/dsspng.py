@@ -1,14 +1,23 @@
 # dsspng.py
 import os
 import sys
+import json
 import struct
+import hashlib
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-import tkinter as tk
-from tkinter import filedialog
 
-from PIL import Image, ImageOps
-import math
+import numpy as np
+from PIL import Image
+
+from dds_decode import DXGI_FORMATS, FOURCC_FORMATS, bc5_to_rgba, can_decode, decode_dds
+
+# Perfiles de codificación PNG compartidos con el addon (realesrgan/image_io.py).
+# Se añade al final del path para no tapar los módulos de esta carpeta.
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from image_io import DEFAULT_PROFILE, PNG_PROFILES, save_png
+import image_mirror
 
 # =======================
 #  CONFIGURACIÓN
@@ -26,11 +35,26 @@ RECONSTRUCT_BC5_NORMALS = True
 # Heurística: considerar archivos normal map si el nombre contiene alguno de estos tokens
 NORMAL_NAME_HINTS = ("_nrm", "_norm", "normal", "_nrml")
 
+# Lightmaps (se visualizan como R->Rojo, G->Verde)
+LIGHTMAP_NAME_HINT = "_lym"
+
 # Forzar sobrescritura si ya existe (texconv usa -y; aquí decidimos si saltar pasos de postproceso)
 OVERWRITE_EXISTING = True
 
 TEXCONV_EXE = Path(__file__).resolve().parent / "dependencies" / "texconv.exe"
 
+# Decodificador: "auto" usa dds_decode (NumPy, sin texconv) para BC1-BC5 y texconv
+# para el resto o si falla; "builtin" sólo dds_decode; "texconv" como antes.
+DDS_DECODER = "auto"
+
+# texconv acepta muchos archivos por llamada: agrupamos para no lanzar un proceso por DDS
+TEXCONV_BATCH_FILES = 256
+TEXCONV_BATCH_CHARS = 30000
+
+# Perfil PNG de los archivos escritos: "fast" (previews), "balanced" o "archival"
+# (máxima compresión). Los PNG que genera texconv sin postproceso no se recodifican.
+PNG_PROFILE = DEFAULT_PROFILE
+
 # =======================
 #  UTILIDADES DDS
 # =======================
@@ -38,7 +62,8 @@ TEXCONV_EXE = Path(__file__).resolve().parent / "dependencies" / "texconv.exe"
 def detect_dds_format(dds_path: Path):
     """
     Lee cabecera DDS para detectar FourCC (DXT1/3/5, ATI1/ATI2, DX10...).
-    Devuelve dict con {valid, fourCC, dx10(bool)}.
+    Devuelve dict con {valid, fourCC, dx10(bool), dxgi_format, format}; `format` es
+    "BC1".."BC5" (también para cabeceras DX10) o None.
     """
     with open(dds_path, "rb") as f:
         data = f.read(148)  # 128 header + 20 DX10 opcional
@@ -55,16 +80,21 @@ def detect_dds_format(dds_path: Path):
     # pf_size, pf_flags, fourCC, rgbBitCount, rmask, gmask, bmask, amask
     fourCC = pf[8:12]
     fourCC_str = fourCC.decode("ascii", errors="ignore")
-    info = {"valid": True, "fourCC": fourCC_str, "dx10": (fourCC_str == "DX10")}
+    info = {"valid": True, "fourCC": fourCC_str, "dx10": (fourCC_str == "DX10"), "dxgi_format": None}
+    if info["dx10"] and len(data) >= 148:
+        info["dxgi_format"] = struct.unpack_from("<I", data, 128)[0]
+        info["format"] = DXGI_FORMATS.get(info["dxgi_format"])
+    else:
+        info["format"] = FOURCC_FORMATS.get(fourCC_str)
     return info
 
 
 def is_bc4(info: dict) -> bool:
-    return info.get("valid") and info.get("fourCC") in ("ATI1", "BC4 ")
+    return info.get("valid") and info.get("format") == "BC4"
 
 
 def is_bc5(info: dict) -> bool:
-    return info.get("valid") and info.get("fourCC") in ("ATI2", "BC5 ")
+    return info.get("valid") and info.get("format") == "BC5"
 
 
 def looks_like_normal_map(path: Path) -> bool:
@@ -76,61 +106,175 @@ def looks_like_normal_map(path: Path) -> bool:
 #  CONVERSIÓN TEXCONV
 # =======================
 
-def convert_with_texconv(dds_path: Path, out_png: Path, info: dict):
+def texconv_flags(dds_path: Path, info: dict) -> tuple:
     """
-    Llama a texconv para convertir DDS -> PNG.
+    Flags de formato que necesita texconv para este DDS:
     - BC4: fuerza R8_UNORM (grises).
     - BC5: fuerza RGBA y swizzle r,g,1,1 (si no vamos a reconstruir Z).
            Si reconstruimos Z, igualmente pedimos RGBA para tener R y G.
     - Otros: deja que texconv escoja (saldrá RGBA o RGB según corresponda).
+    Dos DDS con los mismos flags pueden ir en la misma llamada a texconv.
     """
-    out_dir = out_png.parent
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    cmd = [str(TEXCONV_EXE), "-ft", "png", "-y", "-o", str(out_dir)]
-
     if is_bc4(info):
         # A una textura BC4 (un canal): escala de grises 8-bit correcta
-        cmd += ["-f", "R8_UNORM"]
-    elif is_bc5(info):
+        return ("-f", "R8_UNORM")
+    if is_bc5(info):
         # PNG no acepta 2 canales RG. Pedimos RGBA y luego reconstruimos Z si toca.
-        cmd += ["-f", "R8G8B8A8_UNORM"]
         if not RECONSTRUCT_BC5_NORMALS or not looks_like_normal_map(dds_path):
             # Si no vamos a reconstruir, al menos rellena B/A para visualizar sin error
-            cmd += ["--swizzle", "r,g,1,1"]
+            return ("-f", "R8G8B8A8_UNORM", "--swizzle", "r,g,1,1")
+        return ("-f", "R8G8B8A8_UNORM")
+    return ()
 
-    cmd += [str(dds_path)]
-    subprocess.run(cmd, check=True, shell=False)
 
-    # texconv genera <nombre>.png en out_dir; renombramos si hace falta
-    generated = out_dir / (dds_path.stem + ".png")
-    if generated.exists() and generated != out_png:
-        # mover/renombrar a la ruta relativa preservando subcarpetas
-        if out_png.exists() and not OVERWRITE_EXISTING:
-            # mantener el existente
-            pass
-        else:
-            # aseguramos carpeta
-            out_png.parent.mkdir(parents=True, exist_ok=True)
-            generated.replace(out_png)
+def plan_texconv_batches(items, max_files=TEXCONV_BATCH_FILES, max_cmd_chars=TEXCONV_BATCH_CHARS):
+    """
+    Agrupa [(dds_path, out_png, info), ...] por (carpeta de salida, flags) y parte
+    cada grupo en trozos que respeten el límite de archivos y de longitud de la
+    línea de comandos (Windows corta en ~32K caracteres).
+    Devuelve [(out_dir, flags, [(dds_path, out_png), ...]), ...] en orden estable.
+    """
+    groups = {}
+    for dds_path, out_png, info in items:
+        key = (out_png.parent, texconv_flags(dds_path, info))
+        groups.setdefault(key, []).append((dds_path, out_png))
+
+    batches = []
+    for (out_dir, flags), members in groups.items():
+        base_len = len(str(TEXCONV_EXE)) + len(str(out_dir)) + sum(len(f) + 1 for f in flags) + 32
+        chunk, chunk_len = [], base_len
+        for member in members:
+            arg_len = len(str(member[0])) + 3
+            if chunk and (len(chunk) >= max_files or chunk_len + arg_len > max_cmd_chars):
+                batches.append((out_dir, flags, chunk))
+                chunk, chunk_len = [], base_len
+            chunk.append(member)
+            chunk_len += arg_len
+        if chunk:
+            batches.append((out_dir, flags, chunk))
+    return batches
+
+
+def run_texconv_batch(out_dir: Path, flags: tuple, members, texconv=None):
+    """
+    Convierte varios DDS con una sola llamada a texconv.
+    Devuelve {dds_path: None si OK | mensaje de error} para cada miembro, de forma
+    que cada fallo se sigue atribuyendo a su archivo aunque compartan proceso.
+    """
+    texconv = texconv or TEXCONV_EXE
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # texconv genera <nombre>.png en out_dir; con -y puede haber restos de una
+    # ejecución anterior, así que comparamos mtime para saber si se reescribió.
+    def _stamp(p: Path):
+        try:
+            return p.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    generated = [out_dir / (dds_path.stem + ".png") for dds_path, _ in members]
+    before = [_stamp(p) for p in generated]
+
+    cmd = [str(texconv), "-ft", "png", "-y", "-o", str(out_dir), *flags]
+    cmd += [str(dds_path) for dds_path, _ in members]
+    proc = subprocess.run(cmd, shell=False, capture_output=True, text=True, errors="replace")
+    output = (proc.stdout or "") + (proc.stderr or "")
+
+    results = {}
+    for (dds_path, out_png), gen, stamp in zip(members, generated, before):
+        now = _stamp(gen)
+        if now is None or (stamp is not None and now == stamp and proc.returncode != 0):
+            # Líneas del log de texconv que mencionan este archivo, si las hay
+            lines = [ln.strip() for ln in output.splitlines() if dds_path.name in ln]
+            detail = " | ".join(lines) or f"texconv devolvió {proc.returncode} sin generar {gen.name}"
+            results[dds_path] = detail
+            continue
+
+        if gen != out_png:
+            # mover/renombrar a la ruta relativa preservando subcarpetas
+            if out_png.exists() and not OVERWRITE_EXISTING:
+                # mantener el existente
+                pass
+            else:
+                # aseguramos carpeta
+                out_png.parent.mkdir(parents=True, exist_ok=True)
+                gen.replace(out_png)
+        results[dds_path] = None
+    return results
+
+
+def convert_with_texconv(dds_path: Path, out_png: Path, info: dict):
+    """
+    Llama a texconv para convertir un único DDS -> PNG (ver texconv_flags).
+    Lanza CalledProcessError si texconv no genera la salida.
+    """
+    results = run_texconv_batch(out_png.parent, texconv_flags(dds_path, info), [(dds_path, out_png)])
+    if results[dds_path] is not None:
+        raise subprocess.CalledProcessError(1, str(TEXCONV_EXE), output=results[dds_path])
 
 
 # =======================
 #  POSTPROCESO
 # =======================
 def looks_like_lightmap(path: Path) -> bool:
-    return "_lym" in path.stem.lower()
+    return LIGHTMAP_NAME_HINT in path.stem.lower()
+
+def array_to_image(arr: np.ndarray) -> Image.Image:
+    """(H, W) -> L, (H, W, 3) -> RGB, (H, W, 4) -> RGBA."""
+    if arr.ndim == 2:
+        return Image.fromarray(arr, "L")
+    return Image.fromarray(arr, {3: "RGB", 4: "RGBA"}[arr.shape[2]])
 
-def visualize_lightmap(png_path: Path):
+
+def as_rgba(arr: np.ndarray) -> np.ndarray:
+    """Convierte un array de imagen a RGBA con las mismas reglas que Image.convert."""
+    if arr.ndim == 3 and arr.shape[2] == 4:
+        return arr
+    return np.asarray(array_to_image(arr).convert("RGBA"))
+
+
+def visualize_lightmap_array(arr: np.ndarray) -> np.ndarray:
+    """Versión en memoria: R->Rojo, G->Verde (descarta B y A). Devuelve (H, W, 3)."""
+    rgba = as_rgba(arr)
+    out = np.zeros(rgba.shape[:2] + (3,), dtype=np.uint8)
+    out[..., :2] = rgba[..., :2]
+    return out
+
+
+def visualize_lightmap(png_path: Path, png_profile=None):
     with Image.open(png_path) as img:
         if img.mode != "RGBA":
             img = img.convert("RGBA")
-        r, g, b, a = img.split()
-        # R->Rojo, G->Verde (descarta B y A)
-        out = Image.merge("RGB", (r, g, Image.new("L", img.size, 0)))
-        out.save(png_path)
+        out = visualize_lightmap_array(np.asarray(img))
+    save_png(Image.fromarray(out, "RGB"), png_path, png_profile or PNG_PROFILE)
 
-def reconstruct_normal_z_from_xy(png_path: Path):
+def reconstruct_normal_z(rgba: np.ndarray) -> np.ndarray:
+    """
+    Versión en memoria: recibe un array uint8 (H, W, 4) donde R,G son normales XY
+    en UNORM [0..255] y devuelve un array nuevo con B=Z reconstruida y A=255.
+    Hace exactamente las mismas cuentas (float64 + redondeo a par) que el bucle
+    original por píxel, así que el resultado es idéntico bit a bit.
+    """
+    rgba = np.asarray(rgba, dtype=np.uint8)
+    # mapear a [-1, 1]
+    nx = (rgba[..., 0] / 255.0) * 2.0 - 1.0
+    ny = (rgba[..., 1] / 255.0) * 2.0 - 1.0
+    nz_sq = 1.0 - nx * nx - ny * ny
+    # clamp si por redondeo sale negativo
+    np.maximum(nz_sq, 0.0, out=nz_sq)
+    nz = np.sqrt(nz_sq, out=nz_sq)
+    # re-mapear a [0,255]; np.rint redondea a par igual que round()
+    bz = np.rint((nz * 0.5 + 0.5) * 255.0)
+
+    out = np.empty(rgba.shape[:2] + (4,), dtype=np.uint8)
+    out[..., 0] = rgba[..., 0]
+    out[..., 1] = rgba[..., 1]
+    out[..., 2] = bz
+    out[..., 3] = 255
+    return out
+
+
+def reconstruct_normal_z_from_xy(png_path: Path, png_profile=None):
     """
     Lee un PNG (esperado RGBA) donde R,G son normales XY en UNORM [0..255],
     reconstruye Z = sqrt(max(0, 1 - x^2 - y^2)) y guarda de nuevo con B=Z y A=255.
@@ -139,105 +283,420 @@ def reconstruct_normal_z_from_xy(png_path: Path):
         # Asegurar RGBA
         if img.mode != "RGBA":
             img = img.convert("RGBA")
+        out = reconstruct_normal_z(np.asarray(img))
 
-        px = img.load()
-        w, h = img.size
-
-        for y in range(h):
-            for x in range(w):
-                r, g, b, a = px[x, y]
-                # mapear a [-1, 1]
-                nx = (r / 255.0) * 2.0 - 1.0
-                ny = (g / 255.0) * 2.0 - 1.0
-                nz_sq = 1.0 - nx * nx - ny * ny
-                if nz_sq < 0.0:
-                    nz = 0.0  # clamp si por redondeo sale negativo
-                else:
-                    nz = math.sqrt(nz_sq)
-                # re-mapear a [0,255]
-                bz = int(round((nz * 0.5 + 0.5) * 255.0))
-                px[x, y] = (r, g, bz, 255)
+    save_png(Image.fromarray(out, "RGBA"), png_path, png_profile or PNG_PROFILE)
 
-        img.save(png_path)
 
+def mirror_array(arr: np.ndarray) -> np.ndarray:
+    """
+    Versión en memoria de mirror_image: [izq | der espejada | der | izq espejada]
+    (el doble de ancho) con los mismos canales de entrada (image_mirror, "halves_swapped").
+    """
+    return image_mirror.mirror_array(arr, "halves_swapped")
 
-def mirror_image(image_path: Path):
-    with Image.open(image_path) as img:
-        width, height = img.size
-        if width % 2 != 0:
-            img = img.crop((0, 0, width - 1, height))
-            width -= 1
-        left_half = img.crop((0, 0, width // 2, height))
-        right_half = img.crop((width // 2, 0, width, height))
-        left_half_mirrored = ImageOps.mirror(left_half)
-        right_half_mirrored = ImageOps.mirror(right_half)
 
-        new_image = Image.new('RGB', (width * 2, height))
-        new_image.paste(left_half, (0, 0))
-        new_image.paste(right_half_mirrored, (width // 2, 0))
-        new_image.paste(right_half, (width, 0))
-        new_image.paste(left_half_mirrored, (width + width // 2, 0))
-        new_image.save(image_path)
+def mirror_image(image_path: Path, png_profile=None):
+    image_mirror.mirror_file(image_path, image_path, "halves_swapped", png_profile or PNG_PROFILE)
+
+
+# =======================
+#  PIPELINE POR ARCHIVO
+# =======================
+# Cada etapa declara a qué archivos se aplica (con los mismos predicados por nombre
+# de siempre) y transforma el array en memoria. El PNG se decodifica una vez,
+# pasa por todas las etapas que tocan y se codifica una vez.
+
+def _applies_lightmap(dds_path: Path, info: dict, do_mirror: bool) -> bool:
+    return looks_like_lightmap(dds_path)
+
+
+def _applies_normal_z(dds_path: Path, info: dict, do_mirror: bool) -> bool:
+    return RECONSTRUCT_BC5_NORMALS and is_bc5(info) and looks_like_normal_map(dds_path)
+
+
+def _applies_mirror(dds_path: Path, info: dict, do_mirror: bool) -> bool:
+    return do_mirror
+
+
+def _normal_z_stage(arr: np.ndarray) -> np.ndarray:
+    return reconstruct_normal_z(as_rgba(arr))
+
+
+# (nombre, predicado(dds_path, info, do_mirror), transformación(array) -> array), en orden
+POST_STAGES = (
+    ("lightmap", _applies_lightmap, visualize_lightmap_array),
+    ("normal_z", _applies_normal_z, _normal_z_stage),
+    ("mirror", _applies_mirror, mirror_array),
+)
+
+
+def plan_post_stages(dds_path: Path, info: dict, do_mirror=False):
+    """Devuelve [(nombre, transformación), ...] con las etapas que aplican a este DDS."""
+    return [(name, fn) for name, applies, fn in POST_STAGES if applies(dds_path, info, do_mirror)]
+
+
+def run_post_stages(arr: np.ndarray, stages) -> np.ndarray:
+    for _, fn in stages:
+        arr = fn(arr)
+    return arr
+
+
+def image_to_array(img: Image.Image) -> np.ndarray:
+    """PIL -> array L/RGB/RGBA (cualquier otro modo se pasa a RGBA)."""
+    if img.mode not in ("L", "RGB", "RGBA"):
+        img = img.convert("RGBA")
+    return np.asarray(img)
+
+
+# =======================
+#  CACHÉ INCREMENTAL
+# =======================
+# Manifest en la carpeta de salida: por cada DDS (ruta relativa) guarda tamaño,
+# mtime y hash del contenido, más las opciones de conversión. Si todo coincide y el
+# PNG sigue ahí, el archivo se salta en la siguiente ejecución.
+
+MANIFEST_NAME = ".dsspng_manifest.json"
+MANIFEST_VERSION = 2
+
+# Cada cuántos archivos registrados se reescribe el manifest durante la conversión,
+# para no perderlo todo si el proceso se corta (Ctrl-C, Cancelar de la GUI...)
+MANIFEST_SAVE_EVERY = 200
+
+
+def conversion_options(do_mirror: bool, decoder: str, png_profile: str = None) -> dict:
+    """Opciones que cambian el PNG resultante; si cambian, se reconvierte todo."""
+    return {
+        "mirror": bool(do_mirror),
+        "reconstruct_bc5_normals": bool(RECONSTRUCT_BC5_NORMALS),
+        "normal_name_hints": list(NORMAL_NAME_HINTS),
+        "lightmap_name_hint": LIGHTMAP_NAME_HINT,
+        "post_stages": [name for name, _, _ in POST_STAGES],
+        "decoder": decoder,
+        "png_profile": png_profile or PNG_PROFILE,
+    }
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_stamp(dds_path: Path) -> dict:
+    """Entrada del manifest de un DDS (tamaño, mtime y sha1); la calcula el worker que lo convierte."""
+    st = dds_path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": file_digest(dds_path)}
+
+
+class ConversionManifest:
+    """Manifest `MANIFEST_NAME` de una carpeta de salida (ver arriba)."""
+
+    def __init__(self, output_dir: Path, options: dict):
+        self.path = Path(output_dir) / MANIFEST_NAME
+        self.options = options
+        self.entries = {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        # Si cambian las opciones o el formato del manifest, no sirve nada de lo guardado
+        if data.get("version") == MANIFEST_VERSION and data.get("options") == options:
+            self.entries = data.get("files", {})
+
+    @staticmethod
+    def key(dds_path: Path, source_dir: Path) -> str:
+        return dds_path.relative_to(source_dir).as_posix()
+
+    def is_fresh(self, key: str, dds_path: Path, out_png: Path) -> bool:
+        entry = self.entries.get(key)
+        if entry is None or not out_png.exists():
+            return False
+        st = dds_path.stat()
+        if st.st_size != entry["size"]:
+            return False
+        if st.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        # mtime distinto (copia, touch...): sólo es "nuevo" si cambia el contenido
+        if file_digest(dds_path) != entry["sha1"]:
+            return False
+        entry["mtime_ns"] = st.st_mtime_ns
+        return True
+
+    def record(self, key: str, stamp: dict):
+        """Guarda el source_stamp de un DDS convertido."""
+        self.entries[key] = stamp
+
+    def forget(self, key: str):
+        self.entries.pop(key, None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        data = {"version": MANIFEST_VERSION, "options": self.options, "files": self.entries}
+        tmp.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.path)
 
 
 # =======================
 #  ORQUESTA
 # =======================
 
-def convert_dds_to_png(source_dir: Path, output_dir: Path, do_mirror=False):
-    converted = 0
-    failed = 0
-    gray_bc4 = 0
-    bc5_rgba = 0
-    bc5_reconstructed = 0
+STAT_KEYS = ("converted", "failed", "gray_bc4", "bc5_rgba", "bc5_reconstructed", "skipped")
+
 
+def collect_dds_jobs(source_dir: Path, output_dir: Path):
+    """
+    Recorre `source_dir` y devuelve [(dds_path, out_png), ...] ordenado por ruta,
+    de modo que las rutas de salida no dependan del orden de os.walk ni de los workers.
+    """
+    jobs = []
     for root, _, files in os.walk(source_dir):
         root_p = Path(root)
         for file in files:
             if not file.lower().endswith(".dds"):
                 continue
-
             dds_path = root_p / file
             rel = dds_path.relative_to(source_dir)
-            out_png = output_dir / rel.with_suffix(".png")
+            jobs.append((dds_path, output_dir / rel.with_suffix(".png")))
+    jobs.sort()
+    return jobs
 
-            try:
-                info = detect_dds_format(dds_path)
 
-                convert_with_texconv(dds_path, out_png, info)
+def count_stats(stats: dict, info: dict, stages):
+    """Suma a `stats` los contadores BC4/BC5 de un archivo convertido."""
+    if any(name == "normal_z" for name, _ in stages):
+        stats["bc5_reconstructed"] += 1
+    elif is_bc5(info):
+        stats["bc5_rgba"] += 1
+    if is_bc4(info):
+        stats["gray_bc4"] += 1
+    stats["converted"] += 1
 
-                if looks_like_lightmap(dds_path):
-                    visualize_lightmap(out_png)
-                # Postproceso BC5 (normales): reconstruir Z
-                if RECONSTRUCT_BC5_NORMALS and is_bc5(info) and looks_like_normal_map(dds_path):
-                    reconstruct_normal_z_from_xy(out_png)
-                    bc5_reconstructed += 1
-                elif is_bc5(info):
-                    bc5_rgba += 1
 
-                if is_bc4(info):
-                    gray_bc4 += 1
+def postprocess_one(dds_path: Path, out_png: Path, info: dict, do_mirror=False, png_profile=None):
+    """
+    Postproceso de un PNG ya generado por texconv: se abre una vez, pasa por las
+    etapas que le tocan y se guarda una vez (o ninguna si no le toca ninguna).
+    Nunca lanza: devuelve un dict con los contadores de este archivo (claves de
+    STAT_KEYS) para poder sumarlos tanto en serie como desde un pool de procesos,
+    y si salió bien, en "source", su source_stamp para el manifest.
+    """
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    try:
+        stamp = source_stamp(dds_path)
+        stages = plan_post_stages(dds_path, info, do_mirror)
+        if stages:
+            with Image.open(out_png) as img:
+                arr = image_to_array(img)
+            save_png(array_to_image(run_post_stages(arr, stages)), out_png, png_profile or PNG_PROFILE)
+        count_stats(stats, info, stages)
+        stats["source"] = stamp
+
+    except Exception as e:
+        print(f"[FAIL] {dds_path} -> {out_png}\n  {type(e).__name__}: {e}", flush=True)
+        stats["failed"] += 1
+    return stats
+
+
+def decode_one(dds_path: Path, out_png: Path, info: dict, do_mirror=False, fallback=False,
+               png_profile=None):
+    """
+    Camino sin texconv: decodifica el DDS con dds_decode, aplica las etapas de
+    postproceso sobre el array en memoria y escribe el PNG una sola vez. Devuelve los contadores
+    como postprocess_one; con `fallback=True` devuelve None si no se pudo
+    decodificar, para que el archivo vaya a texconv.
+    """
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    try:
+        # Antes de leerlo: si el DDS cambia mientras se convierte, la próxima vez no se salta
+        stamp = source_stamp(dds_path)
+        arr, _ = decode_dds(dds_path)
+    except Exception as e:
+        if fallback:
+            print(f"[texconv] {dds_path}: {type(e).__name__}: {e}", flush=True)
+            return None
+        print(f"[FAIL] {dds_path} -> {out_png}\n  {type(e).__name__}: {e}", flush=True)
+        stats["failed"] += 1
+        return stats
 
-                if do_mirror:
-                    mirror_image(out_png)
+    try:
+        stages = plan_post_stages(dds_path, info, do_mirror)
+        if is_bc5(info):
+            # Igual que texconv con R8G8B8A8_UNORM (y swizzle r,g,1,1 si no reconstruimos)
+            reconstruct = any(name == "normal_z" for name, _ in stages)
+            arr = bc5_to_rgba(arr, fill_blue=0 if reconstruct else 255)
+
+        arr = run_post_stages(arr, stages)
+        out_png.parent.mkdir(parents=True, exist_ok=True)
+        save_png(array_to_image(arr), out_png, png_profile or PNG_PROFILE)
+        count_stats(stats, info, stages)
+        stats["source"] = stamp
+
+    except Exception as e:
+        print(f"[FAIL] {dds_path} -> {out_png}\n  {type(e).__name__}: {e}", flush=True)
+        stats["failed"] += 1
+    return stats
+
+
+def map_files(fn, arg_list, jobs):
+    """
+    Ejecuta fn(*args) para cada args de `arg_list`, en serie o en un pool de
+    procesos, y va devolviendo (args, resultado). Si un worker muere, el
+    resultado es la excepción en lugar de propagarla.
+    """
+    if jobs == 1 or len(arg_list) <= 1:
+        for args in arg_list:
+            yield args, fn(*args)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(arg_list))) as pool:
+        futures = {pool.submit(fn, *args): args for args in arg_list}
+        for fut in as_completed(futures):
+            try:
+                yield futures[fut], fut.result()
+            except Exception as e:
+                yield futures[fut], e
+
+
+def convert_one(dds_path: Path, out_png: Path, do_mirror=False, png_profile=None):
+    """
+    Convierte un único DDS (una llamada a texconv) y aplica el postproceso.
+    Nunca lanza; devuelve los contadores igual que postprocess_one.
+    """
+    try:
+        info = detect_dds_format(dds_path)
+        convert_with_texconv(dds_path, out_png, info)
+    except subprocess.CalledProcessError as e:
+        print(f"[FAIL] {dds_path} -> {out_png}\n  Cmd error: {e.output or e}", flush=True)
+        return dict(dict.fromkeys(STAT_KEYS, 0), failed=1)
+    except Exception as e:
+        print(f"[FAIL] {dds_path} -> {out_png}\n  {type(e).__name__}: {e}", flush=True)
+        return dict(dict.fromkeys(STAT_KEYS, 0), failed=1)
+    return postprocess_one(dds_path, out_png, info, do_mirror, png_profile)
+
+
+def convert_dds_to_png(source_dir: Path, output_dir: Path, do_mirror=False, jobs=None, decoder=None,
+                       force=False, png_profile=None):
+    """
+    Convierte todos los .dds de `source_dir` a PNG en `output_dir`.
+    1) Lee las cabeceras; los BC1-BC5 se decodifican en proceso (dds_decode).
+    2) El resto se agrupa en pocas llamadas multi-archivo a texconv.
+    3) Postprocesa cada PNG de texconv en un pool de procesos.
+    `jobs`: nº de procesos en paralelo (None = nº de CPUs, 1 = en serie).
+    `decoder`: "auto" | "builtin" | "texconv" (None = DDS_DECODER).
+    `force`: ignora el manifest de la salida y reconvierte todo. El manifest se
+    guarda cada MANIFEST_SAVE_EVERY archivos y al terminar, también si se corta.
+    `png_profile`: perfil de image_io para los PNG escritos (None = PNG_PROFILE).
+    """
+    totals = dict.fromkeys(STAT_KEYS, 0)
+    work = collect_dds_jobs(source_dir, output_dir)
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    decoder = decoder or DDS_DECODER
+    png_profile = png_profile or PNG_PROFILE
+    manifest = ConversionManifest(output_dir, conversion_options(do_mirror, decoder, png_profile))
+    unsaved = [0]
+
+    def _fail(dds_path, out_png, msg):
+        print(f"[FAIL] {dds_path} -> {out_png}\n  {msg}", flush=True)
+        totals["failed"] += 1
+        manifest.forget(ConversionManifest.key(dds_path, source_dir))
+
+    def _add(args, stats):
+        if isinstance(stats, Exception):
+            # El worker murió (p.ej. BrokenProcessPool): cuenta como fallo de ese archivo
+            _fail(args[0], args[1], f"{type(stats).__name__}: {stats}")
+            return
+        stamp = stats.pop("source", None)
+        for k, v in stats.items():
+            totals[k] += v
+        key = ConversionManifest.key(args[0], source_dir)
+        if stats.get("failed") or stamp is None:
+            manifest.forget(key)
+            return
+        manifest.record(key, stamp)
+        unsaved[0] += 1
+        if unsaved[0] >= MANIFEST_SAVE_EVERY:
+            manifest.save()
+            unsaved[0] = 0
 
-                converted += 1
+    try:
+        if not force:
+            pending = []
+            for dds_path, out_png in work:
+                try:
+                    fresh = manifest.is_fresh(ConversionManifest.key(dds_path, source_dir), dds_path, out_png)
+                except OSError:
+                    fresh = False
+                if fresh:
+                    totals["skipped"] += 1
+                else:
+                    pending.append((dds_path, out_png))
+            work = pending
 
-            except subprocess.CalledProcessError as e:
-                print(f"[FAIL] {dds_path} -> {out_png}\n  Cmd error: {e}")
-                failed += 1
+        items = []
+        for dds_path, out_png in work:
+            try:
+                items.append((dds_path, out_png, detect_dds_format(dds_path)))
             except Exception as e:
-                print(f"[FAIL] {dds_path} -> {out_png}\n  {type(e).__name__}: {e}")
-                failed += 1
+                _fail(dds_path, out_png, f"{type(e).__name__}: {e}")
+
+        # --- decodificación en proceso (sin texconv ni PNG intermedio) ---
+        texconv_items = []
+        builtin = []
+        for dds_path, out_png, info in items:
+            if decoder == "builtin" or (decoder == "auto" and can_decode(info)):
+                builtin.append((dds_path, out_png, info, do_mirror, decoder == "auto", png_profile))
+            else:
+                texconv_items.append((dds_path, out_png, info))
+        for args, stats in map_files(decode_one, builtin, jobs):
+            if stats is None:
+                texconv_items.append(args[:3])
+            else:
+                _add(args, stats)
+
+        # --- texconv por lotes (cada lote es un proceso; varios lotes a la vez) ---
+        if texconv_items:
+            texconv_items.sort(key=lambda it: it[0])
+            batches = plan_texconv_batches(texconv_items)
+            print(f"texconv: {len(texconv_items)} DDS en {len(batches)} llamadas", flush=True)
+            converted = {}
+            with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(batches)))) as tpool:
+                futures = {tpool.submit(run_texconv_batch, *batch): batch for batch in batches}
+                for fut in as_completed(futures):
+                    out_dir, flags, members = futures[fut]
+                    try:
+                        results = fut.result()
+                    except Exception as e:
+                        results = {dds_path: f"{type(e).__name__}: {e}" for dds_path, _ in members}
+                    converted.update(results)
+
+            post = []
+            for dds_path, out_png, info in texconv_items:
+                error = converted.get(dds_path, "texconv no llegó a ejecutarse")
+                if error is not None:
+                    _fail(dds_path, out_png, f"Cmd error: {error}")
+                else:
+                    post.append((dds_path, out_png, info, do_mirror, png_profile))
+
+            # --- postproceso ---
+            for args, stats in map_files(postprocess_one, post, jobs):
+                _add(args, stats)
+    finally:
+        # También si se corta a medias (Ctrl-C, excepción): lo ya convertido no se repite
+        manifest.save()
 
     print("\n--- RESUMEN ---")
-    print(f"Convertidos:          {converted}")
-    print(f"Fallidos:             {failed}")
-    print(f"BC4 a grises:         {gray_bc4}")
-    print(f"BC5 RGBA (sin Z):     {bc5_rgba}")
-    print(f"BC5 con Z reconstru.: {bc5_reconstructed}")
-    if failed == 0:
+    print(f"Sin cambios (caché):  {totals['skipped']}")
+    print(f"Convertidos:          {totals['converted']}")
+    print(f"Fallidos:             {totals['failed']}")
+    print(f"BC4 a grises:         {totals['gray_bc4']}")
+    print(f"BC5 RGBA (sin Z):     {totals['bc5_rgba']}")
+    print(f"BC5 con Z reconstru.: {totals['bc5_reconstructed']}")
+    if totals["failed"] == 0:
         print("OK. Deberías tener todas las texturas convertidas en 'output'.")
+    return totals
 
 
 # =======================
@@ -245,6 +704,10 @@ def convert_dds_to_png(source_dir: Path, output_dir: Path, do_mirror=False):
 # =======================
 
 def select_directory():
+    # Tk sólo hace falta aquí: el módulo se importa sin pantalla (transform_tool, pools)
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     folder_selected = filedialog.askdirectory()
@@ -256,13 +719,25 @@ if __name__ == "__main__":
     import argparse
     from pathlib import Path
 
-    parser = argparse.ArgumentParser(description="Convertir DDS a PNG (vía texconv) con opciones de mirroring.")
+    parser = argparse.ArgumentParser(description="Convertir DDS a PNG (en proceso o vía texconv) con opciones de mirroring.")
     parser.add_argument("--src", required=True, help="Carpeta de entrada con .dds")
     parser.add_argument("--out", default="", help="Carpeta de salida (por defecto: <src>/output)")
     parser.add_argument("--no-mirror", action="store_true", help="Desactiva el mirroring")
+    parser.add_argument("--texconv", default="", help="Ruta a texconv (por defecto: dependencies/texconv.exe)")
+    parser.add_argument("--decoder", choices=("auto", "builtin", "texconv"), default=DDS_DECODER,
+                        help="auto: BC1-BC5 en proceso y texconv para el resto (por defecto)")
+    parser.add_argument("--force", action="store_true",
+                        help=f"Reconvierte todo aunque el manifest ({MANIFEST_NAME}) diga que no hay cambios")
+    parser.add_argument("--png-profile", choices=tuple(PNG_PROFILES), default=PNG_PROFILE,
+                        help="Compresión de los PNG: fast (rápido), balanced o archival (máxima)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Procesos en paralelo (por defecto: nº de CPUs; 1 = en serie)")
     args = parser.parse_args()
 
     src = Path(args.src)
+    if args.texconv:
+        # Ruta existente -> absoluta; si no, se deja tal cual para buscarla en el PATH
+        TEXCONV_EXE = Path(args.texconv).resolve() if Path(args.texconv).exists() else Path(args.texconv)
     out = Path(args.out) if args.out else src / "output"
 
     # Si tienes una constante DO_MIRROR en el módulo, úsala como valor por defecto
@@ -274,5 +749,6 @@ if __name__ == "__main__":
     do_mirror = not args.no_mirror if args.no_mirror else do_mirror_default
 
     # Ejecuta
-    convert_dds_to_png(src, out, do_mirror=do_mirror)
+    convert_dds_to_png(src, out, do_mirror=do_mirror, jobs=args.jobs, decoder=args.decoder,
+                       force=args.force, png_profile=args.png_profile)
 
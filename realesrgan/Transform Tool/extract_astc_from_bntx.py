@@ -1,38 +1,93 @@
-import struct, sys, os
+import sys, os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-# CONFIGURACIÓN
-OFFSET_START = 0x0000FF10      # Inicio real de datos ASTC tras "BRTD"
-BLOCK_W, BLOCK_H, BLOCK_D = 6, 6, 1
-WIDTH, HEIGHT, DEPTH = 512, 1024, 1
+from bntx import BNTXFile
+from bntx_extract import astc_header, decode_texture, deswizzle_mip0, expand_inputs, texture_file_name, write_vectored
+from dsspng import array_to_image, save_png
 
 
-def main(path):
-    with open(path, "rb") as f:
-        data = f.read()
+def extract_file(path, out_dir=None, verbose=True, to_png=False, decoder=None):
+    """
+    Extrae todas las texturas ASTC de un .bntx como .astc con cabecera, usando el
+    tamaño y bloque reales de su BRTI; con `to_png` las decodifica en proceso y
+    escribe directamente el .png. Devuelve la lista de archivos escritos.
+    """
+    path = Path(path)
+    out_dir = Path(out_dir) if out_dir else path.parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    with BNTXFile(path) as bntx:
+        for tex in bntx.textures():
+            if not tex.is_astc:
+                if verbose:
+                    print(f"[-] {path.name}:{tex.name}: {tex.format_name} no es ASTC, se omite")
+                continue
 
-    tex_data = data[OFFSET_START:]
-    print(f"[*] Extrayendo {len(tex_data)} bytes desde offset 0x{OFFSET_START:X}")
+            block_w, block_h = tex.block_size
+            for layer in range(tex.array_layers):
+                suffix = f"_{texture_file_name(tex, layer)}" if bntx.texture_count > 1 or tex.array_layers > 1 else ""
+                if to_png:
+                    out_path = out_dir / f"{path.stem}{suffix}.png"
+                    save_png(array_to_image(decode_texture(tex, layer, decoder)), out_path)
+                    written.append(out_path)
+                    if verbose:
+                        print(f"[+] PNG creado: {out_path} ({tex.width}x{tex.height}, bloque {block_w}x{block_h})")
+                    continue
 
-    # Cabecera ASTC estándar de 16 bytes
-    header = struct.pack(
-        "<4s3B9B",
-        b"\x13\xAB\xA1\x5C",
-        BLOCK_W, BLOCK_H, BLOCK_D,
-        WIDTH & 0xFF, (WIDTH >> 8) & 0xFF, (WIDTH >> 16) & 0xFF,
-        HEIGHT & 0xFF, (HEIGHT >> 8) & 0xFF, (HEIGHT >> 16) & 0xFF,
-        DEPTH & 0xFF, (DEPTH >> 8) & 0xFF, (DEPTH >> 16) & 0xFF
-    )
+                tex_data = deswizzle_mip0(tex, layer)
+                out_path = out_dir / f"{path.stem}{suffix}_{tex.width}x{tex.height}_final.astc"
+                # Cabecera + memoryview de los datos en una sola escritura vectorizada
+                write_vectored(out_path, astc_header(block_w, block_h, tex.width, tex.height), tex_data)
+                written.append(out_path)
+                if verbose:
+                    print(f"[+] ASTC válido creado: {out_path} ({tex.width}x{tex.height}, bloque {block_w}x{block_h})")
+    return written
 
-    out_path = path.replace(".bntx", f"_{WIDTH}x{HEIGHT}_final.astc")
-    with open(out_path, "wb") as f:
-        f.write(header + tex_data)
 
-    print(f"[+] ASTC válido creado: {out_path}")
-    print("Ahora decodifícalo con:")
-    print(f'  astcenc -ds "{out_path}" "{out_path.replace(".astc", ".png")}"')
+def main(path, to_png=False, decoder=None):
+    for out_path in extract_file(path, to_png=to_png, decoder=decoder):
+        if not to_png:
+            print("Ahora decodifícalo con --png, o con:")
+            print(f'  astcenc -ds "{out_path}" "{out_path.with_suffix(".png")}"')
+
+
+def run_batch(inputs, out_dir=None, jobs=None, to_png=False, decoder=None):
+    """Procesa muchos .bntx en un pool de hilos. Devuelve (nº escritos, [(archivo, error)])."""
+    files = expand_inputs(inputs, ".bntx")
+    written, errors = 0, []
+
+    def _one(p):
+        try:
+            return p, extract_file(p, out_dir, False, to_png, decoder), None
+        except Exception as e:
+            return p, [], f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        for p, outs, err in pool.map(_one, files):
+            if err:
+                print(f"[FAIL] {p}: {err}")
+                errors.append((p, err))
+            else:
+                print(f"[+] {p.name}: {len(outs)} {'PNG' if to_png else 'ASTC'}")
+                written += len(outs)
+    print(f"{len(files)} BNTX -> {written} {'PNG' if to_png else 'ASTC'}, {len(errors)} errores")
+    return written, errors
+
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python extract_astc_from_bntx.py <archivo.bntx>")
-        sys.exit(1)
-    main(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Extrae texturas ASTC (con cabecera) de archivos .bntx.")
+    parser.add_argument("inputs", nargs="+", help="Archivos .bntx, carpetas o patrones glob")
+    parser.add_argument("--out", default="", help="Carpeta de salida (por defecto: junto a cada .bntx)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Hilos en paralelo")
+    parser.add_argument("--png", action="store_true", help="Decodificar a PNG en proceso (sin .astc intermedio)")
+    parser.add_argument("--astc-decoder", choices=("auto", "builtin", "astcenc"), default=None,
+                        help="Backend ASTC (auto: astcenc si está en el PATH)")
+    args = parser.parse_args()
+
+    if len(args.inputs) == 1 and Path(args.inputs[0]).is_file() and not args.out:
+        main(args.inputs[0], args.png, args.astc_decoder)
+    else:
+        _, errors = run_batch(args.inputs, args.out or None, args.jobs, args.png, args.astc_decoder)
+        sys.exit(1 if errors else 0)
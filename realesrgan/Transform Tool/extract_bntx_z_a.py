@@ -1,64 +1,45 @@
-import struct, os, sys, io
+import os, sys
 
-def find_pattern(data: bytes, pattern: bytes):
-    i = data.find(pattern)
-    return i if i != -1 else None
-
-def read_u32(data, off):
-    return struct.unpack_from("<I", data, off)[0]
-
-def read_u16(data, off):
-    return struct.unpack_from("<H", data, off)[0]
-
-def dump_astc(data, out_path):
-    with open(out_path, "wb") as f:
-        f.write(data)
-    print(f"[+] ASTC dump saved: {out_path}")
+from bntx import BNTXFile
+from bntx_extract import (astc_header, dds_header, decode_texture, deswizzle_mip0, safe_file_name,
+                          texture_file_name, write_vectored)
+from dsspng import array_to_image, save_png
 
 def main(path):
-    with open(path, "rb") as f:
-        buf = f.read()
-
-    print(f"[*] Reading {path} ({len(buf)} bytes)")
-
-    off_bntx = find_pattern(buf, b"BNTX")
-    off_brt = find_pattern(buf, b"BRTD") or find_pattern(buf, b"BRTI")
-    if off_brt is None:
-        print("[-] Could not find BRTD/BRTI marker.")
-        return
-
-    # read some metadata around the BRTD block
-    possible_sizes = []
-    for i in range(off_brt, min(len(buf), off_brt + 0x200)):
-        w = read_u32(buf, i)
-        h = read_u32(buf, i + 4)
-        if 4 <= w <= 8192 and 4 <= h <= 8192 and (w % 2 == 0) and (h % 2 == 0):
-            possible_sizes.append((i - off_brt, w, h))
-    if possible_sizes:
-        print("[?] Possible WxH values:", possible_sizes[:3])
-        _, width, height = possible_sizes[0]
-    else:
-        width, height = 1024, 1024  # fallback
-        print("[!] Could not auto-detect size, guessing 1024x1024")
-
-    # crude search for texture block: large region near end of file
-    # often the TEXDATA starts after last "BRTD" header (~4–8 KB after marker)
-    start_data = off_brt + 0x1000
-    # align to 0x40
-    start_data = (start_data + 0x3F) & ~0x3F
-    tex_data = buf[start_data:]
-    print(f"[*] Extracted {len(tex_data)} bytes of raw texture data at 0x{start_data:X}")
-
     out_dir = "output"
     os.makedirs(out_dir, exist_ok=True)
-    out_astc = os.path.join(out_dir, os.path.basename(path).replace(".bntx", ".astc"))
-    dump_astc(tex_data, out_astc)
-
-    print("\nNow decode it with ASTCENC:")
-    print(f"  astcenc -d {out_astc} {out_astc.replace('.astc', '.png')} 6x6\n")
+    base = os.path.splitext(os.path.basename(path))[0]
+
+    with BNTXFile(path) as bntx:
+        print(f"[*] Reading {path} ({bntx.texture_count} textures)")
+
+        for tex in bntx.textures():
+            bw, bh = tex.block_size
+            print(f"[*] {tex.name}: {tex.format_name} {tex.width}x{tex.height}, "
+                  f"block {bw}x{bh}, {tex.mip_count} mips, {tex.array_layers} layers")
+
+            # Same path as bntx_extract: deswizzle (tegra_swizzle) and decode in-process
+            # (astc_decode / dds_decode); names are stripped of path separators
+            name = safe_file_name(base) if bntx.texture_count == 1 else texture_file_name(tex, 0)
+            out_base = os.path.join(out_dir, name)
+
+            arr = decode_texture(tex)
+            if arr is not None:
+                save_png(array_to_image(arr), out_base + ".png")
+                print(f"[+] Decoded: {out_base}.png")
+                continue
+
+            # No in-process decoder (BC6H/BC7...): deswizzled mip 0 with its header
+            payload = deswizzle_mip0(tex)
+            if tex.is_astc:
+                out_path, header = out_base + ".astc", astc_header(bw, bh, tex.width, tex.height)
+            else:
+                out_path, header = out_base + ".dds", dds_header(tex, payload.nbytes)
+            write_vectored(out_path, header, payload)
+            print(f"[+] Deswizzled dump saved: {out_path}")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python extract_bntx_za.py <file.bntx>")
+        print("Usage: python extract_bntx_z_a.py <file.bntx>")
         sys.exit(1)
     main(sys.argv[1])
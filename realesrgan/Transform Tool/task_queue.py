@@ -0,0 +1,240 @@
+# task_queue.py
+"""
+Cola de trabajos en segundo plano para la GUI Tk del Transform Tool.
+
+Los trabajos se ejecutan de uno en uno y en orden de llegada en un hilo
+trabajador, así que una cadena encolada (BNTX -> aplanar -> DDS->PNG -> mirror)
+respeta el orden. Cada trabajo puede repartir lo pesado en un pool de procesos
+compartido (Job.map) o lanzar procesos externos (Job.run_process), y ambos se
+pueden cancelar. El hilo de Tk nunca espera: TaskQueue.poll, llamado con
+root.after, recoge los cambios de estado y se los pasa a la GUI.
+"""
+import os
+import queue
+import subprocess
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+QUEUED = "en cola"
+RUNNING = "en curso"
+DONE = "hecho"
+FAILED = "error"
+CANCELLED = "cancelado"
+
+
+class JobCancelled(Exception):
+    """La lanza Job.check() (y map/run_process) cuando se ha pedido cancelar el trabajo."""
+
+
+class Job:
+    """
+    Un trabajo de la cola. La función recibe el Job como primer argumento,
+    informa con progress(), comprueba check() entre pasos y devuelve un texto
+    de resumen.
+    """
+
+    def __init__(self, task_queue, job_id, name, fn, args):
+        self.id = job_id
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.status = QUEUED
+        self.message = ""
+        self.done = None
+        self.total = None
+        self._queue = task_queue
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._procs = set()
+        self._futures = set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def progress(self, message, done=None, total=None):
+        self.message = message
+        self.done, self.total = done, total
+        self._queue._notify(self)
+
+    def cancel(self):
+        """Marca el trabajo, termina sus procesos externos y descarta lo que no ha empezado del pool."""
+        self._cancel.set()
+        with self._lock:
+            procs, futures = list(self._procs), list(self._futures)
+        for proc in procs:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+        for fut in futures:
+            fut.cancel()
+
+    def map(self, fn, arg_list):
+        """
+        Ejecuta fn(*args) en el pool de procesos para cada args y va devolviendo
+        (args, resultado o excepción) según terminan. Lanza JobCancelled si se
+        cancela mientras tanto (lo que ya está corriendo en el pool termina solo).
+        Si un proceso del pool muere (BrokenProcessPool), el pool se descarta para
+        que los trabajos siguientes usen uno nuevo y este trabajo falla.
+        """
+        pool = self._queue.pool()
+        futures = {}
+        try:
+            with self._lock:
+                for args in arg_list:
+                    fut = pool.submit(fn, *args)
+                    futures[fut] = args
+                    self._futures.add(fut)
+            pending = set(futures)
+            while pending:
+                self.check()
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    if fut.cancelled():
+                        continue
+                    try:
+                        result = fut.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        result = e
+                    yield futures[fut], result
+            self.check()
+        except BrokenProcessPool:
+            self._queue.discard_pool(pool)
+            raise
+        finally:
+            with self._lock:
+                self._futures.difference_update(futures)
+
+    def run_process(self, cmd, on_line=None, **kwargs):
+        """
+        Lanza un proceso externo con la salida combinada, llamando a on_line(línea)
+        por cada línea. Devuelve (código, últimas líneas). Si se cancela, el
+        proceso se termina y se lanza JobCancelled.
+        """
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, errors="replace", **kwargs)
+        with self._lock:
+            self._procs.add(proc)
+        if self.cancelled:
+            proc.terminate()
+        tail = []
+        try:
+            for line in proc.stdout:
+                tail = (tail + [line.rstrip()])[-20:]
+                if on_line:
+                    on_line(line.rstrip())
+            proc.wait()
+        finally:
+            with self._lock:
+                self._procs.discard(proc)
+        self.check()
+        return proc.returncode, "\n".join(tail)
+
+
+class TaskQueue:
+    """
+    queue = TaskQueue(on_update)
+    queue.submit("Mirror", job_mirror, carpeta)
+    root.after(100, poll)   # poll llama a queue.poll() y se vuelve a programar
+
+    on_update(job) se llama desde poll (hilo de Tk) cada vez que un trabajo cambia.
+    """
+
+    def __init__(self, on_update=None, processes=None):
+        self.jobs = []
+        self.on_update = on_update
+        self.processes = processes or os.cpu_count() or 1
+        self._next_id = 1
+        self._pending = queue.Queue()
+        self._updates = queue.Queue()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="task_queue", daemon=True)
+        self._worker.start()
+
+    def submit(self, name, fn, *args):
+        job = Job(self, self._next_id, name, fn, args)
+        self._next_id += 1
+        self.jobs.append(job)
+        self._pending.put(job)
+        self._notify(job)
+        return job
+
+    def cancel(self, job):
+        job.cancel()
+        self._notify(job)
+
+    def cancel_all(self):
+        for job in self.jobs:
+            if job.status in (QUEUED, RUNNING):
+                self.cancel(job)
+
+    def pool(self):
+        """Pool de procesos compartido por los trabajos (se crea la primera vez)."""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes)
+            return self._pool
+
+    def discard_pool(self, pool):
+        """Descarta un pool roto; el siguiente pool() crea uno nuevo."""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def poll(self):
+        """Recoge los cambios de estado desde el último poll y avisa a on_update (llamar desde Tk)."""
+        changed = {}
+        while True:
+            try:
+                job = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            changed[job.id] = job
+        if self.on_update:
+            for job in changed.values():
+                self.on_update(job)
+        return list(changed.values())
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pending.put(None)
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def _notify(self, job):
+        self._updates.put(job)
+
+    def _run(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            if job.cancelled:
+                job.status = CANCELLED
+                self._notify(job)
+                continue
+            job.status = RUNNING
+            self._notify(job)
+            try:
+                summary = job.fn(job, *job.args)
+                job.status = DONE
+                if summary:
+                    job.message = summary
+            except JobCancelled:
+                job.status = CANCELLED
+            except Exception as e:
+                job.status = FAILED
+                job.message = f"{type(e).__name__}: {e}"
+            self._notify(job)
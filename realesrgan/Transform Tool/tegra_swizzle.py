@@ -0,0 +1,129 @@
+# tegra_swizzle.py
+"""
+Deswizzle del layout block-linear (GOBs) de la GPU Tegra X1 de Switch.
+
+Un GOB son 64 bytes x 8 filas (512 bytes); los GOBs se apilan en vertical en
+"bloques" de `block_height` GOBs. La dirección swizzled de cada byte de la
+imagen lineal es la suma de un término por fila y otro por columna: para cada
+(ancho, alto, bpp, block_height) se cachean sólo esos dos vectores y cada
+textura se deswizzlea con gathers de NumPy por bandas de filas, así que la
+memoria extra no crece con el tamaño de la textura.
+
+Las dimensiones se expresan en bloques de compresión (4x4 para BC, NxM para
+ASTC, 1x1 para formatos sin comprimir) y `bpp` son bytes por bloque.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+GOB_WIDTH = 64      # bytes
+GOB_HEIGHT = 8      # filas
+GOB_SIZE = GOB_WIDTH * GOB_HEIGHT
+
+
+def div_round_up(n: int, d: int) -> int:
+    return (n + d - 1) // d
+
+
+def round_up(n: int, align: int) -> int:
+    return div_round_up(n, align) * align
+
+
+def _pow2_round_up(n: int) -> int:
+    return 1 << max(0, (n - 1).bit_length())
+
+
+def surface_size(width: int, height: int, bpp: int, block_height: int) -> int:
+    """Bytes que ocupa la superficie swizzled (ancho/alto en bloques)."""
+    pitch = round_up(width * bpp, GOB_WIDTH)
+    return pitch * round_up(height, GOB_HEIGHT * block_height)
+
+
+# Filas que se deswizzlean con cada gather: el índice temporal ocupa como mucho
+# unos BAND_BYTES (8 bytes por byte de textura) en vez de toda la tabla
+BAND_BYTES = 16 << 20
+
+
+@lru_cache(maxsize=64)
+def block_linear_offsets(width: int, height: int, bpp: int, block_height: int):
+    """
+    La dirección swizzled de un byte lineal es separable: rows[y] + cols[x].
+    Devuelve (rows, cols), de tamaño height y width * bpp; sólo se cachean estos
+    dos vectores (unos KB), nunca la tabla completa. De sólo lectura porque los
+    comparten todas las llamadas.
+    """
+    gobs_x = div_round_up(width * bpp, GOB_WIDTH)
+    dtype = np.int64 if surface_size(width, height, bpp, block_height) >= 2 ** 31 else np.int32
+
+    x = np.arange(width * bpp, dtype=dtype)   # coordenada en bytes
+    y = np.arange(height, dtype=dtype)        # fila (en bloques)
+
+    lines = GOB_HEIGHT * block_height
+    rows = ((y // lines) * (GOB_SIZE * block_height * gobs_x)
+            + ((y % lines) // GOB_HEIGHT) * GOB_SIZE
+            + ((y % 8) // 2) * 64
+            + (y % 2) * 16)
+    cols = ((x // GOB_WIDTH) * (GOB_SIZE * block_height)
+            + ((x % 64) // 32) * 256
+            + ((x % 32) // 16) * 32
+            + (x % 16))
+    rows.setflags(write=False)
+    cols.setflags(write=False)
+    return rows, cols
+
+
+@lru_cache(maxsize=64)
+def pitch_linear_offsets(width: int, height: int, bpp: int):
+    """Igual que block_linear_offsets para tile_mode 1 (pitch linear, filas de 32 bytes)."""
+    pitch = round_up(width * bpp, 32)
+    rows = np.arange(height, dtype=np.int64) * pitch
+    cols = np.arange(width * bpp, dtype=np.int64)
+    rows.setflags(write=False)
+    cols.setflags(write=False)
+    return rows, cols
+
+
+def mip_block_heights(height: int, blk_h: int, block_height_log2: int, mip_count: int):
+    """
+    block_height (en GOBs) de cada mip: cuando un mip es más bajo que un bloque,
+    la GPU reduce el block height a la mitad (acumulativo, como el driver).
+    """
+    lines = (1 << block_height_log2) * GOB_HEIGHT
+    shift = 0
+    result = []
+    for level in range(mip_count):
+        mip_h = div_round_up(max(1, height >> level), blk_h)
+        if _pow2_round_up(mip_h) < lines:
+            shift += 1
+        result.append(1 << max(0, block_height_log2 - shift))
+    return result
+
+
+def deswizzle(data, width: int, height: int, blk_w: int, blk_h: int, bpp: int,
+              block_height: int, tile_mode: int = 0) -> np.ndarray:
+    """
+    Deswizzlea una superficie (un mip de una capa). `width`/`height` en texels.
+    Devuelve un array uint8 (alto_en_bloques, ancho_en_bloques * bpp), contiguo,
+    listo para .tobytes() o para pasarlo a un decodificador.
+    """
+    w = div_round_up(width, blk_w)
+    h = div_round_up(height, blk_h)
+    if tile_mode == 1:
+        rows, cols = pitch_linear_offsets(w, h, bpp)
+        needed = round_up(w * bpp, 32) * h
+    else:
+        rows, cols = block_linear_offsets(w, h, bpp, block_height)
+        needed = surface_size(w, h, bpp, block_height)
+
+    src = np.frombuffer(data, dtype=np.uint8)
+    if src.size < needed:
+        # Datos recortados (p.ej. el último mip): lo que falta se lee como ceros
+        padded = np.zeros(needed, dtype=np.uint8)
+        padded[:src.size] = src
+        src = padded
+
+    out = np.empty((h, w * bpp), dtype=np.uint8)
+    band = max(1, BAND_BYTES // (8 * w * bpp))
+    for y0 in range(0, h, band):
+        out[y0:y0 + band] = src[rows[y0:y0 + band, None] + cols[None, :]]
+    return out
@@ -0,0 +1,199 @@
+# test_astc_decode.py
+"""
+Pruebas del decodificador ASTC en NumPy (astc_decode) con bloques fijos.
+
+Los bloques salen de bloques aleatorios que el decodificador acepta, uno por
+característica (1-4 particiones, doble plano, pesos con trits y con quints) y
+tamaño de bloque. Al generarlos se comprobó que coinciden con texture2ddecoder
+con un margen de ±1. Los colores esperados son los que da astc_decode: para
+4x4 el RGBA completo; para el resto, un hash de los texels decodificados.
+
+    cd realesrgan && python -m pytest "Transform Tool/tests"
+"""
+import hashlib
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import astc_decode  # noqa: E402
+from astc_decode import ASTC_MAGIC, ERROR_COLOR, ASTCDecodeError, decode_astc_blocks, decode_astc_file  # noqa: E402
+
+# Bloque 4x4 -> RGBA de los 16 texels (fila a fila)
+GOLDEN_4X4 = {
+    "single": ("02a2891644dc27d154492497f61aadd6",
+               "346a465a3366426033664161346a465a3469455b336642603468435d3469455c"
+               "3469445c33664161346b47593468435e3468445d33664161356d495533664260"),
+    "multi2": ("42c8582a07dcd2fd2beaf1d1657241e1",
+               "8c8c8cc2979797c89c9c9ccb919191c5919191c59c9c9ccb9c9c9ccb919191c5"
+               "919191c58c8c8cc29c9c9ccb979797c8919191c5979797c8919191c5919191c5"),
+    "multi3": ("3fd5786adfda91f1b5e272dcd65bdd31",
+               "2f2f2ffc313131fc333333fd363636fef7f7f7d1f9f9f9d0fbfbfbd0fdfdfdcf"
+               "2b2b2bfe2e2e2efefafafacffcfcfccf2b2b2bfe2d2d2dfe303030fe323232fe"),
+    "multi4": ("bd3b216a7f22005568c49c19bb5a5a06",
+               "dddddd190d0d0d1d080808cb080808ca080808cc0d0d0d1d080808c8080808cb"
+               "080808d20b0b0b1f080808ca080808cc080808d705050525080808cf080808cc"),
+    "dual": ("2f0729e8a92c0d69b144b79200ef075f",
+             "305ca1ff2d5ba1ff295aa1ff2659a1ff656caeff5367a8ff375e9dff265997ff"
+             "686db2ff6c6ea8ff57689cff5a6992ff3b5facff686da3ffa07d9affce8b92ff"),
+    "trit": ("4f03ba5eff5ef26b111c14bd16a61ee7",
+             "909090ff909090ff909090ff909090ff808080ff868686ff8c8c8cff939393ff"
+             "757575ff707070ff696969ff636363ff838383ff828282ff818181ff808080ff"),
+    "quint": ("212277c6ecfb90b18b50ac90327d3c10",
+              "76a9d9ff6fa4d0ff6fa4d0ff7eaee2ff71a6d3ff76a8d8ff78aadbff79aadcff"
+              "74a7d6ff7aabddff79aadcff74a7d6ff80afe4ff7cade0ff71a5d2ff6fa4d0ff"),
+}
+
+# (ancho, alto, característica, bloque, sha256[:16] de los texels RGBA)
+GOLDEN_SIZES = [
+    (5, 4, "single", "138244ea766c2db2c8f48040cdf32699", "5c9fa701239f709b"),
+    (5, 4, "multi2", "5dcb20891674d8cc4f27e600c1e5979c", "e13ca6d740b5d6ee"),
+    (5, 4, "multi3", "d1f01b49178e328b231b4a5978b3d41a", "40becd2418dfda61"),
+    (5, 4, "multi4", "de1bf4f2771c6a7f45143376de6f7cab", "b605cfa0bc795c40"),
+    (5, 4, "dual", "42243e59a20ec6871ac24645442e6fb9", "ec071b255c271e80"),
+    (5, 4, "trit", "dd23a8bfc483f0fbda18c25da61e22d9", "17413e0bfbd29d30"),
+    (5, 4, "quint", "ad030fc32af7ac22e5cf3c7bf1389800", "1d973ee5d3c72fad"),
+    (6, 6, "single", "2282d9b13a097d88530ef80f6c921d44", "289f37d942eb81f1"),
+    (6, 6, "multi2", "3f883ecfe70352bb189cf569860b2001", "b95aba106192e63e"),
+    (6, 6, "multi3", "a2900bf04d909efb8886ebeadb7faa20", "52d9dbf54d17c7ed"),
+    (6, 6, "multi4", "c3789e08aa3f6d7749a4fabe9996fca7", "873e0d4cf4330353"),
+    (6, 6, "dual", "0fa4a2b56fd5e0de721f566cbc3e4f31", "fc7f16c8e912d991"),
+    (6, 6, "trit", "af035da1106e6c51e8034bc714214719", "a4a8a047956b789d"),
+    (6, 6, "quint", "41a29a7620d2b5ef9599df23fc66fdbf", "4b45084d6882ba08"),
+    (8, 8, "single", "cea18b80cb125680e17b94189ea50880", "b73fd1b7fbf7319e"),
+    (8, 8, "multi2", "71499de867853b2a42609a0b9fa1d05f", "0eaa0f47bafee385"),
+    (8, 8, "multi3", "7eb5784b94cdc6532c8ac6b7cd909d15", "d7e8066218d3a79f"),
+    (8, 8, "multi4", "bd584d0ad3bd8e6a510b241d02964c05", "aa9d10600e588442"),
+    (8, 8, "dual", "23040698199cc050193c726380605a0c", "f40a756bbc8cde54"),
+    (8, 8, "trit", "15022ce2c34e4a8bfac51786bdaa52ae", "4cb8d1c5e7ac119d"),
+    (8, 8, "quint", "adc3d85c299e2575080cbf1a5d3ac5bd", "6e9135aedf65ac43"),
+    (10, 10, "single", "33c3680f8cf1d5de713426900a4cc0ea", "5f2d84b70dcca1e1"),
+    (10, 10, "multi2", "916ae4686bca65f8610b3065b27e0c8f", "db71ca8067e50416"),
+    (10, 10, "multi3", "5e35b6aeea8c87d1d0485fa16e217196", "b24d09ad06c5b74d"),
+    (10, 10, "multi4", "8a382ae8a1f83572e3ffff673190e28b", "1e538c73e88b5dff"),
+    (10, 10, "dual", "d1a576e1b5fac613e836aae80f1fe5da", "91875c5d005e29f0"),
+    (10, 10, "trit", "9900744ce84e986626b56fc691096611", "fd11e8811039b954"),
+    (10, 10, "quint", "9283ad33d97ca96e1720ef023bdf1396", "f378e27c62227096"),
+    (12, 12, "single", "a921924a1720771855385637eb62e799", "b15974be28d9d50b"),
+    (12, 12, "multi2", "37688e56a55e0c247c4f437461c816d5", "546898d269ca4c91"),
+    (12, 12, "multi3", "355052a02258203b169a34a471b8f690", "ab89d3d553438aa6"),
+    (12, 12, "multi4", "a2f86b80b917aee414e0c28cabe99d2a", "76a4d6dfa872b479"),
+    (12, 12, "dual", "3d44d32a5f509acb38b3544a6252b924", "620f7d6c2cbaf878"),
+    (12, 12, "trit", "b9810ac4bbd00d0ee003e372243c9dee", "f0a4938365718c7e"),
+    (12, 12, "quint", "9a2148c568e3b5fa8204148af6a8ea54", "bd6875cd66bda920"),
+]
+
+
+def decode_block(block_hex, block_w, block_h, srgb=False):
+    block = np.frombuffer(bytes.fromhex(block_hex), dtype=np.uint8)[None]
+    return decode_astc_blocks(block, block_w, block_h, srgb)[0]
+
+
+def block_features(block_hex, block_w, block_h):
+    """(particiones, doble plano, trits en los pesos, quints en los pesos) leídos del bloque."""
+    bits = int.from_bytes(bytes.fromhex(block_hex), "little")
+    grid_x, grid_y, dual, level, _ = astc_decode.decode_block_mode(bits & 0x7FF, block_w, block_h)
+    _, trits, quints, _ = astc_decode.QUANT_LEVELS[level]
+    return ((bits >> 11) & 3) + 1, dual, bool(trits), bool(quints)
+
+
+FEATURES = {
+    "single": (1, False, False, False), "multi2": (2, False), "multi3": (3,), "multi4": (4,),
+    "dual": (1, True), "trit": (1, False, True, False), "quint": (1, False, False, True),
+}
+
+
+@pytest.mark.parametrize("name", sorted(GOLDEN_4X4))
+def test_golden_4x4(name):
+    block_hex, expected = GOLDEN_4X4[name]
+    features = FEATURES[name]
+    assert block_features(block_hex, 4, 4)[:len(features)] == features
+    np.testing.assert_array_equal(decode_block(block_hex, 4, 4).reshape(-1),
+                                  np.frombuffer(bytes.fromhex(expected), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("block_w, block_h, name, block_hex, digest", GOLDEN_SIZES)
+def test_golden_block_sizes(block_w, block_h, name, block_hex, digest):
+    features = FEATURES[name]
+    assert block_features(block_hex, block_w, block_h)[:len(features)] == features
+    rgba = decode_block(block_hex, block_w, block_h)
+    assert rgba.shape == (block_w * block_h, 4)
+    assert not (rgba == ERROR_COLOR).all(axis=1).any()
+    assert hashlib.sha256(rgba.tobytes()).hexdigest()[:16] == digest
+
+
+def void_extent(r, g, b, a, hdr=False):
+    """Bloque void-extent 2D (sin extensión) con el color RGBA de 16 bits dado."""
+    low = 0x1FC | (hdr << 9) | (3 << 10) | (((1 << 52) - 1) << 12)
+    return struct.pack("<QHHHH", low, r, g, b, a).hex()
+
+
+def test_void_extent():
+    block = void_extent(0x1234, 0x8000, 0xFFFF, 0x00FF)
+    # UNORM16 -> 8 bits redondeando; en sRGB se toman los 8 bits altos
+    assert (decode_block(block, 4, 4) == (18, 128, 255, 1)).all()
+    assert (decode_block(block, 4, 4, srgb=True) == (18, 128, 255, 0)).all()
+    assert (decode_block(block, 8, 6) == (18, 128, 255, 1)).all()
+    assert (decode_block(void_extent(0, 0, 0, 0, hdr=True), 4, 4) == ERROR_COLOR).all()
+
+
+def test_srgb_endpoints():
+    # Con endpoints LDR el redondeo sRGB (e << 8 | 0x80) da lo mismo que el lineal en este bloque
+    block_hex, expected = GOLDEN_4X4["single"]
+    np.testing.assert_array_equal(decode_block(block_hex, 4, 4, srgb=True).reshape(-1),
+                                  np.frombuffer(bytes.fromhex(expected), dtype=np.uint8))
+
+
+def test_invalid_blocks_are_error_color():
+    # Modo de bloque reservado (todo ceros)
+    assert (decode_block("00" * 16, 4, 4) == ERROR_COLOR).all()
+    # Rejilla de pesos 12x2 (modo 0x004): no cabe en un bloque 4x4
+    assert astc_decode.decode_block_mode(0x004, 4, 4) is None
+    assert (decode_block("04" + "00" * 15, 4, 4) == ERROR_COLOR).all()
+    # Modo de endpoint HDR (CEM 15) en un bloque por lo demás válido
+    bits = int.from_bytes(bytes.fromhex(GOLDEN_4X4["single"][0]), "little")
+    hdr = (bits & ~(0xF << 13)) | (15 << 13)
+    assert (decode_block(hdr.to_bytes(16, "little").hex(), 4, 4) == ERROR_COLOR).all()
+    # Un bloque malo no estropea a los demás de la misma tanda
+    blocks = np.frombuffer(bytes.fromhex("00" * 16 + GOLDEN_4X4["trit"][0]), dtype=np.uint8).reshape(2, 16)
+    out = decode_astc_blocks(blocks, 4, 4)
+    assert (out[0] == ERROR_COLOR).all()
+    np.testing.assert_array_equal(out[1], decode_block(GOLDEN_4X4["trit"][0], 4, 4))
+
+
+# ---------- archivos .astc ----------
+
+def astc_file(path, block_w, block_h, width, height, blocks, block_d=1, depth=1):
+    header = struct.pack("<4s3B", ASTC_MAGIC, block_w, block_h, block_d)
+    header += b"".join(v.to_bytes(3, "little") for v in (width, height, depth))
+    path.write_bytes(header + blocks)
+    return path
+
+
+def test_decode_astc_file(tmp_path):
+    # 7x5 texels con bloques 4x4: 2x2 bloques, recortados al tamaño de la imagen
+    names = ["single", "multi2", "dual", "trit"]
+    blocks = b"".join(bytes.fromhex(GOLDEN_4X4[n][0]) for n in names)
+    path = astc_file(tmp_path / "t.astc", 4, 4, 7, 5, blocks)
+
+    arr, header = decode_astc_file(path, decoder="builtin")
+    assert header == {"block_w": 4, "block_h": 4, "width": 7, "height": 5, "depth": 1}
+    assert arr.shape == (5, 7, 4) and arr.dtype == np.uint8
+    tiles = [decode_block(GOLDEN_4X4[n][0], 4, 4).reshape(4, 4, 4) for n in names]
+    full = np.concatenate([np.concatenate(tiles[:2], axis=1), np.concatenate(tiles[2:], axis=1)], axis=0)
+    np.testing.assert_array_equal(arr, full[:5, :7])
+
+
+def test_decode_astc_file_rejects_bad_input(tmp_path):
+    block = bytes.fromhex(GOLDEN_4X4["single"][0])
+    with pytest.raises(ASTCDecodeError, match="truncados"):
+        decode_astc_file(astc_file(tmp_path / "short.astc", 4, 4, 8, 8, block * 3), decoder="builtin")
+    with pytest.raises(ASTCDecodeError, match="cabecera"):
+        (tmp_path / "raw.astc").write_bytes(block * 4)
+        decode_astc_file(tmp_path / "raw.astc", decoder="builtin")
+    with pytest.raises(ASTCDecodeError, match="3D"):
+        decode_astc_file(astc_file(tmp_path / "3d.astc", 4, 4, 4, 4, block, block_d=4, depth=4),
+                         decoder="builtin")
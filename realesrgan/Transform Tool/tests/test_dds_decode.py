@@ -0,0 +1,122 @@
+# test_dds_decode.py
+"""
+Pruebas del decodificador BC1-BC5 en NumPy (dds_decode) con bloques fijos cuyo
+resultado se calcula a mano a partir de la especificación, y comparación con
+el lector DDS de Pillow (±1) cuando éste soporta el formato.
+
+    cd realesrgan && python -m pytest "Transform Tool/tests"
+"""
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dds_decode import DDSDecodeError, bc5_to_rgba, decode_bc, decode_dds, read_dds_header  # noqa: E402
+
+RED, BLUE = 0xF800, 0x001F
+
+
+def bc1_block(c0, c1, indices):
+    """Bloque de color BC1: dos colores 565 y 16 índices de 2 bits."""
+    bits = sum(i << (2 * n) for n, i in enumerate(indices))
+    return struct.pack("<HHI", c0, c1, bits)
+
+
+def bc4_block(a0, a1, indices):
+    """Bloque BC4: dos extremos y 16 índices de 3 bits."""
+    bits = sum(i << (3 * n) for n, i in enumerate(indices))
+    return bytes([a0, a1]) + bits.to_bytes(6, "little")
+
+
+CYCLE4 = [n % 4 for n in range(16)]
+CYCLE8 = [n % 8 for n in range(16)]
+
+# Paleta de 8 valores (a0 > a1) y de 6 + 0/255 (a0 <= a1), calculadas a mano
+BC4_EIGHT = [200, 10, 173, 146, 119, 91, 64, 37]
+BC4_SIX = [10, 200, 48, 86, 124, 162, 0, 255]
+
+
+def texels(palette, indices):
+    return np.array([palette[i] for i in indices], dtype=np.uint8).reshape(4, 4, -1).squeeze()
+
+
+def write_dds(path, fourcc, width, height, payload, dxgi=None):
+    header = bytearray(124)
+    struct.pack_into("<IIIII", header, 0, 124, 0x1007, height, width, len(payload))
+    struct.pack_into("<II4s", header, 72, 32, 0x4, b"DX10" if dxgi is not None else fourcc)
+    struct.pack_into("<I", header, 104, 0x1000)
+    dx10 = struct.pack("<IIIII", dxgi, 3, 0, 1, 0) if dxgi is not None else b""
+    path.write_bytes(b"DDS " + bytes(header) + dx10 + payload)
+    return path
+
+
+CASES = {
+    # nombre: (FourCC, bloque, resultado esperado (4, 4, C))
+    "BC1": (b"DXT1", bc1_block(RED, BLUE, CYCLE4),
+            texels([(255, 0, 0, 255), (0, 0, 255, 255), (170, 0, 85, 255), (85, 0, 170, 255)], CYCLE4)),
+    # c0 <= c1: 3 colores + transparente
+    "BC1_punchthrough": (b"DXT1", bc1_block(BLUE, RED, CYCLE4),
+                         texels([(0, 0, 255, 255), (255, 0, 0, 255), (128, 0, 128, 255), (0, 0, 0, 0)], CYCLE4)),
+    # Alfa explícito de 4 bits (texel n -> n * 17); el color siempre con 4 colores
+    "BC2": (b"DXT3", bytes.fromhex("1032547698badcfe") + bc1_block(BLUE, RED, CYCLE4),
+            np.dstack([texels([(0, 0, 255), (255, 0, 0), (85, 0, 170), (170, 0, 85)], CYCLE4),
+                       (np.arange(16) * 17).reshape(4, 4)]).astype(np.uint8)),
+    "BC3": (b"DXT5", bc4_block(200, 10, CYCLE8) + bc1_block(RED, BLUE, CYCLE4),
+            np.dstack([texels([(255, 0, 0), (0, 0, 255), (170, 0, 85), (85, 0, 170)], CYCLE4),
+                       texels(BC4_EIGHT, CYCLE8)]).astype(np.uint8)),
+    "BC4": (b"ATI1", bc4_block(200, 10, CYCLE8), texels(BC4_EIGHT, CYCLE8)),
+    "BC4_six": (b"ATI1", bc4_block(10, 200, CYCLE8), texels(BC4_SIX, CYCLE8)),
+    "BC5": (b"ATI2", bc4_block(200, 10, CYCLE8) + bc4_block(10, 200, CYCLE8),
+            np.dstack([texels(BC4_EIGHT, CYCLE8), texels(BC4_SIX, CYCLE8)]).astype(np.uint8)),
+}
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_fixed_blocks(name):
+    fourcc, block, expected = CASES[name]
+    fmt = name.split("_")[0]
+    np.testing.assert_array_equal(decode_bc(block, 4, 4, fmt), expected)
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_decode_dds_file(tmp_path, name):
+    fourcc, block, expected = CASES[name]
+    path = write_dds(tmp_path / f"{name}.dds", fourcc, 4, 4, block)
+    arr, header = decode_dds(path)
+    assert header["format"] == name.split("_")[0]
+    np.testing.assert_array_equal(arr, expected)
+
+    # Pillow como segunda referencia, donde sabe leer el formato
+    try:
+        with Image.open(path) as img:
+            ref = np.asarray(img.convert("RGBA" if arr.ndim == 3 and arr.shape[2] == 4 else img.mode))
+    except (OSError, NotImplementedError, ValueError):
+        pytest.skip(f"Pillow no lee {fourcc.decode()}")
+    if arr.ndim == 3 and arr.shape[2] == 2:
+        arr, ref = bc5_to_rgba(arr)[..., :2], ref[..., :2]
+    assert np.abs(arr.astype(int) - ref.reshape(arr.shape).astype(int)).max() <= 1
+
+
+def test_dx10_header_and_cropping(tmp_path):
+    # 6x5 texels: 2x2 bloques, recortados al tamaño real
+    blocks = [bc1_block(RED, BLUE, CYCLE4), bc1_block(BLUE, RED, CYCLE4),
+              bc1_block(RED, RED, [0] * 16), bc1_block(BLUE, BLUE, [1] * 16)]
+    path = write_dds(tmp_path / "dx10.dds", None, 6, 5, b"".join(blocks), dxgi=71)
+    arr, header = decode_dds(path)
+    assert header["format"] == "BC1" and header["dxgi_format"] == 71
+    assert arr.shape == (5, 6, 4)
+    np.testing.assert_array_equal(arr[:4, :4], CASES["BC1"][2])
+    np.testing.assert_array_equal(arr[:4, 4:], CASES["BC1_punchthrough"][2][:, :2])
+    assert (arr[4, :4] == (255, 0, 0, 255)).all() and (arr[4, 4:] == (0, 0, 255, 255)).all()
+
+
+def test_unsupported_and_truncated(tmp_path):
+    with pytest.raises(DDSDecodeError, match="no soportado"):
+        decode_dds(write_dds(tmp_path / "bc7.dds", None, 4, 4, bytes(16), dxgi=98))
+    with pytest.raises(DDSDecodeError, match="truncados"):
+        decode_dds(write_dds(tmp_path / "short.dds", b"DXT1", 8, 8, bytes(24)))
+    assert read_dds_header((tmp_path / "short.dds").read_bytes())["width"] == 8
@@ -0,0 +1,178 @@
+# test_dsspng.py
+"""
+Pruebas de dsspng: reconstrucción de Z en normales y lotes de texconv (con
+texconv_stub.py en lugar de texconv.exe).
+
+    cd realesrgan && python -m pytest "Transform Tool/tests"
+
+(desde realesrgan/: en la raíz del repo pytest importaría el __init__.py del addon, que necesita bpy)
+"""
+import json
+import math
+import os
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import dsspng  # noqa: E402
+
+
+def reconstruct_normal_z_loop(rgba):
+    """El bucle por píxel original de reconstruct_normal_z_from_xy, como referencia."""
+    out = np.array(rgba, dtype=np.uint8)
+    h, w = out.shape[:2]
+    for y in range(h):
+        for x in range(w):
+            r, g = int(out[y, x, 0]), int(out[y, x, 1])
+            # mapear a [-1, 1]
+            nx = (r / 255.0) * 2.0 - 1.0
+            ny = (g / 255.0) * 2.0 - 1.0
+            nz_sq = 1.0 - nx * nx - ny * ny
+            if nz_sq < 0.0:
+                nz = 0.0  # clamp si por redondeo sale negativo
+            else:
+                nz = math.sqrt(nz_sq)
+            # re-mapear a [0,255]
+            bz = int(round((nz * 0.5 + 0.5) * 255.0))
+            out[y, x] = (r, g, bz, 255)
+    return out
+
+
+def test_reconstruct_normal_z_matches_loop():
+    # Todas las parejas (r, g) posibles; B y A de entrada no deben influir
+    r, g = np.meshgrid(np.arange(256), np.arange(256), indexing="ij")
+    rng = np.random.default_rng(0)
+    rgba = np.stack([r, g, rng.integers(0, 256, r.shape), rng.integers(0, 256, r.shape)], -1).astype(np.uint8)
+
+    expected = reconstruct_normal_z_loop(rgba)
+    got = dsspng.reconstruct_normal_z(rgba)
+    assert got.dtype == np.uint8
+    np.testing.assert_array_equal(got, expected)
+
+
+# ---------- lotes de texconv ----------
+
+def write_dds(path, fourcc=b"DXT1", size=(0, 0)):
+    """DDS mínimo: cabecera con el FourCC pedido y 8 bytes de datos (a texconv_stub le basta;
+    con size=(4, 4) es un BC1 de un bloque que dds_decode también sabe leer)."""
+    header = bytearray(124)
+    struct.pack_into("<III", header, 0, 124, 0, size[1])
+    struct.pack_into("<I", header, 12, size[0])
+    struct.pack_into("<II4s", header, 72, 32, 0x4, fourcc)
+    path.write_bytes(b"DDS " + bytes(header) + bytes(8))
+
+
+@pytest.fixture
+def texconv_stub(tmp_path, monkeypatch):
+    """dsspng.TEXCONV_EXE apuntando a texconv_stub.py; devuelve una función que lee las llamadas."""
+    if os.name == "nt":
+        pytest.skip("el envoltorio del stub es un script de shell")
+    wrapper = tmp_path / "texconv"
+    stub = Path(__file__).with_name("texconv_stub.py")
+    wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{stub}" "$@"\n')
+    wrapper.chmod(0o755)
+    log = tmp_path / "texconv_calls.jsonl"
+    monkeypatch.setattr(dsspng, "TEXCONV_EXE", wrapper)
+    monkeypatch.setenv("TEXCONV_STUB_LOG", str(log))
+
+    def calls():
+        if not log.exists():
+            return []
+        return [json.loads(line) for line in log.read_text().splitlines()]
+    return calls
+
+
+def dds_args(call):
+    return sorted(Path(a).name for a in call if a.endswith(".dds"))
+
+
+def test_plan_texconv_batches_groups_by_flags_and_splits():
+    out = Path("out")
+    items = [(Path(f"t{i}.dds"), out / f"t{i}.png", {"valid": True, "format": "BC1"}) for i in range(5)]
+    items.append((Path("g.dds"), out / "g.png", {"valid": True, "format": "BC4"}))
+    batches = dsspng.plan_texconv_batches(items, max_files=2)
+    assert [(flags, len(members)) for _, flags, members in batches] == [
+        ((), 2), ((), 2), ((), 1), (("-f", "R8_UNORM"), 1)]
+
+
+def test_texconv_batch_attribution_and_manifest(tmp_path, texconv_stub, capsys):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    names = ["a", "b_fail", "c", "d"]
+    for name in names:
+        write_dds(src / f"{name}.dds")
+    # Resto de una ejecución anterior para el que va a fallar: la atribución por
+    # mtime no debe tomarlo por una salida nueva
+    out.mkdir()
+    stale = out / "b_fail.png"
+    stale.write_bytes(b"old")
+    os.utime(stale, ns=(1_000_000_000, 1_000_000_000))
+
+    totals = dsspng.convert_dds_to_png(src, out, jobs=1, decoder="texconv")
+
+    # N archivos con los mismos flags -> una sola llamada
+    calls = texconv_stub()
+    assert len(calls) == 1
+    assert dds_args(calls[0]) == [f"{n}.dds" for n in names]
+    assert totals["converted"] == 3 and totals["failed"] == 1
+
+    # El fallo se atribuye a b_fail y sólo a él
+    fail_lines = [ln for ln in capsys.readouterr().out.splitlines() if ln.startswith("[FAIL]")]
+    assert len(fail_lines) == 1 and "b_fail.dds" in fail_lines[0]
+    assert stale.read_bytes() == b"old"
+    for name in ("a", "c", "d"):
+        assert (out / f"{name}.png").exists()
+
+    manifest = json.loads((out / dsspng.MANIFEST_NAME).read_text())
+    assert sorted(manifest["files"]) == ["a.dds", "c.dds", "d.dds"]
+
+    # Segunda pasada: lo convertido sale del manifest; sólo se reintenta el que falló
+    totals = dsspng.convert_dds_to_png(src, out, jobs=1, decoder="texconv")
+    calls = texconv_stub()
+    assert len(calls) == 2
+    assert dds_args(calls[1]) == ["b_fail.dds"]
+    assert totals["skipped"] == 3 and totals["failed"] == 1 and totals["converted"] == 0
+
+
+# ---------- manifest ----------
+
+def test_manifest_is_saved_when_interrupted(tmp_path, monkeypatch):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    names = ["a", "b", "c", "d", "e"]
+    for name in names:
+        write_dds(src / f"{name}.dds", size=(4, 4))
+
+    saves = []
+    save = dsspng.ConversionManifest.save
+    monkeypatch.setattr(dsspng.ConversionManifest, "save", lambda self: saves.append(1) or save(self))
+    monkeypatch.setattr(dsspng, "MANIFEST_SAVE_EVERY", 2)
+    decode_one = dsspng.decode_one
+    done = []
+
+    def interrupted(*args):
+        if len(done) == 3:
+            raise KeyboardInterrupt
+        done.append(args[0].name)
+        return decode_one(*args)
+    monkeypatch.setattr(dsspng, "decode_one", interrupted)
+
+    with pytest.raises(KeyboardInterrupt):
+        dsspng.convert_dds_to_png(src, out, jobs=1, decoder="builtin")
+
+    # Una vez al llegar a 2 archivos y otra en el finally
+    assert len(saves) == 2
+    manifest = json.loads((out / dsspng.MANIFEST_NAME).read_text())
+    assert sorted(manifest["files"]) == ["a.dds", "b.dds", "c.dds"]
+    # El hash viene del worker y es el del DDS convertido
+    entry = manifest["files"]["a.dds"]
+    assert entry["sha1"] == dsspng.file_digest(src / "a.dds")
+    assert entry["size"] == (src / "a.dds").stat().st_size
+
+    monkeypatch.setattr(dsspng, "decode_one", decode_one)
+    totals = dsspng.convert_dds_to_png(src, out, jobs=1, decoder="builtin")
+    assert totals["skipped"] == 3 and totals["converted"] == 2
@@ -0,0 +1,182 @@
+# test_task_queue.py
+"""
+Pruebas de la cola de trabajos (task_queue) sin GUI: orden de ejecución,
+cancelación de un trabajo en cola, terminación de procesos externos al
+cancelar y recuperación cuando un proceso del pool muere.
+
+    cd realesrgan && python -m pytest "Transform Tool/tests"
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import task_queue  # noqa: E402
+from task_queue import CANCELLED, DONE, FAILED, TaskQueue  # noqa: E402
+
+TIMEOUT = 30
+
+
+def square(n):
+    return n * n
+
+
+def crash(code):
+    # Mata el proceso del pool sin pasar por Python: el pool queda roto
+    os._exit(code)
+
+
+def wait_finished(jobs, timeout=TIMEOUT):
+    """Espera a que todos los trabajos terminen (hecho, error o cancelado)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(job.status in (DONE, FAILED, CANCELLED) for job in jobs):
+            return
+        time.sleep(0.02)
+    pytest.fail(f"los trabajos no terminaron: {[(job.name, job.status) for job in jobs]}")
+
+
+@pytest.fixture
+def tq():
+    q = TaskQueue(processes=1)
+    yield q
+    q.shutdown()
+
+
+def test_jobs_run_in_submission_order(tq):
+    ran = []
+    gate = threading.Event()
+
+    def job_fn(job, name, delay):
+        if name == "a":
+            gate.wait(TIMEOUT)
+        time.sleep(delay)
+        ran.append(name)
+        return f"{name} ok"
+
+    # Los tiempos van al revés: si corrieran en paralelo, "c" acabaría primero
+    jobs = [tq.submit(name, job_fn, name, delay) for name, delay in (("a", 0.1), ("b", 0.05), ("c", 0))]
+    gate.set()
+    wait_finished(jobs)
+    assert ran == ["a", "b", "c"]
+    assert [job.status for job in jobs] == [DONE] * 3
+    assert [job.message for job in jobs] == ["a ok", "b ok", "c ok"]
+    assert {job.id for job in tq.poll()} == {job.id for job in jobs}
+
+
+def test_cancel_queued_job_never_runs(tq):
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def blocker(job):
+        started.set()
+        release.wait(TIMEOUT)
+        ran.append("blocker")
+
+    def second(job):
+        ran.append("second")
+
+    first = tq.submit("bloqueo", blocker)
+    assert started.wait(TIMEOUT)
+    queued = tq.submit("segundo", second)
+    after = tq.submit("tercero", lambda job: ran.append("third"))
+    tq.cancel(queued)
+    release.set()
+    wait_finished([first, queued, after])
+    assert queued.status == CANCELLED
+    assert (first.status, after.status) == (DONE, DONE)
+    assert ran == ["blocker", "third"]
+
+
+def test_failure_is_reported_and_queue_continues(tq):
+    def boom(job):
+        raise ValueError("roto")
+
+    bad = tq.submit("falla", boom)
+    good = tq.submit("sigue", lambda job: "ok")
+    wait_finished([bad, good])
+    assert bad.status == FAILED and bad.message == "ValueError: roto"
+    assert good.status == DONE and good.message == "ok"
+
+
+def test_run_process_collects_output(tq):
+    def job_fn(job):
+        code, tail = job.run_process([sys.executable, "-c", "import sys\nfor i in range(30): print(i)\nsys.exit(3)"])
+        return f"{code}|{tail}"
+
+    job = tq.submit("proceso", job_fn)
+    wait_finished([job])
+    assert job.status == DONE
+    code, tail = job.message.split("|")
+    assert code == "3"
+    # Sólo se guardan las 20 últimas líneas
+    assert tail.splitlines() == [str(i) for i in range(10, 30)]
+
+
+def test_cancel_terminates_running_process(tq, monkeypatch):
+    printed = threading.Event()
+    lines, procs = [], []
+    real_popen = task_queue.subprocess.Popen
+
+    def recording_popen(*args, **kwargs):
+        proc = real_popen(*args, **kwargs)
+        procs.append(proc)
+        return proc
+
+    def on_line(line):
+        lines.append(line)
+        printed.set()
+
+    def job_fn(job):
+        job.run_process([sys.executable, "-c", "import time; print('listo', flush=True); time.sleep(120)"],
+                        on_line=on_line)
+        return "no debería terminar"
+
+    monkeypatch.setattr(task_queue.subprocess, "Popen", recording_popen)
+    job = tq.submit("largo", job_fn)
+    assert printed.wait(TIMEOUT)
+    start = time.monotonic()
+    tq.cancel(job)
+    wait_finished([job])
+    assert job.status == CANCELLED
+    assert time.monotonic() - start < 10
+    assert lines == ["listo"]
+    assert procs[0].poll() is not None and procs[0].returncode != 0
+    assert not job._procs
+
+
+def test_map_yields_results_and_errors(tq):
+    def job_fn(job):
+        results = dict(job.map(square, [(n,) for n in range(5)] + [("x",)]))
+        # Un error en una tarea llega como resultado, no hace fallar el trabajo
+        assert isinstance(results[("x",)], TypeError)
+        return ",".join(str(results[(n,)]) for n in range(5))
+
+    job = tq.submit("map", job_fn)
+    wait_finished([job])
+    assert job.status == DONE and job.message == "0,1,4,9,16"
+
+
+def test_broken_pool_is_discarded_and_next_job_recovers(tq):
+    pools = []
+
+    def crashing(job):
+        pools.append(tq.pool())
+        for _ in job.map(crash, [(7,)]):
+            pass
+
+    def healthy(job):
+        pools.append(tq.pool())
+        return str(sorted(result for _, result in job.map(square, [(2,), (3,)])))
+
+    bad = tq.submit("rompe el pool", crashing)
+    good = tq.submit("pool nuevo", healthy)
+    wait_finished([bad, good])
+    assert bad.status == FAILED and bad.message.startswith("BrokenProcessPool")
+    assert good.status == DONE and good.message == "[4, 9]"
+    # El segundo trabajo no reutiliza el pool roto
+    assert pools[0] is not pools[1]
@@ -0,0 +1,99 @@
+# test_tegra_swizzle.py
+"""
+Pruebas de tegra_swizzle: deswizzle() debe invertir un swizzle de referencia
+(la fórmula de GOBs byte a byte, sin NumPy) para BC, ASTC y RGBA8 con varios
+block heights, y también el layout pitch linear.
+
+    cd realesrgan && python -m pytest "Transform Tool/tests"
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import tegra_swizzle  # noqa: E402
+from tegra_swizzle import deswizzle, div_round_up, surface_size  # noqa: E402
+
+# (nombre, ancho del bloque, alto del bloque, bytes por bloque)
+FORMATS = [
+    ("BC1", 4, 4, 8),
+    ("BC7", 4, 4, 16),
+    ("ASTC_8x8", 8, 8, 16),
+    ("ASTC_5x4", 5, 4, 16),
+    ("RGBA8", 1, 1, 4),
+]
+
+
+def swizzle_address(x, y, width_bytes, block_height):
+    """Dirección block-linear del byte x de la fila y, calculada de uno en uno."""
+    gobs_x = div_round_up(width_bytes, 64)
+    lines = 8 * block_height
+    gob = ((y // lines) * 512 * block_height * gobs_x
+           + (x // 64) * 512 * block_height
+           + ((y % lines) // 8) * 512)
+    x, y = x % 64, y % 8
+    return gob + (x // 32) * 256 + (y // 2) * 64 + ((x % 32) // 16) * 32 + (y % 2) * 16 + x % 16
+
+
+def swizzle_reference(linear, block_height):
+    h, width_bytes = linear.shape
+    out = bytearray(surface_size(width_bytes, h, 1, block_height))
+    for y in range(h):
+        for x in range(width_bytes):
+            out[swizzle_address(x, y, width_bytes, block_height)] = linear[y, x]
+    return bytes(out)
+
+
+def linear_data(width, height, blk_w, blk_h, bpp):
+    h, w = div_round_up(height, blk_h), div_round_up(width, blk_w)
+    rng = np.random.default_rng(width * 131 + height)
+    return rng.integers(0, 256, size=(h, w * bpp), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("block_height", [1, 2, 4, 8, 16])
+@pytest.mark.parametrize("name, blk_w, blk_h, bpp", FORMATS)
+def test_deswizzle_inverts_block_linear(name, blk_w, blk_h, bpp, block_height):
+    width, height = 84, 70   # no múltiplos de GOB ni de bloque
+    linear = linear_data(width, height, blk_w, blk_h, bpp)
+    data = swizzle_reference(linear, block_height)
+    out = deswizzle(data, width, height, blk_w, blk_h, bpp, block_height)
+    np.testing.assert_array_equal(out, linear)
+
+
+@pytest.mark.parametrize("name, blk_w, blk_h, bpp", FORMATS)
+def test_deswizzle_pitch_linear(name, blk_w, blk_h, bpp):
+    width, height = 84, 70
+    linear = linear_data(width, height, blk_w, blk_h, bpp)
+    h, width_bytes = linear.shape
+    pitch = -(-width_bytes // 32) * 32
+    data = bytearray(pitch * h)
+    for y in range(h):
+        data[y * pitch:y * pitch + width_bytes] = linear[y].tobytes()
+    out = deswizzle(bytes(data), width, height, blk_w, blk_h, bpp, 4, tile_mode=1)
+    np.testing.assert_array_equal(out, linear)
+
+
+def test_deswizzle_in_bands_matches_one_gather(monkeypatch):
+    linear = linear_data(256, 200, 1, 1, 4)
+    data = swizzle_reference(linear, 4)
+    monkeypatch.setattr(tegra_swizzle, "BAND_BYTES", 8 * 256 * 4 * 3)   # 3 filas por banda
+    np.testing.assert_array_equal(deswizzle(data, 256, 200, 1, 1, 4, 4), linear)
+
+
+def test_truncated_data_reads_as_zeros():
+    linear = linear_data(64, 64, 4, 4, 16)
+    data = swizzle_reference(linear, 2)
+    half = data[:len(data) // 2]
+    out = deswizzle(half, 64, 64, 4, 4, 16, 2)
+    padded = half + bytes(len(data) - len(half))
+    np.testing.assert_array_equal(out, deswizzle(padded, 64, 64, 4, 4, 16, 2))
+    assert 0 < np.count_nonzero(out != linear) <= linear.size // 2
+
+
+def test_cache_holds_only_offset_vectors():
+    tegra_swizzle.block_linear_offsets.cache_clear()
+    deswizzle(bytes(surface_size(4096 * 4, 512, 1, 16)), 4096, 512, 1, 1, 4, 16)
+    rows, cols = tegra_swizzle.block_linear_offsets(4096, 512, 4, 16)
+    assert rows.nbytes + cols.nbytes < 128 << 10
@@ -0,0 +1,122 @@
+# test_transform_tool.py
+"""
+Pruebas de la CLI sin GUI (transform_tool.py) lanzada como proceso, igual que
+la usan combined_mirrorer y los scripts del build box: código de salida, JSON
+válido en stdout con --json y los logs de la herramienta sólo en stderr.
+
+    cd realesrgan && python -m pytest "Transform Tool/tests"
+"""
+import json
+import struct
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+TOOL = Path(__file__).resolve().parent.parent / "transform_tool.py"
+
+
+def run_tool(*args):
+    return subprocess.run([sys.executable, str(TOOL), *map(str, args)],
+                          capture_output=True, text=True, timeout=120)
+
+
+def write_bc1(path, width=4, height=4, fourcc=b"DXT1"):
+    """DDS con bloques BC1 de un rojo sólido (o con otro FourCC, para forzar un fallo)."""
+    blocks = ((width + 3) // 4) * ((height + 3) // 4)
+    header = bytearray(124)
+    struct.pack_into("<IIIII", header, 0, 124, 0x1007, height, width, blocks * 8)
+    struct.pack_into("<II4s", header, 72, 32, 0x4, fourcc)
+    struct.pack_into("<I", header, 104, 0x1000)
+    path.write_bytes(b"DDS " + bytes(header) + struct.pack("<HHI", 0xF800, 0xF800, 0) * blocks)
+
+
+@pytest.fixture
+def image_folder(tmp_path):
+    folder = tmp_path / "imgs"
+    folder.mkdir()
+    rng = np.random.default_rng(0)
+    Image.fromarray(rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)).save(folder / "a.png")
+    Image.fromarray(rng.integers(0, 256, (5, 4, 4), dtype=np.uint8)).save(folder / "b.png")
+    return folder
+
+
+@pytest.fixture
+def dds_folder(tmp_path):
+    folder = tmp_path / "dds"
+    folder.mkdir()
+    write_bc1(folder / "red.dds")
+    write_bc1(folder / "wide.dds", 8, 4)
+    return folder
+
+
+def test_mirror_writes_variants_and_exits_0(image_folder):
+    result = run_tool("mirror", image_folder, "--jobs", "2")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "mirror: processed=2, failed=0"
+    for stem in ("a", "b"):
+        src = np.asarray(Image.open(image_folder / f"{stem}.png"))
+        with Image.open(image_folder / f"{stem}_mirrored_method1.png") as img:
+            assert img.size == (2 * src.shape[1], src.shape[0])
+        # method2 = [imagen | imagen espejada], en el mismo modo
+        np.testing.assert_array_equal(np.asarray(Image.open(image_folder / f"{stem}_mirrored_method2.png")),
+                                      np.hstack([src, src[:, ::-1]]))
+
+
+def test_mirror_json_and_failure_exit_code(image_folder):
+    (image_folder / "broken.png").write_bytes(b"no es un png")
+    result = run_tool("mirror", image_folder, "--json")
+    assert result.returncode == 1
+    summary = json.loads(result.stdout)
+    assert summary == {"command": "mirror", "processed": 2, "failed": 1}
+    # Los logs (progreso y el error de broken.png) van a stderr
+    assert "Error: broken.png" in result.stderr
+    assert "[3/3]" in result.stderr
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_dds2png_json_keeps_stdout_clean(dds_folder, tmp_path, jobs):
+    out = tmp_path / "out"
+    result = run_tool("dds2png", dds_folder, "--out", out, "--decoder", "builtin", "--jobs", jobs, "--json")
+    assert result.returncode == 0, result.stderr
+    # stdout es exactamente un objeto JSON: nada del resumen de dsspng ni de los procesos del pool
+    summary = json.loads(result.stdout)
+    assert summary["command"] == "dds2png"
+    assert summary["out"] == str(out)
+    assert (summary["converted"], summary["failed"], summary["skipped"]) == (2, 0, 0)
+    assert "--- RESUMEN ---" in result.stderr
+    with Image.open(out / "red.png") as img:
+        assert img.size == (4, 4) and img.getpixel((0, 0))[:3] == (255, 0, 0)
+    with Image.open(out / "wide.png") as img:
+        assert img.size == (8, 4)
+
+    # Segunda pasada: el manifest lo da todo por convertido
+    again = json.loads(run_tool("dds2png", dds_folder, "--out", out, "--decoder", "builtin", "--json").stdout)
+    assert (again["converted"], again["skipped"]) == (0, 2)
+
+
+def test_dds2png_failure_exits_1_with_json(dds_folder, tmp_path):
+    # BC7 no lo decodifica el decodificador en proceso y con "builtin" no hay texconv
+    write_bc1(dds_folder / "bc7.dds", fourcc=b"BC7U")
+    (dds_folder / "trunc.dds").write_bytes(b"DDS " + bytes(20))
+    result = run_tool("dds2png", dds_folder, "--out", tmp_path / "out", "--decoder", "builtin", "--json")
+    assert result.returncode == 1
+    summary = json.loads(result.stdout)
+    assert summary["failed"] == 2 and summary["converted"] == 2
+    assert "[FAIL]" in result.stderr and "[FAIL]" not in result.stdout
+
+
+def test_dds2png_without_json_prints_summary_line(dds_folder, tmp_path):
+    result = run_tool("dds2png", dds_folder, "--out", tmp_path / "out", "--decoder", "builtin", "--jobs", "1")
+    assert result.returncode == 0, result.stderr
+    last = result.stdout.splitlines()[-1]
+    assert last.startswith("dds2png: ") and "converted=2" in last and "failed=0" in last
+
+
+def test_bad_arguments_exit_2():
+    result = run_tool("dds2png")
+    assert result.returncode == 2
+    assert result.stdout == "" and "usage" in result.stderr
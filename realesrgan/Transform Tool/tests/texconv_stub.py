@@ -0,0 +1,52 @@
+# texconv_stub.py
+"""
+Sustituto de texconv para las pruebas (corre en Linux, sin DirectXTex).
+
+Acepta la misma línea que usa dsspng.run_texconv_batch:
+
+    texconv_stub.py -ft png -y -o <salida> [flags...] a.dds b.dds ...
+
+Escribe <salida>/<nombre>.png (4x4 gris) por cada DDS, salvo los que tienen
+"fail" en el nombre: para esos imprime un error como texconv y no escribe
+nada, y el proceso sale con código 1. Cada llamada se añade como una línea
+JSON (argv) al archivo de $TEXCONV_STUB_LOG, si está definido.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+
+def main(argv):
+    log = os.environ.get("TEXCONV_STUB_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(argv) + "\n")
+
+    out_dir, files, i = Path("."), [], 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ("-o", "-ft", "-f", "--swizzle"):
+            if arg == "-o":
+                out_dir = Path(argv[i + 1])
+            i += 2
+            continue
+        if not arg.startswith("-"):
+            files.append(Path(arg))
+        i += 1
+
+    code = 0
+    for dds in files:
+        if "fail" in dds.stem:
+            print(f"ERROR: {dds.name}: FAILED (80004005)")
+            code = 1
+            continue
+        Image.new("L", (4, 4), 128).save(out_dir / (dds.stem + ".png"))
+        print(f"reading {dds.name} -> writing {dds.stem}.png")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
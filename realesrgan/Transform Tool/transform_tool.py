@@ -0,0 +1,416 @@
+# transform_tool.py
+"""
+Operaciones del Transform Tool sin GUI, y su CLI (`transform-tool`).
+
+combined_mirrorer.py es sólo la ventana Tk sobre estas mismas funciones; aquí
+no se importa tkinter ni fbx al cargar, así que todo corre en una máquina sin
+pantalla (p.ej. un build box Linux por la noche):
+
+    python transform_tool.py bntx     <carpeta> [--png]
+    python transform_tool.py flatten  <carpeta>/textures
+    python transform_tool.py dds2png  <carpeta> [--out DIR] [--mirror] [--force]
+    python transform_tool.py mirror   <carpeta>
+    python transform_tool.py delete-mirrors <carpeta>
+    python transform_tool.py dae2fbx  <carpeta>
+
+Todos aceptan --jobs N (procesos/hilos en paralelo) y --json (un objeto JSON
+con el resumen en stdout; los logs van a stderr). El código de salida es 1 si
+algún archivo ha fallado.
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import dsspng
+from bntx_extract import extract_bntx
+from dsspng import map_files
+
+# dsspng ya añade realesrgan/ al path (image_io, image_mirror)
+from image_io import DEFAULT_PROFILE, PNG_PROFILES, save_image
+from image_mirror import can_stream, mirror_file, mirror_image, mirror_png_stream
+
+# Salidas de "Mirror": (sufijo, layout de image_mirror)
+MIRROR_VARIANTS = (("_mirrored_method1", "halves"), ("_mirrored_method2", "double"))
+
+# Hilos que espejan y codifican las salidas (PIL suelta el GIL al codificar)
+MIRROR_WORKERS = 4
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff', '.webp'}
+
+
+# ---------- BNTX / TEXTURES ----------
+def bntx_jobs(folder, out_dir=None):
+    """(.bntx, carpeta de salida) de cada .bntx de `folder` (recursivo), fuera de `out_dir`."""
+    input_dir = Path(folder)
+    out_dir = Path(out_dir) if out_dir else input_dir / "textures"
+    files = sorted(p for p in input_dir.rglob("*.bntx") if out_dir not in p.parents)
+    return [(p, out_dir / p.stem) for p in files]
+
+
+def extract_bntx_safe(bntx_path, out_dir, to_png=False, decoder=None):
+    """extract_bntx, pero un .bntx ilegible cuenta como error en lugar de lanzar."""
+    try:
+        return extract_bntx(bntx_path, out_dir, to_png, decoder)
+    except Exception as e:
+        return [], [(Path(bntx_path).name, f"{type(e).__name__}: {e}")]
+
+
+def flatten_dds_in_textures(textures_dir: Path):
+    """
+    Mueve todos los .dds desde subcarpetas de `textures_dir` a la raíz `textures_dir`.
+    Si existe un archivo con el mismo nombre, crea nombre__N.dds.
+    Luego intenta borrar las subcarpetas vacías.
+    Devuelve (moved_count, collision_count, deleted_dirs).
+    """
+    textures_dir = Path(textures_dir).resolve()
+    moved = 0
+    collisions = 0
+
+    # Mover todos los .dds que NO estén ya en la raíz
+    for dds_path in textures_dir.rglob("*.dds"):
+        if dds_path.parent == textures_dir:
+            continue  # ya está en la raíz
+        target = textures_dir / dds_path.name
+        if target.exists():
+            stem, suffix = target.stem, target.suffix
+            i = 1
+            while True:
+                candidate = textures_dir / f"{stem}__{i}{suffix}"
+                if not candidate.exists():
+                    target = candidate
+                    collisions += 1
+                    break
+                i += 1
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(dds_path), str(target))
+        moved += 1
+
+    # Borrar directorios vacíos (bottom-up)
+    deleted_dirs = 0
+    # Ordenar por profundidad inversa para intentar borrar de abajo hacia arriba
+    dirs = sorted(
+        (p for p in textures_dir.rglob("*") if p.is_dir()),
+        key=lambda p: len(p.parts),
+        reverse=True
+    )
+    for d in dirs:
+        try:
+            d.rmdir()
+            deleted_dirs += 1
+        except OSError:
+            # No está vacío (o permisos), lo dejamos
+            pass
+
+    return moved, collisions, deleted_dirs
+
+
+# ---------- FUNCIONES DE MIRROR ----------
+def mirror_method_1(image_path, png_profile=None):
+    # [izq espejada | izq | der | der espejada], mismo modo que la original
+    try:
+        mirror_file(image_path, variant_path(image_path, '_mirrored_method1'), "halves", png_profile)
+    except Exception as e:
+        raise Exception(f"Method 1 failed: {e}")
+
+def mirror_method_2(image_path, png_profile=None):
+    # [imagen | imagen espejada], mismo modo que la original
+    try:
+        mirror_file(image_path, variant_path(image_path, '_mirrored_method2'), "double", png_profile)
+    except Exception as e:
+        raise Exception(f"Method 2 failed: {e}")
+
+def is_image_file(filename):
+    return any(filename.lower().endswith(ext) for ext in IMAGE_EXTENSIONS)
+
+def delete_mirrored_images(folder):
+    """Borra las variantes de MIRROR_VARIANTS de `folder`. Devuelve cuántas se borraron."""
+    deleted = 0
+    for filename in os.listdir(folder):
+        if any(suffix in filename for suffix, _ in MIRROR_VARIANTS):
+            file_path = os.path.join(folder, filename)
+            try:
+                os.remove(file_path)
+                deleted += 1
+            except Exception as e:
+                print(f"Failed to delete {file_path}: {e}")
+    return deleted
+
+def variant_path(image_path, suffix):
+    """<nombre><sufijo><ext> junto a la original (sólo toca el nombre, no las carpetas)."""
+    stem, ext = os.path.splitext(image_path)
+    return stem + suffix + ext
+
+
+def _write_variant(img, arr, layout, output_path, png_profile):
+    save_image(mirror_image(img, layout, arr), output_path, png_profile)
+
+
+def mirror_folder(directory, png_profile=None, progress=None, workers=MIRROR_WORKERS, cancelled=None):
+    """
+    Escribe las variantes de MIRROR_VARIANTS de cada imagen de `directory`.
+    Cada imagen se decodifica una sola vez; sus variantes se construyen a partir
+    del mismo array y se codifican a la vez en un pool de hilos, mientras se
+    decodifica la siguiente. Los PNG grandes (image_mirror.STREAM_MIN_PIXELS)
+    no se cargan enteros: se leen por bandas y cada banda espejada va directa
+    al codificador, así la memoria de cada hilo depende de la banda y no de la
+    imagen. `progress(hechas, total, nombre)` se llama al terminar cada imagen
+    (desde este hilo); si `cancelled()` devuelve True no se empiezan más imágenes.
+    Devuelve (procesadas, fallidas).
+    """
+    files = [f for f in sorted(os.listdir(directory))
+             if os.path.isfile(os.path.join(directory, f)) and is_image_file(f)
+             and not any(suffix in f for suffix, _ in MIRROR_VARIANTS)]
+    processed = failed = done = 0
+    pending = deque()
+
+    def finish(filename, futures):
+        nonlocal processed, failed, done
+        try:
+            for fut in futures:
+                fut.result()
+            processed += 1
+        except Exception as e:
+            print(f"Error: {filename}: {e}")
+            failed += 1
+        done += 1
+        if progress:
+            progress(done, len(files), filename)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for filename in files:
+            if cancelled and cancelled():
+                break
+            file_path = os.path.join(directory, filename)
+            if filename.lower().endswith(".png") and can_stream(file_path):
+                # PNG grande: un solo trabajo lo lee por bandas y escribe todas las variantes
+                outputs = [(variant_path(file_path, suffix), layout) for suffix, layout in MIRROR_VARIANTS]
+                futures = [pool.submit(mirror_png_stream, file_path, outputs, png_profile)]
+            else:
+                try:
+                    with Image.open(file_path) as img:
+                        img.load()
+                    arr = np.asarray(img)
+                    futures = [pool.submit(_write_variant, img, arr, layout,
+                                           variant_path(file_path, suffix), png_profile)
+                               for suffix, layout in MIRROR_VARIANTS]
+                except Exception as e:
+                    # Error al decodificar: cuenta como fallo de esta imagen, en su turno
+                    futures = [Future()]
+                    futures[0].set_exception(e)
+            pending.append((filename, futures))
+            # Como mucho `workers` imágenes decodificadas esperando a codificarse
+            while len(pending) > max(1, workers // len(MIRROR_VARIANTS)):
+                finish(*pending.popleft())
+        while pending:
+            finish(*pending.popleft())
+    return processed, failed
+
+
+# ---------- FUNCIONES DAE to FBX ----------
+def dae_jobs(folder):
+    """(.dae, .fbx de salida) de cada .dae de `folder`; el .fbx queda al lado."""
+    return [(os.path.join(folder, f), os.path.join(folder, os.path.splitext(f)[0] + ".fbx"))
+            for f in sorted(os.listdir(folder)) if f.lower().endswith(".dae")]
+
+
+def convert_dae_to_fbx(dae_filename, fbx_filename):
+    # Se importa aquí: el resto de operaciones no necesita el FBX SDK instalado
+    import fbx
+
+    sdk_manager = fbx.FbxManager.Create()
+    try:
+        ios = fbx.FbxIOSettings.Create(sdk_manager, fbx.IOSROOT)
+        sdk_manager.SetIOSettings(ios)
+
+        importer = fbx.FbxImporter.Create(sdk_manager, "")
+        if not importer.Initialize(dae_filename, -1, sdk_manager.GetIOSettings()):
+            raise RuntimeError(f"Failed to import {dae_filename}")
+        scene = fbx.FbxScene.Create(sdk_manager, "MyScene")
+        importer.Import(scene)
+        importer.Destroy()
+
+        exporter = fbx.FbxExporter.Create(sdk_manager, "")
+        if not exporter.Initialize(fbx_filename, -1, sdk_manager.GetIOSettings()):
+            raise RuntimeError(f"Failed to export {fbx_filename}")
+        exporter.Export(scene)
+        exporter.Destroy()
+    finally:
+        sdk_manager.Destroy()
+
+
+def convert_dae_safe(dae_filename, fbx_filename):
+    """convert_dae_to_fbx para map_files: devuelve None o el texto del error."""
+    try:
+        convert_dae_to_fbx(dae_filename, fbx_filename)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+# =======================
+#  CLI
+# =======================
+# Cada cmd_* devuelve el resumen (dict serializable); "failed" decide el código de salida.
+
+def cmd_mirror(args):
+    processed, failed = mirror_folder(
+        args.folder, args.png_profile, workers=args.jobs,
+        progress=lambda n, total, name: print(f"[{n}/{total}] {name}", flush=True))
+    return {"processed": processed, "failed": failed}
+
+
+def cmd_delete_mirrors(args):
+    return {"deleted": delete_mirrored_images(args.folder), "failed": 0}
+
+
+def cmd_flatten(args):
+    moved, collisions, deleted_dirs = flatten_dds_in_textures(args.textures_dir)
+    return {"moved": moved, "collisions": collisions, "deleted_dirs": deleted_dirs, "failed": 0}
+
+
+def cmd_bntx(args):
+    out_dir = Path(args.out) if args.out else Path(args.folder) / "textures"
+    work = [(p, out, args.png, args.astc_decoder) for p, out in bntx_jobs(args.folder, out_dir)]
+    written, errors = 0, []
+    for n, (job_args, result) in enumerate(map_files(extract_bntx_safe, work, args.jobs), 1):
+        if isinstance(result, Exception):
+            # El worker murió: cuenta como error de ese .bntx
+            result = [], [(job_args[0].name, f"{type(result).__name__}: {result}")]
+        for name, msg in result[1]:
+            print(f"[FAIL] {name}: {msg}", flush=True)
+        written += len(result[0])
+        errors += result[1]
+        print(f"[{n}/{len(work)}] {job_args[0].name}", flush=True)
+
+    summary = {"bntx": len(work), "textures": written, "failed": len(errors),
+               "errors": [{"name": name, "error": msg} for name, msg in errors]}
+    if not args.no_flatten and out_dir.is_dir():
+        moved, collisions, deleted_dirs = flatten_dds_in_textures(out_dir)
+        summary.update(moved=moved, collisions=collisions, deleted_dirs=deleted_dirs)
+    summary["out"] = str(out_dir)
+    return summary
+
+
+def cmd_dds2png(args):
+    src = Path(args.folder)
+    out = Path(args.out) if args.out else src / "output"
+    if args.texconv:
+        # Ruta existente -> absoluta; si no, se deja tal cual para buscarla en el PATH
+        dsspng.TEXCONV_EXE = Path(args.texconv).resolve() if Path(args.texconv).exists() else Path(args.texconv)
+    totals = dsspng.convert_dds_to_png(src, out, do_mirror=args.mirror, jobs=args.jobs,
+                                       decoder=args.decoder, force=args.force,
+                                       png_profile=args.png_profile)
+    return dict(totals, out=str(out))
+
+
+def cmd_dae2fbx(args):
+    pairs = dae_jobs(args.folder)
+    if pairs:
+        try:
+            import fbx  # noqa: F401  (fallo claro antes de lanzar el pool)
+        except ImportError as e:
+            raise SystemExit(f"dae2fbx necesita el FBX SDK de Python: {e}")
+    converted, errors = 0, []
+    for n, ((dae, fbx_path), error) in enumerate(map_files(convert_dae_safe, pairs, args.jobs), 1):
+        if isinstance(error, Exception):
+            error = f"{type(error).__name__}: {error}"
+        if error:
+            print(f"Failed: {os.path.basename(dae)}: {error}", flush=True)
+            errors.append({"name": os.path.basename(dae), "error": error})
+        else:
+            converted += 1
+        print(f"[{n}/{len(pairs)}] {os.path.basename(dae)}", flush=True)
+    return {"dae": len(pairs), "converted": converted, "failed": len(errors), "errors": errors}
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Procesos/hilos en paralelo (por defecto: nº de CPUs; 1 = en serie)")
+    common.add_argument("--json", action="store_true",
+                        help="Escribe el resumen como JSON en stdout (los logs van a stderr)")
+
+    parser = argparse.ArgumentParser(prog="transform-tool",
+                                     description="Operaciones del Transform Tool sin GUI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("mirror", parents=[common], help="Escribe las variantes _mirrored_method1/2 de cada imagen")
+    p.add_argument("folder")
+    p.add_argument("--png-profile", choices=tuple(PNG_PROFILES), default=DEFAULT_PROFILE,
+                   help="Compresión de los PNG: fast, balanced o archival")
+    p.set_defaults(func=cmd_mirror)
+
+    p = sub.add_parser("delete-mirrors", parents=[common], help="Borra las variantes espejadas")
+    p.add_argument("folder")
+    p.set_defaults(func=cmd_delete_mirrors)
+
+    p = sub.add_parser("flatten", parents=[common], help="Sube los .dds de las subcarpetas a la raíz")
+    p.add_argument("textures_dir")
+    p.set_defaults(func=cmd_flatten)
+
+    p = sub.add_parser("bntx", parents=[common], help="Extrae los .bntx a <carpeta>/textures y lo aplana")
+    p.add_argument("folder")
+    p.add_argument("--out", default="", help="Carpeta de salida (por defecto: <carpeta>/textures)")
+    p.add_argument("--png", action="store_true", help="Decodificar en proceso y escribir PNG directamente")
+    p.add_argument("--astc-decoder", choices=("auto", "builtin", "astcenc"), default=None,
+                   help="Backend ASTC (auto: astcenc si está en el PATH)")
+    p.add_argument("--no-flatten", action="store_true", help="Deja una subcarpeta por .bntx")
+    p.set_defaults(func=cmd_bntx)
+
+    p = sub.add_parser("dds2png", parents=[common], help="Convierte los .dds a PNG (en proceso o vía texconv)")
+    p.add_argument("folder")
+    p.add_argument("--out", default="", help="Carpeta de salida (por defecto: <carpeta>/output)")
+    p.add_argument("--mirror", action="store_true", help="Aplica el mirroring de dsspng a las salidas")
+    p.add_argument("--texconv", default="", help="Ruta a texconv (por defecto: dependencies/texconv.exe)")
+    p.add_argument("--decoder", choices=("auto", "builtin", "texconv"), default=dsspng.DDS_DECODER,
+                   help="auto: BC1-BC5 en proceso y texconv para el resto (por defecto)")
+    p.add_argument("--force", action="store_true", help="Reconvierte todo aunque el manifest diga que no hay cambios")
+    p.add_argument("--png-profile", choices=tuple(PNG_PROFILES), default=dsspng.PNG_PROFILE,
+                   help="Compresión de los PNG: fast, balanced o archival")
+    p.set_defaults(func=cmd_dds2png)
+
+    p = sub.add_parser("dae2fbx", parents=[common], help="Convierte los .dae a .fbx (necesita el FBX SDK)")
+    p.add_argument("folder")
+    p.set_defaults(func=cmd_dae2fbx)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.jobs = max(1, args.jobs)
+    if os.name != "nt":
+        # Cancelar en la GUI hace terminate(): como SystemExit, corren los finally
+        # (p.ej. dds2png guarda su manifest). En Windows terminate() no se puede atrapar.
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    out = sys.stdout
+    if args.json:
+        # stdout queda sólo para el JSON: todo lo demás (también lo que imprimen
+        # los procesos del pool, que heredan el descriptor 1) va a stderr
+        sys.stdout.flush()
+        out = os.fdopen(os.dup(1), "w")
+        os.dup2(2, 1)
+
+    summary = dict(command=args.command, **args.func(args))
+
+    if args.json:
+        sys.stdout.flush()
+        json.dump(summary, out, indent=2, default=str)
+        out.write("\n")
+        out.flush()
+    else:
+        print(f"{args.command}: " + ", ".join(f"{k}={v}" for k, v in summary.items()
+                                              if k not in ("command", "errors")))
+    return 1 if summary.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
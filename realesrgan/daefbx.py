@@ -1,10 +1,10 @@
 import os
-import tkinter as tk
-from tkinter import filedialog
 from PIL import Image, ImageOps
-import fbx
             
 def convert_dae_to_fbx(dae_filename, fbx_filename):
+    # Imported here so this module can be imported without the FBX SDK
+    import fbx
+
     # Create an SDK manager
     sdk_manager = fbx.FbxManager.Create()
     
@@ -53,13 +53,17 @@ def process_directory(directory):
             print(f"Converted '{full_path}' to '{fbx_path}'")
 
 def select_directory():
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     folder_selected = filedialog.askdirectory()
     return folder_selected
 
-directory = select_directory()
-if directory:
-    process_directory(directory)
-else:
-    print("No directory selected, exiting.")
\ No newline at end of file
+if __name__ == "__main__":
+    directory = select_directory()
+    if directory:
+        process_directory(directory)
+    else:
+        print("No directory selected, exiting.")
@@ -1,30 +1,34 @@
+import importlib.util
 import os
+import sys
 import subprocess
-import tkinter as tk
-from tkinter import filedialog
-from PIL import Image, ImageOps
 
-def mirror_image(image_path):
-    with Image.open(image_path) as img:
-        width, height = img.size
+from image_io import save_png
+from image_mirror import mirror_file
+
 
-        # Crop the left and right halves
-        left_half = img.crop((0, 0, width // 2, height))
-        right_half = img.crop((width // 2, 0, width, height))
+def _load_dds_decode():
+    """
+    The in-process BC1-BC5 decoder shared with the Transform Tool, loaded by
+    path: putting "Transform Tool" on sys.path would let its own dsspng.py
+    shadow this one (or the other way round).
+    """
+    if "dds_decode" in sys.modules:
+        return sys.modules["dds_decode"]
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Transform Tool", "dds_decode.py")
+    spec = importlib.util.spec_from_file_location("dds_decode", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules["dds_decode"] = module
+    return module
 
-        # Mirror the halves
-        left_half_mirrored = ImageOps.mirror(left_half)
-        right_half_mirrored = ImageOps.mirror(right_half)
 
-        # Create a new image with double the width
-        new_image = Image.new('RGB', (width * 2, height))
-        new_image.paste(left_half, (0, 0))
-        new_image.paste(right_half_mirrored, (width // 2, 0))
-        new_image.paste(right_half, (width, 0))
-        new_image.paste(left_half_mirrored, (width + width // 2, 0))
+_dds_decode = _load_dds_decode()
+bc5_to_rgba, decode_dds = _dds_decode.bc5_to_rgba, _dds_decode.decode_dds
 
-        # Save the modified image
-        new_image.save(image_path)
+def mirror_image(image_path):
+    # [left | right mirrored | right | left mirrored], in place, same mode as the source
+    mirror_file(image_path, image_path, "halves_swapped")
 
 def convert_dds_to_png(source_dir, output_dir):
     if not os.path.exists(output_dir):
@@ -36,6 +40,17 @@ def convert_dds_to_png(source_dir, output_dir):
                 dds_path = os.path.join(root, file)
                 png_path = os.path.join(output_dir, os.path.splitext(file)[0] + '.png')
 
+                # BC1-BC5: decode in-process, no ImageMagick subprocess
+                try:
+                    arr, header = decode_dds(dds_path)
+                    if header["format"] == "BC5":
+                        arr = bc5_to_rgba(arr, fill_blue=255)
+                    save_png(arr, png_path)
+                    continue
+                except Exception as e:
+                    # Unsupported format (BC6H/BC7...) or a bad file: say why, then try ImageMagick
+                    print(f"Failed to decode {dds_path} in-process: {e}; falling back to ImageMagick")
+
                 # Convert using ImageMagick
                 command = f"magick convert \"{dds_path}\" \"{png_path}\""
                 try:
@@ -46,14 +61,18 @@ def convert_dds_to_png(source_dir, output_dir):
                     print(f"Failed to convert {dds_path}: {e}")
 
 def select_directory():
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     folder_selected = filedialog.askdirectory()
     return folder_selected
 
-source_directory = select_directory()
-if source_directory:
-    output_directory = os.path.join(source_directory, "output")
-    convert_dds_to_png(source_directory, output_directory)
-else:
-    print("No directory selected, exiting.")
+if __name__ == "__main__":
+    source_directory = select_directory()
+    if source_directory:
+        output_directory = os.path.join(source_directory, "output")
+        convert_dds_to_png(source_directory, output_directory)
+    else:
+        print("No directory selected, exiting.")
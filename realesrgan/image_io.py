@@ -0,0 +1,408 @@
+"""
+PNG writing shared by every image writer.
+
+Encoder settings come from named profiles (PNG_PROFILES): fast for
+intermediates and previews, balanced for everyday output, archival for final
+deliverables. save_png writes PIL images and arrays through Pillow;
+PNGStreamWriter / write_png write band by band: each band of rows is filtered
+with NumPy (the same per-row adaptive filter choice libpng makes) and fed to a
+zlib stream, so an output backed by a memory-mapped array never has to be
+loaded into RAM as a whole. PNGBandReader is the reading counterpart: it
+yields a PNG's rows band by band without decoding the whole image.
+
+Run this module to benchmark the profiles: python image_io.py [PNG files or folders]
+"""
+import io
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color type for each channel count: L, LA, RGB, RGBA
+COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+# Rows filtered and compressed at a time
+BAND_ROWS = 256
+
+# IDAT chunks are flushed once this much compressed data is pending
+IDAT_CHUNK_BYTES = 1 << 20
+
+# PNG encoder profiles:
+#   compress_level, optimize, compress_type: Pillow save options (compress_type
+#       is the zlib strategy)
+#   filters: PNG filter types tried per row by the streaming writer
+PNG_PROFILES = {
+    # Intermediates and previews: cheapest deflate, run-length matches only, Sub filter
+    "fast": {"compress_level": 1, "compress_type": zlib.Z_RLE, "filters": (1,)},
+    # Pillow's default settings
+    "balanced": {"compress_level": 6, "filters": (0, 1, 2, 3, 4)},
+    # Final deliverables: maximum compression
+    "archival": {"compress_level": 9, "optimize": True, "filters": (0, 1, 2, 3, 4)},
+}
+DEFAULT_PROFILE = "balanced"
+
+# Profile for files that are read back and deleted within the same run
+INTERMEDIATE_PROFILE = "fast"
+
+
+def png_profile(profile=None):
+    """Settings dict of a named profile (None = DEFAULT_PROFILE); ValueError if unknown."""
+    name = profile or DEFAULT_PROFILE
+    if name not in PNG_PROFILES:
+        raise ValueError(f"unknown PNG profile {name!r}, expected one of {', '.join(PNG_PROFILES)}")
+    return PNG_PROFILES[name]
+
+
+def save_options(profile=None):
+    """Keyword arguments for Image.save(path, "PNG", ...) under a profile."""
+    settings = png_profile(profile)
+    return {key: settings[key] for key in ("compress_level", "optimize", "compress_type") if key in settings}
+
+
+def save_png(image, path, profile=None):
+    """
+    Save a PIL image, or an (H, W) / (H, W, C) uint8 array, as PNG with a named profile.
+    """
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    image.save(path, "PNG", **save_options(profile))
+
+
+def save_image(image, path, profile=None):
+    """save_png for .png paths; other extensions are saved with Pillow's defaults for their format."""
+    if str(path).lower().endswith(".png"):
+        save_png(image, path, profile)
+    else:
+        (Image.fromarray(image) if isinstance(image, np.ndarray) else image).save(path)
+
+
+def _chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    return np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+
+
+def filter_rows(rows, prev_row, bpp, filters=(0, 1, 2, 3, 4)):
+    """
+    Filter a band of raw rows for PNG.
+
+    Each row gets the filter with the smallest sum of absolute (signed) residuals,
+    the heuristic libpng uses.
+
+    Args:
+        rows (ndarray): (n, stride) uint8 raw scanlines
+        prev_row (ndarray): Raw scanline above the band, or None for the first band
+        bpp (int): Bytes per pixel
+        filters (tuple): PNG filter types to try
+
+    Returns:
+        ndarray: (n, stride + 1) uint8, filter type byte followed by the filtered row
+    """
+    x = rows.astype(np.int16)
+    up = np.empty_like(x)
+    up[0] = 0 if prev_row is None else prev_row
+    up[1:] = x[:-1]
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    up_left = np.zeros_like(x)
+    up_left[:, bpp:] = up[:, :-bpp]
+
+    predictors = {
+        0: 0,
+        1: left,
+        2: up,
+        3: (left + up) >> 1,
+        4: _paeth(left, up, up_left) if 4 in filters else 0,
+    }
+    candidates = [((x - predictors[f]) & 0xFF).astype(np.uint8) for f in filters]
+    if len(candidates) == 1:
+        choice = np.zeros(len(rows), dtype=np.intp)
+        stacked = candidates[0][None]
+    else:
+        stacked = np.stack(candidates)
+        cost = np.abs(stacked.view(np.int8).astype(np.int32)).sum(axis=2)
+        choice = cost.argmin(axis=0)
+
+    out = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = np.asarray(filters, dtype=np.uint8)[choice]
+    out[:, 1:] = stacked[choice, np.arange(len(rows))]
+    return out
+
+
+class PNGStreamWriter:
+    """
+    Write an 8-bit PNG incrementally:
+
+        with PNGStreamWriter(path, width, height, channels) as png:
+            for band in bands:
+                png.write_rows(band)
+    """
+
+    def __init__(self, path, width, height, channels, profile=None):
+        if channels not in COLOR_TYPES:
+            raise ValueError(f"unsupported channel count: {channels}")
+        settings = png_profile(profile)
+        self.path = path
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.filters = settings["filters"]
+        self.rows_written = 0
+        self._prev = None
+        self._pending = []
+        self._pending_size = 0
+        self._compressor = zlib.compressobj(settings["compress_level"], zlib.DEFLATED, zlib.MAX_WBITS,
+                                            9 if settings.get("optimize") else 8,
+                                            settings.get("compress_type", zlib.Z_DEFAULT_STRATEGY))
+        self._file = open(path, "wb")
+        ihdr = struct.pack(">IIBBBBB", width, height, 8, COLOR_TYPES[channels], 0, 0, 0)
+        self._file.write(PNG_SIGNATURE + _chunk(b"IHDR", ihdr))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+    def _emit(self, data, force=False):
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= IDAT_CHUNK_BYTES or (force and self._pending):
+            self._file.write(_chunk(b"IDAT", b"".join(self._pending)))
+            self._pending, self._pending_size = [], 0
+
+    def write_rows(self, rows):
+        """Append rows: an (n, width) or (n, width, channels) uint8 array."""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8).reshape(len(rows), self.width * self.channels)
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError("more rows than the image height")
+        filtered = filter_rows(rows, self._prev, self.channels, self.filters)
+        self._prev = rows[-1].astype(np.int16)
+        self.rows_written += len(rows)
+        self._emit(self._compressor.compress(filtered))
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.rows_written != self.height:
+            self._file.close()
+            raise ValueError(f"wrote {self.rows_written} of {self.height} rows")
+        self._emit(self._compressor.flush(), force=True)
+        self._file.write(_chunk(b"IEND", b""))
+        self._file.close()
+
+
+def write_png(path, arr, band_rows=BAND_ROWS, profile=None):
+    """
+    Write an (H, W) or (H, W, C) uint8 array (in memory or memory-mapped) as PNG,
+    reading it band_rows rows at a time.
+    """
+    height, width = arr.shape[:2]
+    channels = 1 if arr.ndim == 2 else arr.shape[2]
+    with PNGStreamWriter(path, width, height, channels, profile) as png:
+        for y in range(0, height, band_rows):
+            png.write_rows(arr[y:y + band_rows])
+
+
+class PNGBandReader:
+    """
+    Read an 8-bit, non-interlaced L/LA/RGB/RGBA PNG band by band:
+
+        with PNGBandReader(path) as png:
+            for band in png.bands():     # (n, width[, channels]) uint8
+                ...
+
+    Only one band of scanlines is inflated at a time. Pillow undoes the row
+    filters: each band's filtered rows, after the previous decoded row, are
+    wrapped in a small PNG with a stored (uncompressed) deflate stream.
+    Raises ValueError for PNGs it cannot stream (palette, 16-bit, interlaced,
+    tRNS colour key); load those whole with Pillow instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._read_header()
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _read_chunk_header(self):
+        head = self._file.read(8)
+        if len(head) < 8:
+            raise ValueError(f"{self.path}: truncated PNG")
+        length, tag = struct.unpack(">I4s", head)
+        return length, tag
+
+    def _read_header(self):
+        if self._file.read(8) != PNG_SIGNATURE:
+            raise ValueError(f"{self.path}: not a PNG file")
+        length, tag = self._read_chunk_header()
+        if tag != b"IHDR":
+            raise ValueError(f"{self.path}: IHDR missing")
+        ihdr = self._file.read(length)
+        self._file.read(4)
+        self.width, self.height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", ihdr)
+        channels = {v: k for k, v in COLOR_TYPES.items()}.get(color_type)
+        if depth != 8 or channels is None or interlace:
+            raise ValueError(f"{self.path}: only 8-bit non-interlaced L/LA/RGB/RGBA PNGs can be streamed")
+        self.channels = channels
+        self._ihdr = ihdr
+        # Skip ancillary chunks up to the first IDAT
+        while True:
+            length, tag = self._read_chunk_header()
+            if tag == b"IDAT":
+                self._idat_left = length
+                return
+            if tag == b"tRNS":
+                raise ValueError(f"{self.path}: tRNS colour key cannot be streamed")
+            if tag == b"IEND":
+                raise ValueError(f"{self.path}: no image data")
+            self._file.seek(length + 4, 1)
+
+    def _compressed(self, size=IDAT_CHUNK_BYTES):
+        """Next piece of the concatenated IDAT data (b"" once it is exhausted)."""
+        while self._idat_left == 0:
+            self._file.read(4)
+            length, tag = self._read_chunk_header()
+            if tag != b"IDAT":
+                return b""
+            self._idat_left = length
+        data = self._file.read(min(size, self._idat_left))
+        if not data:
+            raise ValueError(f"{self.path}: truncated PNG")
+        self._idat_left -= len(data)
+        return data
+
+    def _unfilter(self, filtered, rows, prev):
+        """Decoded (rows, width[, channels]) array of `rows` filtered scanlines following row `prev`."""
+        if prev is not None:
+            filtered = b"\x00" + prev + filtered
+            rows += 1
+        ihdr = struct.pack(">II", self.width, rows) + self._ihdr[8:]
+        png = (PNG_SIGNATURE + _chunk(b"IHDR", ihdr) + _chunk(b"IDAT", zlib.compress(filtered, 0))
+               + _chunk(b"IEND", b""))
+        with Image.open(io.BytesIO(png)) as img:
+            band = np.asarray(img)
+        return band[1:] if prev is not None else band
+
+    def bands(self, band_rows=BAND_ROWS):
+        """Yield the image top to bottom, band_rows rows at a time."""
+        stride = self.width * self.channels + 1
+        inflater = zlib.decompressobj()
+        prev = None
+        for y in range(0, self.height, band_rows):
+            rows = min(band_rows, self.height - y)
+            need = rows * stride
+            raw = bytearray()
+            while len(raw) < need:
+                data = inflater.unconsumed_tail or self._compressed()
+                if not data:
+                    raise ValueError(f"{self.path}: image data ends at row {y + len(raw) // stride}")
+                raw += inflater.decompress(data, need - len(raw))
+            band = self._unfilter(bytes(raw), rows, prev)
+            prev = band[-1].tobytes()
+            yield band
+
+
+def _sample_texture(size=1024):
+    """Synthetic stand-in when no fixtures are given: smooth gradients, noise and an alpha cutout."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:size, 0:size]
+    rgb = np.stack([np.sin(x / 40.0) * 60 + 128, np.cos(y / 55.0) * 60 + 128, (x + y) % 256 * 0.5 + 64], -1)
+    rgb += rng.normal(0, 1.5, rgb.shape)
+    alpha = np.where(np.hypot(x - size / 2, y - size / 2) < size * 0.4, 255, 0)
+    return np.dstack([rgb.clip(0, 255), alpha]).astype(np.uint8)
+
+
+def benchmark(images, repeat=1):
+    """
+    Encode every image with every profile, through Pillow (save_png) and the
+    streaming writer (write_png), in a temporary folder.
+
+    Args:
+        images (list): (name, uint8 array) pairs
+        repeat (int): Encodes per image and profile; the fastest one is kept
+
+    Returns:
+        list: One dict per (writer, profile) with seconds and bytes summed over the images
+    """
+    import os
+    import tempfile
+    import time
+
+    writers = {
+        "pillow": lambda path, arr, profile: save_png(arr, path, profile),
+        "stream": lambda path, arr, profile: write_png(path, arr, profile=profile),
+    }
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.png")
+        for writer, write in writers.items():
+            for profile in PNG_PROFILES:
+                seconds = size = 0
+                for _, arr in images:
+                    best = None
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        write(path, arr, profile)
+                        elapsed = time.perf_counter() - start
+                        best = elapsed if best is None else min(best, elapsed)
+                    seconds += best
+                    size += os.path.getsize(path)
+                rows.append({"writer": writer, "profile": profile, "seconds": seconds, "bytes": size})
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    import os
+
+    parser = argparse.ArgumentParser(description="Encode time vs size of the PNG profiles.")
+    parser.add_argument("inputs", nargs="*", help="PNG files or folders (default: a synthetic 1024px texture)")
+    parser.add_argument("--repeat", type=int, default=3, help="Encodes per image and profile (fastest kept)")
+    args = parser.parse_args()
+
+    paths = []
+    for item in args.inputs:
+        if os.path.isdir(item):
+            paths += sorted(glob.glob(os.path.join(item, "**", "*.png"), recursive=True))
+        else:
+            paths.append(item)
+    images = []
+    for path in paths:
+        with Image.open(path) as img:
+            if img.mode not in ("L", "LA", "RGB", "RGBA"):
+                img = img.convert("RGBA")
+            images.append((os.path.basename(path), np.asarray(img)))
+    if not images:
+        images = [("synthetic", _sample_texture())]
+
+    raw = sum(arr.nbytes for _, arr in images)
+    print(f"{len(images)} image(s), {raw / 2**20:.1f} MB raw")
+    print(f"{'writer':<8} {'profile':<9} {'seconds':>8} {'MB':>8} {'ratio':>6}")
+    for row in benchmark(images, args.repeat):
+        print(f"{row['writer']:<8} {row['profile']:<9} {row['seconds']:>8.3f} "
+              f"{row['bytes'] / 2**20:>8.2f} {row['bytes'] / raw:>6.1%}")
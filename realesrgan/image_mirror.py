@@ -0,0 +1,127 @@
+"""
+Mirror layouts shared by the mirror scripts, dsspng and the Transform Tool.
+
+Each layout is a list of source column indices, so the output is produced by a
+single np.take over the image array (one allocation, no crop/paste canvas).
+The image mode is kept: alpha, greyscale and palettes survive the mirror.
+
+The image is split into L = the first width // 2 columns and R = the rest
+(one column wider for odd widths); the output is always twice as wide:
+
+    halves          [L mirrored | L | R | R mirrored]
+    halves_swapped  [L | R mirrored | R | L mirrored]
+    double          [image | image mirrored]
+
+Large PNGs are mirrored as a stream instead (mirror_png_stream): the source is
+read in bands of rows and each mirrored band goes straight to the PNG
+encoder, so memory is bounded by the band size rather than the image size.
+"""
+import os
+from contextlib import ExitStack
+
+import numpy as np
+from PIL import Image
+
+from image_io import PNGBandReader, PNGStreamWriter, save_image
+
+MIRROR_LAYOUTS = ("halves", "halves_swapped", "double")
+
+# PNG sources with at least this many pixels are streamed by mirror_file
+STREAM_MIN_PIXELS = 4096 * 4096
+
+# Mirrored output bytes per streamed band (the row filter works on a few
+# int16 copies of the band, so this dominates peak memory)
+STREAM_BAND_BYTES = 4 << 20
+
+
+def mirror_columns(width, layout="halves"):
+    """Source column index of every output column of a layout."""
+    half = width // 2
+    left = np.arange(half)
+    right = np.arange(half, width)
+    if layout == "halves":
+        parts = (left[::-1], left, right, right[::-1])
+    elif layout == "halves_swapped":
+        parts = (left, right[::-1], right, left[::-1])
+    elif layout == "double":
+        parts = (np.arange(width), np.arange(width)[::-1])
+    else:
+        raise ValueError(f"unknown mirror layout {layout!r}, expected one of {', '.join(MIRROR_LAYOUTS)}")
+    return np.concatenate(parts)
+
+
+def mirror_array(arr, layout="halves"):
+    """Mirror an (H, W) or (H, W, C) array of any dtype into a new (H, 2W[, C]) array."""
+    return np.take(arr, mirror_columns(arr.shape[1], layout), axis=1)
+
+
+def mirror_image(image, layout="halves", arr=None):
+    """
+    Mirror a PIL image into a new image of the same mode (palette and transparency included).
+    Pass arr = np.asarray(image) to build several layouts from one copy of the pixels.
+    """
+    out = mirror_array(np.asarray(image) if arr is None else arr, layout)
+    if image.mode == "1":
+        return Image.fromarray(out)
+    mirrored = Image.frombuffer(image.mode, (out.shape[1], out.shape[0]), out, "raw", image.mode, 0, 1)
+    if image.mode in ("P", "PA"):
+        mirrored.putpalette(image.getpalette())
+    if "transparency" in image.info:
+        mirrored.info["transparency"] = image.info["transparency"]
+    return mirrored
+
+
+def can_stream(src, min_pixels=STREAM_MIN_PIXELS):
+    """True if src is a PNG that PNGBandReader can stream and has at least min_pixels pixels."""
+    try:
+        with PNGBandReader(src) as png:
+            return png.width * png.height >= min_pixels
+    except (OSError, ValueError):
+        return False
+
+
+def mirror_png_stream(src, outputs, profile=None, band_rows=None):
+    """
+    Mirror a PNG band by band into one or more (dst, layout) PNG outputs, from a
+    single read of src. Each output is written next to its destination and moved
+    into place at the end, so dst may be src. ValueError if src cannot be streamed.
+    band_rows defaults to STREAM_BAND_BYTES worth of output rows.
+    """
+    with PNGBandReader(src) as png:
+        if band_rows is None:
+            band_rows = max(1, STREAM_BAND_BYTES // (2 * png.width * png.channels))
+        columns = [mirror_columns(png.width, layout) for _, layout in outputs]
+        temps = []
+        try:
+            with ExitStack() as stack:
+                writers = []
+                for dst, _ in outputs:
+                    tmp = f"{os.fspath(dst)}.{os.getpid()}.tmp"
+                    temps.append(tmp)
+                    writers.append(stack.enter_context(
+                        PNGStreamWriter(tmp, 2 * png.width, png.height, png.channels, profile)))
+                for band in png.bands(band_rows):
+                    for writer, cols in zip(writers, columns):
+                        writer.write_rows(np.take(band, cols, axis=1))
+        except BaseException:
+            for tmp in temps:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            raise
+    for (dst, _), tmp in zip(outputs, temps):
+        os.replace(tmp, dst)
+
+
+def mirror_file(src, dst, layout="halves", profile=None, stream=None):
+    """
+    Mirror the image at src and write it to dst (may be src); PNGs are encoded with an image_io profile.
+    stream: None streams PNG sources of STREAM_MIN_PIXELS or more, True streams any PNG it can, False never.
+    """
+    if stream is not False and str(dst).lower().endswith(".png") \
+            and can_stream(src, 0 if stream else STREAM_MIN_PIXELS):
+        mirror_png_stream(src, [(dst, layout)], profile)
+        return
+    with Image.open(src) as img:
+        img.load()
+        mirrored = mirror_image(img, layout)
+    save_image(mirrored, dst, profile)
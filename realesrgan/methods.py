@@ -1,89 +1,696 @@
 import os
-from os import listdir
-from os.path import isfile, join, dirname
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os.path import dirname
 
-def process_anime_upscale(files_list, input_dir):
+import numpy as np
+from PIL import Image
+
+from .image_io import INTERMEDIATE_PROFILE, save_png, write_png
+from .upscale_cache import UpscaleCache
+
+EXE_NAME = "realesrgan-ncnn-vulkan.exe"
+
+# Set this environment variable to run a different executable (e.g. a stub
+# script when testing on Linux)
+EXE_ENV_VAR = "REALESRGAN_EXE"
+
+# Number of Real-ESRGAN processes running at once. The GPU work is serialised
+# by the driver anyway; a small pool lets one process decode/encode images and
+# load the model while another one is on the GPU.
+MAX_WORKERS = 2
+
+# Extra command-line arguments for each upscaling mode
+MODEL_ARGS = {
+    "regular": [],
+    "anime": ["-n", "realesrgan-x4plus-anime"],
+    "regular_x2": ["-s", "2"],
+    "anime_x2": ["-n", "realesr-animevideov3-x2", "-s", "2"],
+}
+
+# Output scale of each mode
+MODEL_SCALES = {"regular": 4, "anime": 4, "regular_x2": 2, "anime_x2": 2}
+
+# Network each mode runs (the exe's default is realesrgan-x4plus), part of the cache key
+MODEL_NAMES = {
+    "regular": "realesrgan-x4plus",
+    "anime": "realesrgan-x4plus-anime",
+    "regular_x2": "realesrgan-x4plus",
+    "anime_x2": "realesr-animevideov3-x2",
+}
+
+# Results are reused from this cache instead of running the exe again
+# (see upscale_cache; location from $REALESRGAN_CACHE_DIR). None disables it.
+# Used by upscale_jobs callers that ask for it (the Process Images operator);
+# the process_* wrappers only use it when given cache=None.
+UPSCALE_CACHE = UpscaleCache()
+
+UPSCALE_EXTENSIONS = ('.jpg', '.png')
+
+# Folder mode: stage all images into one temporary folder and run the exe once
+# per model, so the network is loaded once per batch instead of once per image
+BATCH_MODE = True
+
+# How often a folder-mode run checks for finished outputs to report (seconds)
+BATCH_POLL_SECONDS = 0.25
+
+# Last 12 bytes of every complete PNG (the IEND chunk)
+PNG_END = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+# Tiled mode: images whose longest side exceeds the tile size are split into
+# overlapping tiles, upscaled as one batch and feathered back together into a
+# memory-mapped output. 0 disables tiling.
+TILE_SIZE = 0
+TILE_OVERLAP = 32
+
+# Smaller tiles are raised to this; the overlap is kept below half a tile so
+# the tile count stays close to (side / tile_size)**2
+MIN_TILE_SIZE = 64
+
+
+class JobControl:
+    """
+    Cancellation shared by a running upscale and whoever started it (e.g. a
+    modal operator): cancel() keeps queued jobs from starting and terminates
+    the Real-ESRGAN processes that are running.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._procs = set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            procs = list(self._procs)
+        for proc in procs:
+            try:
+                proc.terminate()
+            except OSError:
+                pass
+
+    def register(self, proc):
+        """Track a started process; False (process not tracked) if already cancelled."""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._procs.add(proc)
+            return True
+
+    def unregister(self, proc):
+        with self._lock:
+            self._procs.discard(proc)
+
+
+def get_exe_path():
+    """
+    Path of the Real-ESRGAN executable: $REALESRGAN_EXE if set, otherwise the
+    exe shipped next to this file.
+    """
+    return os.environ.get(EXE_ENV_VAR) or os.path.join(dirname(os.path.abspath(__file__)), EXE_NAME)
+
+
+def model_files(mode, exe_path=None):
+    """Exe and network files (models/<name>.param/.bin next to it) a mode's results depend on."""
+    exe_path = exe_path or get_exe_path()
+    models = os.path.join(dirname(os.path.abspath(exe_path)), "models")
+    name = MODEL_NAMES[mode]
+    return [exe_path, os.path.join(models, f"{name}.param"), os.path.join(models, f"{name}.bin")]
+
+
+def collect_upscale_jobs(files_list, input_dir):
+    """
+    Build the (input_path, output_path) pairs for the images in files_list.
+    Every image is written back as {name}.png next to the original.
+    """
+    jobs = []
+    for f in files_list:
+        name, ext = os.path.splitext(f)
+        if ext.lower() in UPSCALE_EXTENSIONS:
+            jobs.append((os.path.join(input_dir, f), os.path.join(input_dir, f"{name}.png")))
+    return jobs
+
+
+def build_command(exe_path, input_path, output_path, model_args):
+    """Argument list for one Real-ESRGAN invocation (no shell involved)."""
+    return [exe_path, *model_args, "-i", input_path, "-o", output_path]
+
+
+def run_job(command, cwd=None, control=None):
+    """
+    Run one Real-ESRGAN process and wait for it. With a JobControl the process
+    is not started once cancelled, and is terminated if cancelled while running.
+
+    Returns:
+        dict: command, returncode, seconds, the captured console output and
+              cancelled (True if the job was stopped by the control)
+    """
+    start = time.perf_counter()
+    if control is not None and control.cancelled:
+        return {"command": command, "returncode": -1, "seconds": 0.0, "output": "cancelled", "cancelled": True}
+    try:
+        proc = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, errors="replace")
+        if control is not None and not control.register(proc):
+            proc.terminate()
+        try:
+            output = proc.communicate()[0]
+        finally:
+            if control is not None:
+                control.unregister(proc)
+        returncode = proc.returncode
+    except OSError as e:
+        returncode, output = -1, str(e)
+    return {
+        "command": command,
+        "returncode": returncode,
+        "seconds": time.perf_counter() - start,
+        "output": output,
+        "cancelled": returncode != 0 and control is not None and control.cancelled,
+    }
+
+
+def run_upscale_jobs(jobs, model_args, max_workers=None, exe_path=None, control=None, on_result=None):
+    """
+    Run Real-ESRGAN over (input_path, output_path) pairs on a bounded pool.
+
+    Jobs that write the same output (a.jpg and a.png both become a.png) run one
+    after the other in list order, like the old serial loop.
+
+    Args:
+        jobs (list): (input_path, output_path) pairs
+        model_args (list): Extra arguments, see MODEL_ARGS
+        max_workers (int): Processes running at once (default MAX_WORKERS)
+        exe_path (str): Executable to run (default get_exe_path())
+        control (JobControl): Cancels the jobs still queued or running
+        on_result (callable): Called as on_result(index, result) from the worker
+                              thread as soon as each job finishes
+
+    Returns:
+        list: One result dict per job (see run_job) plus input and output_path, in job order
+    """
+    exe_path = exe_path or get_exe_path()
+    cwd = dirname(exe_path) or None
+
+    chains = {}
+    for index, (inp, outp) in enumerate(jobs):
+        chains.setdefault(os.path.normcase(os.path.abspath(outp)), []).append((index, inp, outp))
+
+    def run_chain(chain):
+        results = []
+        for index, inp, outp in chain:
+            result = run_job(build_command(exe_path, inp, outp, model_args), cwd, control)
+            result.update(index=index, input=inp, output_path=outp)
+            if on_result is not None:
+                on_result(index, result)
+            status = "ok" if result["returncode"] == 0 else f"FAILED (exit {result['returncode']})"
+            print(f"[{result['seconds']:.1f}s] {os.path.basename(inp)} -> {os.path.basename(outp)}: {status}")
+            if result["returncode"] != 0 and result["output"]:
+                print(result["output"].strip()[-500:])
+            results.append(result)
+        return results
+
+    results = [None] * len(jobs)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers or MAX_WORKERS)) as pool:
+        for chain_results in pool.map(run_chain, chains.values()):
+            for result in chain_results:
+                results[result["index"]] = result
+    return results
+
+
+def link_file(src, dst):
+    """Hardlink src to dst, or symlink it if hardlinks are not possible. Returns False if neither works."""
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dst)
+        return True
+    except OSError:
+        return False
+
+
+def batch_rounds(jobs):
+    """
+    Split jobs into rounds with unique outputs (a.jpg and a.png both write a.png):
+    round k holds the k-th job of each output, so list order is kept.
+    """
+    seen = {}
+    rounds = []
+    for index, (inp, outp) in enumerate(jobs):
+        key = os.path.normcase(os.path.abspath(outp))
+        k = seen.get(key, 0)
+        seen[key] = k + 1
+        if k == len(rounds):
+            rounds.append([])
+        rounds[k].append((index, inp, outp))
+    return rounds
+
+
+def png_complete(path):
+    """True once path is a PNG whose IEND chunk has been written, i.e. the exe is done with it."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(-len(PNG_END), os.SEEK_END)
+            return f.read() == PNG_END
+    except OSError:
+        return False
+
+
+def run_folder_batch(batch, model_args, exe_path, staging_root, control=None, on_result=None):
+    """
+    Run one round of jobs with a single invocation in folder mode.
+
+    The inputs are linked (not copied) into a temporary folder under staging_root
+    as <index><ext> and the exe writes <index>.png to a second folder. While it
+    runs, the output folder is polled: each output whose PNG is complete is moved
+    over its real output path and reported through on_result right away. Outputs
+    still incomplete when a cancelled exe is terminated are discarded.
+
+    Returns:
+        list: (index, result dict) for every job in the round
+    """
+    staging = tempfile.mkdtemp(prefix=".realesrgan_batch_", dir=staging_root)
+    in_dir, out_dir = os.path.join(staging, "in"), os.path.join(staging, "out")
+    os.makedirs(in_dir)
+    os.makedirs(out_dir)
+    try:
+        staged, unlinked = [], []
+        for index, inp, outp in batch:
+            name = f"{index:06d}"
+            if link_file(inp, os.path.join(in_dir, name + os.path.splitext(inp)[1].lower())):
+                staged.append((index, inp, outp, name))
+            else:
+                unlinked.append((index, inp, outp))
+
+        results = []
+        if staged:
+            command = build_command(exe_path, in_dir, out_dir, model_args)
+            finished = {}
+            last = [time.perf_counter()]
+
+            def collect():
+                # Move every newly finished output into place and report it
+                for index, inp, outp, name in staged:
+                    produced = os.path.join(out_dir, name + ".png")
+                    if index in finished or not png_complete(produced):
+                        continue
+                    try:
+                        os.replace(produced, outp)
+                    except OSError:
+                        # Still held open by the exe (Windows); retry on the next poll
+                        continue
+                    now = time.perf_counter()
+                    finished[index] = {"command": command, "returncode": 0, "seconds": now - last[0],
+                                       "output": "", "cancelled": False, "index": index,
+                                       "input": inp, "output_path": outp}
+                    last[0] = now
+                    if on_result is not None:
+                        on_result(index, finished[index])
+
+            stop = threading.Event()
+
+            def watch():
+                while not stop.wait(BATCH_POLL_SECONDS):
+                    collect()
+
+            watcher = threading.Thread(target=watch, name="realesrgan_batch_watch", daemon=True)
+            watcher.start()
+            try:
+                batch_result = run_job(command, dirname(exe_path) or None, control)
+            finally:
+                stop.set()
+                watcher.join()
+            collect()
+
+            for index, inp, outp, name in staged:
+                result = finished.get(index)
+                if result is None:
+                    result = {
+                        "command": command,
+                        "returncode": batch_result["returncode"] or 1,
+                        "seconds": 0.0,
+                        "output": batch_result["output"],
+                        "cancelled": batch_result["cancelled"],
+                        "index": index,
+                        "input": inp,
+                        "output_path": outp,
+                    }
+                    if on_result is not None:
+                        on_result(index, result)
+                results.append((index, result))
+            failed = len(staged) - len(finished)
+            print(f"[{batch_result['seconds']:.1f}s] batch of {len(staged)}: "
+                  f"{len(finished)} ok, {failed} failed (exit {batch_result['returncode']})")
+            if failed and batch_result["output"]:
+                print(batch_result["output"].strip()[-500:])
+
+        if unlinked:
+            # Could not link (e.g. different drive without symlink rights): run them one by one
+            print(f"{len(unlinked)} image(s) could not be staged, running them per file")
+
+            def per_file_result(k, result):
+                result["index"] = unlinked[k][0]
+                if on_result is not None:
+                    on_result(unlinked[k][0], result)
+
+            per_file = run_upscale_jobs([(inp, outp) for _, inp, outp in unlinked], model_args,
+                                        exe_path=exe_path, control=control, on_result=per_file_result)
+            results += [(index, r) for (index, _, _), r in zip(unlinked, per_file)]
+        return results
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def run_upscale_batch(jobs, model_args, exe_path=None, control=None, on_result=None):
+    """
+    Folder-mode counterpart of run_upscale_jobs: one Real-ESRGAN invocation per
+    round (normally a single round) instead of one per image. on_result is
+    called (from a watcher thread) as each image's output is finished, and for
+    the failed ones when the round ends.
+
+    Returns:
+        list: One result dict per job, in job order
+    """
+    exe_path = exe_path or get_exe_path()
+    results = [None] * len(jobs)
+    for batch in batch_rounds(jobs):
+        # Stage next to the first image so hardlinks stay on the same drive
+        staging_root = dirname(os.path.abspath(batch[0][2]))
+        for index, result in run_folder_batch(batch, model_args, exe_path, staging_root, control, on_result):
+            result["index"] = index
+            results[index] = result
+    return results
+
+
+def clamp_tiling(tile_size, overlap):
+    """
+    Tile size and overlap actually used: at least MIN_TILE_SIZE pixels per tile
+    and an overlap below half a tile (tile_size 0 stays 0, tiling off).
+
+    Returns:
+        tuple: (tile_size, overlap)
+    """
+    if not tile_size:
+        return 0, overlap
+    tile_size = max(tile_size, MIN_TILE_SIZE)
+    return tile_size, max(0, min(overlap, tile_size // 2 - 1))
+
+
+def plan_tiles(width, height, tile_size, overlap):
+    """
+    Cover a width x height image with tiles of at most tile_size pixels that
+    overlap their left/top neighbours by at least `overlap` pixels (both
+    clamped by clamp_tiling first).
+
+    Returns:
+        list: (x0, y0, x1, y1, left_overlap, top_overlap) per tile, row by row
+    """
+    tile_size, overlap = clamp_tiling(tile_size, overlap)
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        step = tile_size - overlap
+        positions = list(range(0, length - tile_size, step)) + [length - tile_size]
+        return positions
+
+    tiles = []
+    ys, xs = starts(height), starts(width)
+    for j, y0 in enumerate(ys):
+        y1 = min(height, y0 + tile_size)
+        top = ys[j - 1] + tile_size - y0 if j else 0
+        for i, x0 in enumerate(xs):
+            x1 = min(width, x0 + tile_size)
+            left = xs[i - 1] + tile_size - x0 if i else 0
+            tiles.append((x0, y0, x1, y1, left, top))
+    return tiles
+
+
+def _ramp(length, overlap):
+    """Blend weights along one axis: 0 -> 1 across the overlap, then 1."""
+    w = np.ones(length, dtype=np.float32)
+    if overlap:
+        w[:overlap] = (np.arange(overlap, dtype=np.float32) + 0.5) / overlap
+    return w
+
+
+def blend_tile(out, tile, x0, y0, left, top):
+    """
+    Paste an upscaled tile into `out` at (x0, y0), feathering the `left`/`top`
+    pixels that overlap tiles pasted before it. Only the overlap strips are
+    blended in float; the rest is copied.
+    """
+    h, w = tile.shape[:2]
+    region = out[y0:y0 + h, x0:x0 + w]
+    wx, wy = _ramp(w, left), _ramp(h, top)
+
+    strips = []
+    if top:
+        weight = (wy[:top, None] * wx[None, :])[..., None]
+        strips.append((np.s_[:top, :], weight))
+    if left:
+        weight = wx[None, :left, None]
+        strips.append((np.s_[top:, :left], weight))
+    blended = [(sl, (region[sl] * (1 - weight) + tile[sl] * weight + 0.5).astype(np.uint8))
+               for sl, weight in strips]
+
+    region[top:, left:] = tile[top:, left:]
+    for sl, values in blended:
+        region[sl] = values
+
+
+def upscale_tiled(input_path, output_path, model_args, tile_size, overlap=TILE_OVERLAP, exe_path=None,
+                  png_profile=None, control=None):
+    """
+    Upscale one large image tile by tile.
+
+    The tiles are written to a temporary folder next to the output and upscaled
+    with one folder-mode batch. They are then feathered into a memory-mapped
+    array and streamed to output_path (encoded with png_profile, see
+    image_io.PNG_PROFILES), so peak RAM does not grow with the output resolution.
+
+    Returns:
+        dict: Result like run_job (returncode, seconds, output, input, output_path)
+    """
+    start = time.perf_counter()
+    if control is not None and control.cancelled:
+        return {"command": None, "returncode": -1, "seconds": 0.0, "output": "cancelled", "cancelled": True,
+                "input": input_path, "output_path": output_path}
+    with Image.open(input_path) as img:
+        if img.mode not in ("RGB", "RGBA"):
+            has_alpha = img.mode in ("LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        src = np.asarray(img)
+    height, width = src.shape[:2]
+    tiles = plan_tiles(width, height, tile_size, overlap)
+
+    tmp = tempfile.mkdtemp(prefix=".realesrgan_tiles_", dir=dirname(os.path.abspath(output_path)))
+    result = {"command": None, "returncode": 0, "output": "", "cancelled": False,
+              "input": input_path, "output_path": output_path}
+    out = None
+    try:
+        jobs = []
+        for i, (x0, y0, x1, y1, _, _) in enumerate(tiles):
+            tile_in = os.path.join(tmp, f"tile_{i:05d}.png")
+            save_png(src[y0:y1, x0:x1], tile_in, INTERMEDIATE_PROFILE)
+            jobs.append((tile_in, os.path.join(tmp, f"tile_{i:05d}_x.png")))
+        del src
+
+        tile_results = run_upscale_batch(jobs, model_args, exe_path, control)
+        failed = [r for r in tile_results if r["returncode"] != 0]
+        if failed:
+            result.update(returncode=failed[0]["returncode"], output=failed[0]["output"],
+                          command=failed[0]["command"], cancelled=failed[0]["cancelled"])
+            return result
+        result["command"] = tile_results[0]["command"]
+
+        for (x0, y0, x1, y1, left, top), (_, tile_out) in zip(tiles, jobs):
+            with Image.open(tile_out) as img:
+                tile = np.asarray(img)
+            if out is None:
+                scale = tile.shape[0] // (y1 - y0)
+                shape = (height * scale, width * scale) + tile.shape[2:]
+                out = np.lib.format.open_memmap(os.path.join(tmp, "output.npy"), mode="w+",
+                                                dtype=np.uint8, shape=shape)
+            if tile.shape[2:] != out.shape[2:]:
+                tile = np.asarray(Image.fromarray(tile).convert("RGBA" if out.shape[2] == 4 else "RGB"))
+            blend_tile(out, tile, x0 * scale, y0 * scale, left * scale, top * scale)
+            os.remove(tile_out)
+
+        out.flush()
+        write_png(output_path, out, profile=png_profile)
+        return result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+        # Release the memmap before removing its file (required on Windows)
+        del out
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def needs_tiling(path, tile_size):
+    """True if the image's longest side is larger than tile_size (reads only the header)."""
+    if not tile_size:
+        return False
+    try:
+        with Image.open(path) as img:
+            return max(img.size) > tile_size
+    except OSError:
+        return False
+
+
+def upscale_jobs(jobs, mode, max_workers=None, batch=None, tile_size=None, tile_overlap=None,
+                 png_profile=None, control=None, on_result=None, cache=None):
+    """
+    Upscale explicit (input_path, output_path) pairs with one of the MODEL_ARGS modes.
+
+    Args:
+        jobs (list): (input_path, output_path) pairs
+        mode (str): Key of MODEL_ARGS
+        max_workers (int): Processes running at once in per-file mode (default MAX_WORKERS)
+        batch (bool): Use folder mode (default BATCH_MODE)
+        tile_size (int): Tile images larger than this (default TILE_SIZE, 0 = never),
+                         see clamp_tiling for the limits on it and tile_overlap
+        tile_overlap (int): Overlap between tiles in pixels (default TILE_OVERLAP)
+        png_profile (str): image_io profile for tiled outputs (the exe encodes the others)
+        control (JobControl): Cancels the jobs still queued or running
+        on_result (callable): on_result(index, result) with index into jobs, called
+                              (possibly from a worker thread) as each image finishes
+        cache (UpscaleCache): Result cache (default UPSCALE_CACHE, False = don't use one).
+                              Jobs sharing an output path bypass it, since later ones
+                              read what the earlier ones wrote.
+
+    Returns:
+        list: Per-image result dicts (returncode, seconds, ...), in job order
+    """
+    if not jobs:
+        return []
+    batch = BATCH_MODE if batch is None else batch
+    tile_size, tile_overlap = clamp_tiling(TILE_SIZE if tile_size is None else tile_size,
+                                           TILE_OVERLAP if tile_overlap is None else tile_overlap)
+    start = time.perf_counter()
+
+    cache = UPSCALE_CACHE if cache is None else (cache or None)
+
+    tiled = {i for i, (inp, _) in enumerate(jobs) if needs_tiling(inp, tile_size)}
+    results = [None] * len(jobs)
+    keys = {}
+    if cache is not None:
+        files = model_files(mode)
+        outputs = {}
+        for inp, outp in jobs:
+            out_key = os.path.normcase(os.path.abspath(outp))
+            outputs[out_key] = outputs.get(out_key, 0) + 1
+        for i, (inp, outp) in enumerate(jobs):
+            if outputs[os.path.normcase(os.path.abspath(outp))] > 1:
+                continue
+            # Tiled outputs are encoded here with png_profile, the others by the exe
+            variant = f"tiled:{tile_size}:{tile_overlap}:{png_profile}" if i in tiled else ""
+            keys[i] = cache.key(inp, MODEL_NAMES[mode], MODEL_SCALES[mode], variant, files)
+            if cache.get(keys[i], outp):
+                results[i] = {"command": None, "returncode": 0, "seconds": 0.0, "output": "", "cancelled": False,
+                              "cached": True, "index": i, "input": inp, "output_path": outp}
+                print(f"[cache] {os.path.basename(inp)} -> {os.path.basename(outp)}")
+                if on_result is not None:
+                    on_result(i, results[i])
+        tiled = {i for i in tiled if results[i] is None}
+    whole = [i for i in range(len(jobs)) if i not in tiled and results[i] is None]
+    if whole:
+        whole_jobs = [jobs[i] for i in whole]
+        whole_result = None if on_result is None else (lambda k, result: on_result(whole[k], result))
+        if batch:
+            print(f"Upscaling {len(whole_jobs)} image(s) [{mode}] in folder mode")
+            done = run_upscale_batch(whole_jobs, MODEL_ARGS[mode], control=control, on_result=whole_result)
+        else:
+            print(f"Upscaling {len(whole_jobs)} image(s) [{mode}] with "
+                  f"{min(len(whole_jobs), max_workers or MAX_WORKERS)} worker(s)")
+            done = run_upscale_jobs(whole_jobs, MODEL_ARGS[mode], max_workers, control=control,
+                                    on_result=whole_result)
+        for i, result in zip(whole, done):
+            results[i] = result
+    for i in sorted(tiled):
+        inp, outp = jobs[i]
+        result = upscale_tiled(inp, outp, MODEL_ARGS[mode], tile_size, tile_overlap,
+                               png_profile=png_profile, control=control)
+        status = "ok" if result["returncode"] == 0 else f"FAILED (exit {result['returncode']})"
+        print(f"[{result['seconds']:.1f}s] {os.path.basename(inp)} (tiled {tile_size}px) -> {os.path.basename(outp)}: {status}")
+        results[i] = result
+        if on_result is not None:
+            on_result(i, result)
+
+    for i, key in keys.items():
+        result = results[i]
+        if key is not None and result["returncode"] == 0 and not result.get("cached"):
+            try:
+                cache.put(key, result.get("output_path", jobs[i][1]))
+            except OSError as e:
+                print(f"Could not cache {os.path.basename(jobs[i][0])}: {e}")
+
+    failed = sum(1 for r in results if r["returncode"] != 0)
+    cached = sum(1 for r in results if r.get("cached"))
+    print(f"[{mode}] {len(results) - failed} ok ({cached} from cache), {failed} failed "
+          f"in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+def run_upscale(files_list, input_dir, mode, max_workers=None, batch=None,
+                tile_size=None, tile_overlap=None, cache=False):
+    """
+    Upscale the images in files_list in place ({name}.png) with one of the MODEL_ARGS modes.
+
+    Args:
+        files_list (list): List of files to process
+        input_dir (str): Input directory path
+        mode (str): Key of MODEL_ARGS
+        max_workers, batch, tile_size, tile_overlap: See upscale_jobs
+        cache (UpscaleCache): See upscale_jobs; off unless given (None = UPSCALE_CACHE)
+
+    Returns:
+        list: Per-image result dicts (returncode, seconds, ...)
+    """
+    return upscale_jobs(collect_upscale_jobs(files_list, input_dir), mode, max_workers, batch,
+                        tile_size, tile_overlap, cache=cache)
+
+
+def process_anime_upscale(files_list, input_dir, max_workers=None, batch=None, tile_size=None, tile_overlap=None):
     """
     Process images using anime-optimized upscaling.
-    
+
     Args:
         files_list (list): List of files to process
         input_dir (str): Input directory path
     """
-    # Get the path to the realesrgan folder where the exe is located
-    realesrgan_dir = os.path.join(dirname(__file__))
-    exe_path = os.path.join(realesrgan_dir, "realesrgan-ncnn-vulkan.exe")
-    
-    for f in files_list:
-        file_extension = os.path.splitext(f)[1]
-        file_name = f[:-(len(file_extension))]
-        
-        if file_extension.lower() in ['.jpg', '.png']:
-            input_path = os.path.join(input_dir, f).replace('\\', '/')
-            output_path = os.path.join(input_dir, f"{file_name}.png").replace('\\', '/')
-            exe_path = exe_path.replace('\\', '/')
-            
-            command = f'"{exe_path}" -n realesrgan-x4plus-anime -i "{input_path}" -o "{output_path}"'
-            print(f"Executing command: {command}")
-            os.system(f'cd "{os.path.dirname(exe_path)}" && {command}')
-
-def process_regular_upscale(files_list, input_dir):
+    return run_upscale(files_list, input_dir, "anime", max_workers, batch, tile_size, tile_overlap)
+
+def process_regular_upscale(files_list, input_dir, max_workers=None, batch=None, tile_size=None, tile_overlap=None):
     """
     Process images using standard upscaling.
-    
+
     Args:
         files_list (list): List of files to process
         input_dir (str): Input directory path
     """
-    # Get the path to the realesrgan folder where the exe is located
-    realesrgan_dir = os.path.join(dirname(__file__))
-    exe_path = os.path.join(realesrgan_dir, "realesrgan-ncnn-vulkan.exe")
-    
-    for f in files_list:
-        file_extension = os.path.splitext(f)[1]
-        file_name = f[:-(len(file_extension))]
-        
-        if file_extension.lower() in ['.jpg', '.png']:
-            input_path = os.path.join(input_dir, f).replace('\\', '/')
-            output_path = os.path.join(input_dir, f"{file_name}.png").replace('\\', '/')
-            exe_path = exe_path.replace('\\', '/')
-            
-            command = f'"{exe_path}" -i "{input_path}" -o "{output_path}"'
-            print(f"Executing command: {command}")
-            os.system(f'cd "{os.path.dirname(exe_path)}" && {command}')
-
-def process_regular_upscale_x2(files_list, input_dir):
+    return run_upscale(files_list, input_dir, "regular", max_workers, batch, tile_size, tile_overlap)
+
+def process_regular_upscale_x2(files_list, input_dir, max_workers=None, batch=None, tile_size=None, tile_overlap=None):
     """
     Process images using standard upscaling at 2× via Real-ESRGAN‑ncnn‑vulkan.
     """
-    realesrgan_dir = os.path.join(dirname(__file__))
-    exe_path = os.path.join(realesrgan_dir, "realesrgan-ncnn-vulkan.exe").replace('\\', '/')
-    
-    for f in files_list:
-        ext = os.path.splitext(f)[1].lower()
-        if ext in ['.jpg', '.png']:
-            inp  = os.path.join(input_dir, f).replace('\\', '/')
-            name = os.path.splitext(f)[0]
-            outp = os.path.join(input_dir, f"{name}.png").replace('\\', '/')
-            
-            cmd = f'"{exe_path}" -i "{inp}" -o "{outp}" -s 2'
-            print(f"Executing ×2 regular: {cmd}")
-            os.system(f'cd "{os.path.dirname(exe_path)}" && {cmd}')
-
-def process_anime_upscale_x2(files_list, input_dir):
+    return run_upscale(files_list, input_dir, "regular_x2", max_workers, batch, tile_size, tile_overlap)
+
+def process_anime_upscale_x2(files_list, input_dir, max_workers=None, batch=None, tile_size=None, tile_overlap=None):
     """
     Process images using anime-optimized upscaling at 2× via Real-ESRGAN‑ncnn‑vulkan.
     """
-    realesrgan_dir = os.path.join(dirname(__file__))
-    exe_path = os.path.join(realesrgan_dir, "realesrgan-ncnn-vulkan.exe").replace('\\', '/')
-    
-    for f in files_list:
-        ext = os.path.splitext(f)[1].lower()
-        if ext in ['.jpg', '.png']:
-            inp  = os.path.join(input_dir, f).replace('\\', '/')
-            name = os.path.splitext(f)[0]
-            outp = os.path.join(input_dir, f"{name}.png").replace('\\', '/')
-            
-            cmd = f'"{exe_path}" -n realesr-animevideov3-x2 -s 2 -i "{inp}" -o "{outp}" '
-            print(f"Executing ×2 anime: {cmd}")
-            os.system(f'cd "{os.path.dirname(exe_path)}" && {cmd}')
\ No newline at end of file
+    return run_upscale(files_list, input_dir, "anime_x2", max_workers, batch, tile_size, tile_overlap)
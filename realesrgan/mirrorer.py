@@ -1,29 +1,10 @@
 import os
-import tkinter as tk
-from tkinter import filedialog
-from PIL import Image, ImageOps
 
-def mirror_image(image_path):
-    with Image.open(image_path) as img:
-        width, height = img.size
-
-        # Crop the left and right halves
-        left_half = img.crop((0, 0, width // 2, height))
-        right_half = img.crop((width // 2, 0, width, height))
-
-        # Mirror the halves
-        left_half_mirrored = ImageOps.mirror(left_half)
-        right_half_mirrored = ImageOps.mirror(right_half)
+from image_mirror import mirror_file
 
-        # Create a new image with double the width
-        new_image = Image.new('RGB', (width * 2, height))
-        new_image.paste(left_half_mirrored, (0, 0))
-        new_image.paste(left_half, (width // 2, 0))
-        new_image.paste(right_half, (width, 0))
-        new_image.paste(right_half_mirrored, (width + width // 2, 0))
-
-        # Save the modified image
-        new_image.save(image_path.replace('.', '_mirrored2.'))
+def mirror_image(image_path):
+    # [left mirrored | left | right | right mirrored], same mode as the source
+    mirror_file(image_path, image_path.replace('.', '_mirrored2.'), "halves")
 
 def process_images(directory):
     for filename in os.listdir(directory):
@@ -36,13 +17,17 @@ def process_images(directory):
                 print(f"Failed to mirror {filename}: {e}")
 
 def select_directory():
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     folder_selected = filedialog.askdirectory()
     return folder_selected
 
-source_directory = select_directory()
-if source_directory:
-    process_images(source_directory)
-else:
-    print("No directory selected, exiting.")
+if __name__ == "__main__":
+    source_directory = select_directory()
+    if source_directory:
+        process_images(source_directory)
+    else:
+        print("No directory selected, exiting.")
@@ -1,23 +1,10 @@
 import os
-import tkinter as tk
-from tkinter import filedialog
-from PIL import Image, ImageOps
-import fbx
 
-def mirror_and_save_image(file_path):
-    with Image.open(file_path) as img:
-        width, height = img.size
-
-        # Mirror the image
-        mirrored_img = ImageOps.mirror(img)
-
-        # Create a new image with double the width
-        new_image = Image.new('RGB', (width * 2, height))
-        new_image.paste(img, (0, 0))
-        new_image.paste(mirrored_img, (width, 0))
+from image_mirror import mirror_file
 
-        # Save the modified image
-        new_image.save(file_path.replace('.', '_mirrored.'))
+def mirror_and_save_image(file_path):
+    # [image | image mirrored], same mode as the source
+    mirror_file(file_path, file_path.replace('.', '_mirrored.'), "double")
 
 def process_images(directory):
     for file in os.listdir(directory):
@@ -32,13 +19,17 @@ def process_directory(directory):
             mirror_and_save_image(full_path)
 
 def select_directory():
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     folder_selected = filedialog.askdirectory()
     return folder_selected
 
-directory = select_directory()
-if directory:
-    process_directory(directory)
-else:
-    print("No directory selected, exiting.")
+if __name__ == "__main__":
+    directory = select_directory()
+    if directory:
+        process_directory(directory)
+    else:
+        print("No directory selected, exiting.")
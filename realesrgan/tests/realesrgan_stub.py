@@ -0,0 +1,87 @@
+"""
+Stand-in for realesrgan-ncnn-vulkan in tests (no GPU or Windows needed).
+
+Takes the same command line as methods.build_command (-i input -o output plus
+model arguments) and writes a small text file to the output naming the input.
+Inputs that are real images are instead resized by the -s scale (default 4,
+nearest) and saved as RGB PNG, like the exe, which drops alpha. Inputs whose
+name contains "fail" exit with code 3 without writing; inputs containing
+"slow" sleep $STUB_SLEEP seconds first. Every run appends a JSON line (input,
+output, start, end) to $STUB_LOG when it is set.
+
+In folder mode (-i and -o are folders) every input, in name order, becomes
+<stem>.png in the output folder: the upscaled image for real images, otherwise
+a 1x1 PNG whose "source" text chunk names the input. Staged inputs are
+renamed, so "slow" and "fail" are looked up in each file's contents instead;
+any failure makes the exit code 3.
+"""
+import json
+import os
+import sys
+import time
+
+from PIL import Image, PngImagePlugin
+
+
+def upscale_image(inp, out, scale):
+    """Write the nearest-neighbour upscale of inp to out; False if inp is not an image."""
+    try:
+        with Image.open(inp) as img:
+            img = img.convert("RGB")
+    except OSError:
+        return False
+    img.resize((img.width * scale, img.height * scale), Image.NEAREST).save(out, "PNG")
+    return True
+
+
+def run_folder(in_dir, out_dir, scale):
+    code = 0
+    for name in sorted(os.listdir(in_dir)):
+        with open(os.path.join(in_dir, name), "rb") as f:
+            tag = f.read().decode("utf-8", "replace")
+        if "slow" in tag:
+            time.sleep(float(os.environ.get("STUB_SLEEP", "5")))
+        if "fail" in tag:
+            print(f"{name}: vkCreateDevice failed")
+            code = 3
+            continue
+        out = os.path.join(out_dir, os.path.splitext(name)[0] + ".png")
+        if upscale_image(os.path.join(in_dir, name), out, scale):
+            continue
+        info = PngImagePlugin.PngInfo()
+        info.add_text("source", name)
+        Image.new("L", (1, 1)).save(out, pnginfo=info)
+    return code
+
+
+def main(argv):
+    start = time.time()
+    inp = argv[argv.index("-i") + 1]
+    out = argv[argv.index("-o") + 1]
+    scale = int(argv[argv.index("-s") + 1]) if "-s" in argv else 4
+    if os.path.isdir(inp):
+        code = run_folder(inp, out, scale)
+        if os.environ.get("STUB_LOG"):
+            with open(os.environ["STUB_LOG"], "a", encoding="utf-8") as f:
+                f.write(json.dumps({"input": sorted(os.listdir(inp)), "output": os.path.basename(out),
+                                    "start": start, "end": time.time()}) + "\n")
+        return code
+    name = os.path.basename(inp)
+    if "slow" in name:
+        time.sleep(float(os.environ.get("STUB_SLEEP", "5")))
+    code = 0
+    if "fail" in name:
+        print(f"{name}: vkCreateDevice failed")
+        code = 3
+    elif not upscale_image(inp, out, scale):
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(f"upscaled {name}\n")
+    if os.environ.get("STUB_LOG"):
+        with open(os.environ["STUB_LOG"], "a", encoding="utf-8") as f:
+            f.write(json.dumps({"input": name, "output": os.path.basename(out),
+                                "start": start, "end": time.time()}) + "\n")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
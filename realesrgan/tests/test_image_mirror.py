@@ -0,0 +1,127 @@
+"""
+Tests for the mirror layouts and the streamed PNG path (image_mirror.mirror_png_stream
+over image_io.PNGBandReader / PNGStreamWriter), which ordinary runs only take
+above STREAM_MIN_PIXELS.
+
+    cd realesrgan && python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import image_io  # noqa: E402
+import image_mirror  # noqa: E402
+from image_io import PNGBandReader  # noqa: E402
+from image_mirror import MIRROR_LAYOUTS, mirror_array, mirror_file, mirror_png_stream  # noqa: E402
+
+CHANNELS = {"L": None, "LA": 2, "RGB": 3, "RGBA": 4}
+
+
+def sample(mode, width=13, height=11, seed=0):
+    """Random pixels (odd width, so L and R halves differ in size) as a PIL image of `mode`."""
+    rng = np.random.default_rng(seed)
+    if mode == "I;16":
+        return Image.fromarray(rng.integers(0, 65536, (height, width), dtype=np.uint16))
+    shape = (height, width) if CHANNELS[mode] is None else (height, width, CHANNELS[mode])
+    return Image.fromarray(rng.integers(0, 256, shape, dtype=np.uint8), mode)
+
+
+def save(img, path):
+    img.save(path)
+    return path
+
+
+def read(path):
+    with Image.open(path) as img:
+        return img.mode, np.asarray(img)
+
+
+@pytest.fixture
+def streamed(monkeypatch):
+    """Lower the threshold so every streamable PNG is streamed; returns the list of streamed sources."""
+    calls = []
+    real = image_mirror.mirror_png_stream
+
+    def spy(src, outputs, profile=None, band_rows=None):
+        calls.append(src)
+        return real(src, outputs, profile, band_rows)
+
+    monkeypatch.setattr(image_mirror, "STREAM_MIN_PIXELS", 1)
+    monkeypatch.setattr(image_mirror, "mirror_png_stream", spy)
+    return calls
+
+
+def test_mirror_columns():
+    assert image_mirror.mirror_columns(5, "halves").tolist() == [1, 0, 0, 1, 2, 3, 4, 4, 3, 2]
+    assert image_mirror.mirror_columns(5, "halves_swapped").tolist() == [0, 1, 4, 3, 2, 2, 3, 4, 1, 0]
+    assert image_mirror.mirror_columns(3, "double").tolist() == [0, 1, 2, 2, 1, 0]
+    with pytest.raises(ValueError, match="unknown mirror layout"):
+        image_mirror.mirror_columns(4, "sideways")
+
+
+@pytest.mark.parametrize("layout", MIRROR_LAYOUTS)
+@pytest.mark.parametrize("mode", sorted(CHANNELS))
+def test_mirror_file_streams_above_threshold(tmp_path, streamed, mode, layout):
+    src = save(sample(mode), tmp_path / "src.png")
+    dst = tmp_path / "dst.png"
+    mirror_file(src, dst, layout)
+    assert streamed == [src]
+    out_mode, out = read(dst)
+    assert out_mode == mode
+    np.testing.assert_array_equal(out, mirror_array(np.asarray(sample(mode)), layout))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.parametrize("band_rows", [1, 3, 11, 64])
+@pytest.mark.parametrize("mode", sorted(CHANNELS))
+def test_stream_band_sizes_and_shared_read(tmp_path, mode, band_rows):
+    # One read of the source feeds every layout, whatever the band boundaries
+    src = save(sample(mode, seed=band_rows), tmp_path / "src.png")
+    outputs = [(tmp_path / f"{layout}.png", layout) for layout in MIRROR_LAYOUTS]
+    mirror_png_stream(src, outputs, band_rows=band_rows)
+    arr = np.asarray(sample(mode, seed=band_rows))
+    for dst, layout in outputs:
+        np.testing.assert_array_equal(read(dst)[1], mirror_array(arr, layout))
+
+
+def test_stream_in_place_and_multiple_idat(tmp_path, monkeypatch):
+    # Small IDAT chunks: the second pass reads bands that straddle chunk boundaries, and dst == src
+    monkeypatch.setattr(image_io, "IDAT_CHUNK_BYTES", 64)
+    img = sample("RGBA", width=40, height=30)
+    src = save(img, tmp_path / "src.png")
+    path = tmp_path / "img.png"
+    mirror_png_stream(src, [(path, "double")], band_rows=7)
+    mirror_png_stream(path, [(path, "halves")], band_rows=4)
+    expected = mirror_array(mirror_array(np.asarray(img), "double"), "halves")
+    np.testing.assert_array_equal(read(path)[1], expected)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.parametrize("layout", MIRROR_LAYOUTS)
+def test_16_bit_falls_back_to_pillow(tmp_path, streamed, layout):
+    img = sample("I;16")
+    src = save(img, tmp_path / "deep.png")
+    with pytest.raises(ValueError, match="8-bit"):
+        PNGBandReader(src)
+    with pytest.raises(ValueError):
+        mirror_png_stream(src, [(tmp_path / "out.png", layout)])
+
+    dst = tmp_path / "dst.png"
+    mirror_file(src, dst, layout)
+    assert streamed == []
+    out_mode, out = read(dst)
+    assert out_mode.startswith("I")
+    np.testing.assert_array_equal(out.astype(np.uint16), mirror_array(np.asarray(img), layout))
+
+
+def test_below_threshold_is_not_streamed(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(image_mirror, "mirror_png_stream", lambda *args, **kwargs: calls.append(args))
+    src = save(sample("RGB"), tmp_path / "small.png")
+    mirror_file(src, tmp_path / "dst.png", "halves")
+    assert calls == []
+    np.testing.assert_array_equal(read(tmp_path / "dst.png")[1], mirror_array(np.asarray(sample("RGB")), "halves"))
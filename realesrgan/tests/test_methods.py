@@ -0,0 +1,140 @@
+"""
+Tests for the Real-ESRGAN job runner in methods.py, with realesrgan_stub.py as the executable.
+
+    cd realesrgan && python -m pytest tests
+
+(run from realesrgan/: at the repository root pytest would import the addon's __init__.py, which needs bpy)
+"""
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from realesrgan import methods  # noqa: E402
+
+STUB = Path(__file__).with_name("realesrgan_stub.py")
+
+
+@pytest.fixture
+def stub_exe(tmp_path, monkeypatch):
+    """Executable wrapper around the stub; returns (exe path, function reading the run log)."""
+    if os.name == "nt":
+        pytest.skip("the stub wrapper is a shell script")
+    exe = tmp_path / "bin" / "realesrgan-stub"
+    exe.parent.mkdir()
+    exe.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{STUB}" "$@"\n')
+    exe.chmod(0o755)
+    log = tmp_path / "runs.jsonl"
+    monkeypatch.setenv("STUB_LOG", str(log))
+    monkeypatch.setenv("STUB_SLEEP", "0.5")
+
+    def runs():
+        if not log.exists():
+            return []
+        return [json.loads(line) for line in log.read_text().splitlines()]
+    return str(exe), runs
+
+
+def make_jobs(folder, names):
+    folder.mkdir(exist_ok=True)
+    jobs = []
+    for name in names:
+        # The stub's folder mode only sees staged names, so the name goes in the contents too
+        (folder / name).write_text(name)
+        jobs.append((str(folder / name), str(folder / (os.path.splitext(name)[0] + ".png"))))
+    return jobs
+
+
+def max_overlap(runs):
+    """Largest number of stub runs alive at the same time."""
+    events = sorted([(r["start"], 1) for r in runs] + [(r["end"], -1) for r in runs])
+    alive = peak = 0
+    for _, step in events:
+        alive += step
+        peak = max(peak, alive)
+    return peak
+
+
+def test_pool_runs_every_job_bounded(tmp_path, stub_exe):
+    exe, runs = stub_exe
+    jobs = make_jobs(tmp_path / "img", [f"slow{i}.jpg" for i in range(5)])
+    seen = []
+    results = methods.run_upscale_jobs(jobs, ["-n", "realesrgan-x4plus"], max_workers=2, exe_path=exe,
+                                       on_result=lambda index, result: seen.append(index))
+
+    assert [r["returncode"] for r in results] == [0] * 5
+    assert [r["input"] for r in results] == [inp for inp, _ in jobs]
+    assert sorted(seen) == list(range(5))
+    assert len(runs()) == 5
+    assert max_overlap(runs()) == 2
+    for _, outp in jobs:
+        assert Path(outp).read_text().startswith("upscaled slow")
+
+
+def test_nonzero_exit_is_reported_per_job(tmp_path, stub_exe):
+    exe, _ = stub_exe
+    jobs = make_jobs(tmp_path / "img", ["a.jpg", "b_fail.jpg", "c.jpg"])
+    results = methods.run_upscale_jobs(jobs, [], max_workers=3, exe_path=exe)
+
+    assert [r["returncode"] for r in results] == [0, 3, 0]
+    assert "vkCreateDevice failed" in results[1]["output"]
+    assert not results[1]["cancelled"]
+    assert not Path(jobs[1][1]).exists()
+
+
+def test_jobs_sharing_an_output_run_in_list_order(tmp_path, stub_exe):
+    exe, runs = stub_exe
+    # a.jpg and a.png both write a.png: the .png job must run last
+    jobs = make_jobs(tmp_path / "img", ["slow_a.jpg", "slow_a.png", "b.jpg"])
+    results = methods.run_upscale_jobs(jobs, [], max_workers=4, exe_path=exe)
+
+    assert all(r["returncode"] == 0 for r in results)
+    chain = [r for r in runs() if r["output"] == "slow_a.png"]
+    assert [r["input"] for r in chain] == ["slow_a.jpg", "slow_a.png"]
+    assert chain[0]["end"] <= chain[1]["start"]
+    assert Path(jobs[1][1]).read_text() == "upscaled slow_a.png\n"
+
+
+def test_cancel_terminates_running_and_skips_queued(tmp_path, stub_exe, monkeypatch):
+    exe, runs = stub_exe
+    monkeypatch.setenv("STUB_SLEEP", "30")
+    jobs = make_jobs(tmp_path / "img", [f"slow{i}.jpg" for i in range(4)])
+    control = methods.JobControl()
+    threading.Timer(0.5, control.cancel).start()
+
+    start = time.perf_counter()
+    results = methods.run_upscale_jobs(jobs, [], max_workers=2, exe_path=exe, control=control)
+
+    assert time.perf_counter() - start < 10
+    assert all(r["cancelled"] for r in results)
+    # The two running processes were terminated, the two queued ones never started
+    assert sum(r["output"] == "cancelled" for r in results) == 2
+    assert runs() == []
+    assert not any(Path(outp).exists() for _, outp in jobs)
+
+
+def test_folder_batch_reports_each_image_as_it_finishes(tmp_path, stub_exe):
+    exe, runs = stub_exe
+    jobs = make_jobs(tmp_path / "img", ["slow_a.jpg", "slow_b.jpg", "c_fail.jpg", "slow_d.jpg"])
+    reported = []
+    results = methods.run_upscale_batch(jobs, [], exe_path=exe,
+                                        on_result=lambda index, result: reported.append((index, time.time(), result)))
+
+    (run,) = runs()
+    assert [r["returncode"] for r in results] == [0, 0, 3, 0]
+    # Every image reported once; the finished ones while the exe was still running
+    assert sorted(index for index, _, _ in reported) == [0, 1, 2, 3]
+    first = dict((index, at) for index, at, _ in reported)
+    assert first[0] < first[1] < run["end"]
+    # Outputs are already moved into place when reported
+    for index, _, result in reported:
+        if result["returncode"] == 0:
+            with Image.open(result["output_path"]) as img:
+                assert img.text["source"] == f"{index:06d}.jpg"
+    assert not any(p.name.startswith(".realesrgan_batch_") for p in (tmp_path / "img").iterdir())
@@ -0,0 +1,74 @@
+"""
+Tests for realesrgan/dsspng.py: the shared dds_decode is loaded by path, so the
+Transform Tool's own dsspng.py is never put on sys.path next to this one.
+
+    cd realesrgan && python -m pytest tests
+"""
+import importlib.util
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+REALESRGAN_DIR = Path(__file__).resolve().parents[1]
+TRANSFORM_TOOL_DIR = REALESRGAN_DIR / "Transform Tool"
+
+
+@pytest.fixture
+def dsspng(monkeypatch):
+    """realesrgan/dsspng.py, imported under its own name so it cannot collide with the Transform Tool's."""
+    # Its sibling imports (image_io, image_mirror) resolve from the folder, as when run as a script
+    monkeypatch.syspath_prepend(str(REALESRGAN_DIR))
+    path_before = list(sys.path)
+    spec = importlib.util.spec_from_file_location("realesrgan_dsspng", REALESRGAN_DIR / "dsspng.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert sys.path == path_before
+    return module
+
+
+def write_dds(path, fourcc, payload, size=(4, 4)):
+    header = bytearray(124)
+    struct.pack_into("<IIIII", header, 0, 124, 0x1007, size[1], size[0], len(payload))
+    struct.pack_into("<II4s", header, 72, 32, 0x4, fourcc)
+    path.write_bytes(b"DDS " + bytes(header) + payload)
+
+
+def test_decoder_comes_from_the_transform_tool(dsspng):
+    # The fixture checks that loading it left sys.path alone
+    assert Path(dsspng.decode_dds.__code__.co_filename) == TRANSFORM_TOOL_DIR / "dds_decode.py"
+
+
+def test_converts_bc1_and_bc5_in_process(dsspng, tmp_path, capsys):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    # BC1: red/blue endpoints, every texel index 0 -> red
+    write_dds(src / "color.dds", b"DXT1", struct.pack("<HHI", 0xF800, 0x001F, 0))
+    # BC5: R = 200 and G = 10 everywhere (index 0 of each BC4 half)
+    write_dds(src / "normal.dds", b"ATI2", bytes([200, 10]) + bytes(6) + bytes([10, 200]) + bytes(6))
+
+    dsspng.convert_dds_to_png(str(src), str(out))
+
+    with Image.open(out / "color.png") as img:
+        assert (np.asarray(img.convert("RGBA")) == (255, 0, 0, 255)).all()
+    with Image.open(out / "normal.png") as img:
+        assert (np.asarray(img.convert("RGBA")) == (200, 10, 255, 255)).all()
+    assert "Failed" not in capsys.readouterr().out
+
+
+def test_decode_failure_is_reported(dsspng, tmp_path, capsys, monkeypatch):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    write_dds(src / "bc7.dds", b"DX10", bytes(16))
+    commands = []
+    monkeypatch.setattr(dsspng.subprocess, "run", lambda command, **kwargs: commands.append(command))
+
+    dsspng.convert_dds_to_png(str(src), str(out))
+
+    printed = capsys.readouterr().out
+    assert f"Failed to decode {src / 'bc7.dds'} in-process" in printed
+    assert "falling back to ImageMagick" in printed
+    assert len(commands) == 1 and "bc7.dds" in commands[0]
@@ -0,0 +1,282 @@
+"""
+Tests for the image pipeline in thresholdpng.py (planning, alpha handling, progress),
+with realesrgan_stub.py as the Real-ESRGAN executable.
+
+    cd realesrgan && python -m pytest tests
+
+thresholdpng is part of the addon package, whose __init__.py needs bpy; the
+addon folder is registered here as a bare package so only the modules under
+test are imported.
+"""
+import importlib
+import os
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+ADDON_DIR = Path(__file__).resolve().parents[2]
+STUB = Path(__file__).with_name("realesrgan_stub.py")
+
+if "addon" not in sys.modules:
+    addon = types.ModuleType("addon")
+    addon.__path__ = [str(ADDON_DIR)]
+    sys.modules["addon"] = addon
+thresholdpng = importlib.import_module("addon.thresholdpng")
+methods = importlib.import_module("addon.realesrgan.methods")
+
+
+@pytest.fixture
+def stub_exe(tmp_path, monkeypatch):
+    """Run upscales with the stub executable (nearest-neighbour resize by the -s scale)."""
+    if os.name == "nt":
+        pytest.skip("the stub wrapper is a shell script")
+    exe = tmp_path / "bin" / "realesrgan-stub"
+    exe.parent.mkdir()
+    exe.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{STUB}" "$@"\n')
+    exe.chmod(0o755)
+    monkeypatch.setenv("REALESRGAN_EXE", str(exe))
+    return exe
+
+
+def save(path, mode, size=(8, 6), alpha=None):
+    """Write a test image; alpha is an (h, w) uint8 array for RGBA images."""
+    w, h = size
+    y, x = np.mgrid[0:h, 0:w]
+    rgb = np.stack([x * 30 % 256, y * 40 % 256, (x + y) * 20 % 256], axis=-1).astype(np.uint8)
+    if mode == 'RGBA':
+        Image.fromarray(np.dstack([rgb, alpha]), 'RGBA').save(path)
+    else:
+        Image.fromarray(rgb, 'RGB').convert(mode).save(path)
+    return path
+
+
+def gradient_alpha(size=(8, 6)):
+    w, h = size
+    return (np.arange(w * h).reshape(h, w) * 255 // (w * h - 1)).astype(np.uint8)
+
+
+def binary_alpha(size=(8, 6)):
+    w, h = size
+    return np.where(np.arange(w * h).reshape(h, w) % 3, 255, 0).astype(np.uint8)
+
+
+@pytest.fixture
+def mixed_folder(tmp_path):
+    folder = tmp_path / "images"
+    folder.mkdir()
+    save(folder / "alpha.png", 'RGBA', alpha=gradient_alpha())
+    save(folder / "binary.png", 'RGBA', alpha=binary_alpha())
+    save(folder / "opaque.png", 'RGB')
+    save(folder / "photo.jpg", 'RGB')
+    (folder / "broken.png").write_bytes(b"not a png")
+    return folder
+
+
+def files_of(folder):
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(('.png', '.jpg')))
+
+
+def test_plan_steps(mixed_folder):
+    options = {'preserve_alpha': True, 'anime_upscale_x2': True}
+    plans = {p['name']: p for p in thresholdpng.plan_pipeline(str(mixed_folder), files_of(mixed_folder), options)}
+
+    # Only PNGs that actually have alpha are split and merged
+    assert plans['alpha.png']['steps'] == ['split_alpha', 'anime_x2', 'merge_alpha']
+    assert plans['binary.png']['steps'] == ['split_alpha', 'anime_x2', 'merge_alpha']
+    assert plans['opaque.png']['steps'] == ['threshold', 'anime_x2']
+    assert plans['photo.jpg']['steps'] == ['anime_x2']
+    assert plans['broken.png']['size'] is None
+    assert plans['alpha.png']['out_size'] == (16, 12)
+    assert plans['photo.jpg']['output'] == str(mixed_folder / "photo.png")
+
+    plain = {p['name']: p['steps'] for p in thresholdpng.plan_pipeline(str(mixed_folder), files_of(mixed_folder), {})}
+    assert plain == {'alpha.png': ['threshold'], 'binary.png': ['threshold'], 'opaque.png': ['threshold'],
+                     'photo.jpg': [], 'broken.png': ['threshold']}
+
+
+def test_dry_run_prints_plan_and_writes_nothing(mixed_folder, capsys):
+    before = {f: (mixed_folder / f).read_bytes() for f in files_of(mixed_folder)}
+    plans = thresholdpng.process_images(str(mixed_folder), {'regular_upscale': True, 'dry_run': True})
+
+    out = capsys.readouterr().out
+    assert "alpha.png: 8x6 -> 32x24" in out
+    assert "threshold -> regular -> write" in out
+    assert "broken.png: unreadable, skipped" in out
+    assert f"{len(plans)} image(s)" in out
+    assert {f: (mixed_folder / f).read_bytes() for f in files_of(mixed_folder)} == before
+
+
+@pytest.mark.parametrize("preserve_alpha", [False, True])
+def test_progress_reaches_total(mixed_folder, stub_exe, preserve_alpha):
+    options = {'regular_upscale_x2': True, 'preserve_alpha': preserve_alpha, 'use_cache': False}
+    plans = thresholdpng.plan_pipeline(str(mixed_folder), files_of(mixed_folder), options)
+    events = []
+    assert thresholdpng.run_pipeline(str(mixed_folder), plans, options, on_event=events.append)
+
+    total = sum(len(p['steps']) for p in plans if p['size'] is not None)
+    assert [e['done'] for e in events] == list(range(1, total + 1))
+    assert all(e['total'] == total for e in events)
+    assert all(e['ok'] for e in events)
+    with Image.open(mixed_folder / "opaque.png") as img:
+        assert img.size == (16, 12)
+
+
+# ---------- preserve_alpha ----------
+
+@pytest.mark.parametrize("method", thresholdpng.ALPHA_RESIZE_METHODS)
+def test_preserve_alpha_merges_alpha_onto_upscale(tmp_path, stub_exe, method):
+    folder = tmp_path / "images"
+    folder.mkdir()
+    # Opaque square in the middle, transparent border, and one grey value that threshold 0 makes opaque
+    alpha = np.zeros((6, 8), dtype=np.uint8)
+    alpha[1:5, 2:6] = 255
+    alpha[0, 0] = 40
+    save(folder / "sprite.png", 'RGBA', alpha=alpha)
+    with Image.open(folder / "sprite.png") as img:
+        source_rgb = np.asarray(img.convert('RGB'))
+
+    options = {'regular_upscale': True, 'preserve_alpha': True, 'alpha_resize': method, 'use_cache': False}
+    thresholdpng.process_images(str(folder), options)
+
+    with Image.open(folder / "sprite.png") as img:
+        assert img.mode == 'RGBA' and img.size == (32, 24)
+        out = np.asarray(img)
+    # RGB from the (nearest-neighbour) stub upscale, alpha from the thresholded source
+    np.testing.assert_array_equal(out[..., :3], source_rgb.repeat(4, axis=0).repeat(4, axis=1))
+    expected = np.where(alpha > 0, 255, 0).astype(np.uint8).repeat(4, axis=0).repeat(4, axis=1)
+    assert set(np.unique(out[..., 3])) <= {0, 255}
+    if method == 'nearest':
+        np.testing.assert_array_equal(out[..., 3], expected)
+    else:
+        # Bicubic follows the interpolated contour: only pixels next to an edge may change
+        assert (out[..., 3] != expected).mean() < 0.1
+        assert out[8:16, 12:20, 3].min() == 255 and out[22:, 28:, 3].max() == 0
+    assert not [f for f in os.listdir(folder) if f.startswith('.pipeline_')]
+
+
+@pytest.mark.parametrize("method", thresholdpng.ALPHA_RESIZE_METHODS)
+def test_upscale_alpha_stays_binary(method):
+    alpha = gradient_alpha((8, 6))
+    out = thresholdpng.upscale_alpha(alpha, (20, 15), method, threshold=100)
+    assert out.shape == (15, 20) and out.dtype == np.uint8
+    assert set(np.unique(out)) == {0, 255}
+    assert out[0, 0] == 0 and out[-1, -1] == 255
+
+
+# ---------- threshold_alpha ----------
+
+def threshold_alpha_where(image, threshold=0):
+    """The np.where implementation threshold_alpha replaced, as the reference."""
+    arr = np.array(image.convert('RGBA'))
+    arr[:, :, 3] = np.where(arr[:, :, 3] > threshold, 255, 0)
+    return arr
+
+
+@pytest.mark.parametrize("threshold", [0, 1, 126, 127, 128, 254, 255])
+@pytest.mark.parametrize("in_place", [False, True])
+def test_threshold_lut_matches_where(threshold, in_place):
+    # Every alpha value, with RGB that must come through unchanged
+    values = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    rgba = np.dstack([values, values[::-1], values.T, values])
+    image = Image.fromarray(rgba, 'RGBA')
+    expected = threshold_alpha_where(image, threshold)
+
+    result = thresholdpng.threshold_alpha(image.copy(), threshold, in_place=in_place)
+    np.testing.assert_array_equal(np.asarray(result), expected)
+
+
+@pytest.mark.parametrize("mode", ['LA', 'P'])
+def test_threshold_lut_converts_other_modes(mode):
+    la = Image.fromarray(np.dstack([np.full((4, 64), 90, np.uint8),
+                                    np.arange(256, dtype=np.uint8).reshape(4, 64)]), 'LA')
+    image = la if mode == 'LA' else la.convert('RGBA').convert('P')
+    if mode == 'P':
+        image.info['transparency'] = 0
+    result = thresholdpng.threshold_alpha(image, 127)
+    assert result.mode == 'RGBA'
+    np.testing.assert_array_equal(np.asarray(result), threshold_alpha_where(image, 127))
+
+
+def test_unchanged_pngs_are_not_reencoded(tmp_path):
+    folder = tmp_path / "images"
+    folder.mkdir()
+    save(folder / "binary.png", 'RGBA', alpha=binary_alpha())
+    save(folder / "opaque.png", 'RGB')
+    save(folder / "gray.png", 'L')
+    save(folder / "soft.png", 'RGBA', alpha=gradient_alpha())
+    before = {f: (folder / f).read_bytes() for f in files_of(folder)}
+    mtimes = {f: os.stat(folder / f).st_mtime_ns for f in files_of(folder)}
+
+    thresholdpng.process_images(str(folder), {})
+
+    for name in ("binary.png", "opaque.png", "gray.png"):
+        assert (folder / name).read_bytes() == before[name]
+        assert os.stat(folder / name).st_mtime_ns == mtimes[name]
+    # Only the PNG with soft alpha is rewritten
+    assert (folder / "soft.png").read_bytes() != before["soft.png"]
+    with Image.open(folder / "soft.png") as img:
+        assert set(np.unique(np.asarray(img.getchannel('A')))) == {0, 255}
+
+
+# ---------- alpha pre-pass ----------
+
+def soft_folder(tmp_path, count):
+    folder = tmp_path / "images"
+    folder.mkdir()
+    for i in range(count):
+        save(folder / f"img{i}.png", 'RGBA', alpha=gradient_alpha())
+    return folder
+
+
+def test_prepass_reports_a_failing_file_and_goes_on(tmp_path):
+    folder = soft_folder(tmp_path, 4)
+    # Header readable (so it is planned), pixel data cut off (so preparing it fails)
+    data = (folder / "img1.png").read_bytes()
+    (folder / "img1.png").write_bytes(data[:len(data) // 2])
+    before = {f: (folder / f).read_bytes() for f in files_of(folder)}
+
+    options = {'alpha_workers': 3}
+    plans = thresholdpng.plan_pipeline(str(folder), files_of(folder), options)
+    events = []
+    assert thresholdpng.run_pipeline(str(folder), plans, options, on_event=events.append)
+
+    by_name = {e['name']: e for e in events}
+    assert not by_name['img1.png']['ok']
+    assert by_name['img1.png']['message'].startswith("Error processing alpha for img1.png")
+    assert all(by_name[f"img{i}.png"]['ok'] for i in (0, 2, 3))
+    assert events[-1]['done'] == events[-1]['total'] == 4
+    # Events come in file order and the other files were processed
+    assert [e['name'] for e in events] == [f"img{i}.png" for i in range(4)]
+    assert (folder / "img1.png").read_bytes() == before["img1.png"]
+    for i in (0, 2, 3):
+        assert (folder / f"img{i}.png").read_bytes() != before[f"img{i}.png"]
+
+
+def test_prepass_cancellation_stops_new_prepares(tmp_path, monkeypatch):
+    folder = soft_folder(tmp_path, 6)
+    before = {f: (folder / f).read_bytes() for f in files_of(folder)}
+    control = methods.JobControl()
+    prepare_image = thresholdpng.prepare_image
+    prepared = []
+
+    def prepare_then_cancel(index, *args, **kwargs):
+        prepared.append(index)
+        result = prepare_image(index, *args, **kwargs)
+        control.cancel()
+        return result
+    monkeypatch.setattr(thresholdpng, "prepare_image", prepare_then_cancel)
+
+    options = {'alpha_workers': 1}
+    plans = thresholdpng.plan_pipeline(str(folder), files_of(folder), options)
+    events = []
+    assert not thresholdpng.run_pipeline(str(folder), plans, options, control=control, on_event=events.append)
+
+    assert prepared == [0]
+    assert [e['message'] for e in events[1:]] == [f"Cancelled: img{i}.png" for i in range(1, 6)]
+    assert not any(e['ok'] for e in events[1:])
+    for i in range(1, 6):
+        assert (folder / f"img{i}.png").read_bytes() == before[f"img{i}.png"]
@@ -0,0 +1,99 @@
+"""
+Tests for the tile planning and seam feathering in methods.py (plan_tiles, _ramp, blend_tile).
+
+    cd realesrgan && python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from realesrgan import methods  # noqa: E402
+
+
+def coverage(width, height, tiles):
+    hits = np.zeros((height, width), dtype=np.int32)
+    for x0, y0, x1, y1, _, _ in tiles:
+        hits[y0:y1, x0:x1] += 1
+    return hits
+
+
+@pytest.mark.parametrize("width, height, tile_size, overlap", [
+    (100, 100, 256, 32),     # smaller than one tile
+    (1000, 700, 256, 32),
+    (513, 257, 256, 0),
+    (300, 300, 128, 63),     # largest overlap allowed for 128 px tiles
+    (4096, 64, 64, 48),      # overlap clamped below half a tile
+])
+def test_plan_tiles_covers_without_gaps(width, height, tile_size, overlap):
+    tiles = methods.plan_tiles(width, height, tile_size, overlap)
+    size, clamped = methods.clamp_tiling(tile_size, overlap)
+
+    assert coverage(width, height, tiles).min() >= 1
+    for x0, y0, x1, y1, left, top in tiles:
+        assert 0 <= x0 < x1 <= width and 0 <= y0 < y1 <= height
+        assert x1 - x0 <= size and y1 - y0 <= size
+        # Every tile but the first of its row/column overlaps its neighbour by the requested amount
+        assert left == 0 if x0 == 0 else left >= clamped
+        assert top == 0 if y0 == 0 else top >= clamped
+        assert left < x1 - x0 and top < y1 - y0
+
+
+def test_plan_tiles_overlap_matches_neighbours():
+    tiles = methods.plan_tiles(1000, 600, 256, 40)
+    xs = sorted({t[0] for t in tiles})
+    ends = {t[0]: t[2] for t in tiles}
+    for prev, x0 in zip(xs, xs[1:]):
+        left = next(t[4] for t in tiles if t[0] == x0)
+        assert left == ends[prev] - x0 >= 40
+
+
+def test_clamp_tiling_bounds_the_tile_count():
+    assert methods.clamp_tiling(0, 32) == (0, 32)
+    assert methods.clamp_tiling(32, 32) == (methods.MIN_TILE_SIZE, methods.MIN_TILE_SIZE // 2 - 1)
+    assert methods.clamp_tiling(64, 48) == (64, 31)
+    assert methods.clamp_tiling(2048, 32) == (2048, 32)
+
+    # Was 16,524,225 and 64,009 tiles before the clamp
+    side = -(-4096 // (methods.MIN_TILE_SIZE // 2))
+    assert len(methods.plan_tiles(4096, 4096, 32, 32)) <= side * side
+    assert len(methods.plan_tiles(4096, 4096, 64, 48)) <= side * side
+
+
+def test_ramp():
+    np.testing.assert_array_equal(methods._ramp(5, 0), np.ones(5))
+    w = methods._ramp(10, 4)
+    np.testing.assert_allclose(w, [0.125, 0.375, 0.625, 0.875, 1, 1, 1, 1, 1, 1])
+    assert (np.diff(w) >= 0).all()
+
+
+def tile_and_blend(src, tile_size, overlap):
+    """Identity "upscale": cut src into tiles and feather them back together."""
+    out = np.zeros_like(src)
+    for x0, y0, x1, y1, left, top in methods.plan_tiles(src.shape[1], src.shape[0], tile_size, overlap):
+        methods.blend_tile(out, src[y0:y1, x0:x1].copy(), x0, y0, left, top)
+    return out
+
+
+@pytest.mark.parametrize("channels", [3, 4])
+def test_blend_has_no_seams_on_a_constant_image(channels):
+    src = np.full((300, 420, channels), (200, 17, 93, 255)[:channels], dtype=np.uint8)
+    np.testing.assert_array_equal(tile_and_blend(src, 128, 32), src)
+
+
+def test_blend_reproduces_an_image_when_tiles_agree():
+    y, x = np.mgrid[0:333, 0:517]
+    src = np.stack([x % 256, y % 256, (x + y) % 256], axis=-1).astype(np.uint8)
+    np.testing.assert_array_equal(tile_and_blend(src, 100, 20), src)
+
+
+def test_blend_feathers_between_different_tiles():
+    # Left tile all 0, right tile all 200: the overlap ramps from one to the other
+    out = np.zeros((4, 12, 3), dtype=np.uint8)
+    methods.blend_tile(out, np.zeros((4, 8, 3), dtype=np.uint8), 0, 0, 0, 0)
+    methods.blend_tile(out, np.full((4, 8, 3), 200, dtype=np.uint8), 4, 0, 4, 0)
+    row = out[0, :, 0]
+    assert (row[:4] == 0).all() and (row[8:] == 200).all()
+    assert (np.diff(row[3:9].astype(int)) > 0).all()
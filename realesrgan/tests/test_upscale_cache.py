@@ -0,0 +1,159 @@
+"""
+Tests for the Real-ESRGAN result cache (upscale_cache.py) and its use in methods.upscale_jobs.
+
+    cd realesrgan && python -m pytest tests
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from realesrgan import methods, upscale_cache  # noqa: E402
+from realesrgan.upscale_cache import UpscaleCache  # noqa: E402
+
+STUB = Path(__file__).with_name("realesrgan_stub.py")
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def put_result(cache, tmp_path, name, data):
+    """Cache `data` as the result of input `name`; returns the key."""
+    key = cache.key(write(tmp_path / "in" / name, name.encode()), "model", 4)
+    cache.put(key, write(tmp_path / "out" / name, data))
+    return key
+
+
+def test_miss_then_hit(tmp_path):
+    cache = UpscaleCache(tmp_path / "cache")
+    inp = write(tmp_path / "a.jpg", b"input")
+    out = tmp_path / "a.png"
+    key = cache.key(inp, "realesrgan-x4plus", 4)
+
+    assert not cache.get(key, str(out))
+    assert not out.exists()
+    cache.put(key, write(tmp_path / "result.png", b"upscaled"))
+    assert cache.get(key, str(out))
+    assert out.read_bytes() == b"upscaled"
+    assert not cache.get(None, str(out))
+    assert cache.key(str(tmp_path / "missing.jpg"), "realesrgan-x4plus", 4) is None
+
+
+def test_key_variants(tmp_path):
+    cache = UpscaleCache(tmp_path / "cache")
+    inp = write(tmp_path / "a.jpg", b"input")
+    same = write(tmp_path / "b.jpg", b"input")
+    model = write(tmp_path / "models" / "m.bin", b"weights")
+    base = cache.key(inp, "m", 4, files=[model])
+
+    assert cache.key(same, "m", 4, files=[model]) == base  # content, not path
+    assert cache.key(inp, "other", 4, files=[model]) != base
+    assert cache.key(inp, "m", 2, files=[model]) != base
+    assert cache.key(inp, "m", 4, "tiled:512:32:fast", [model]) != base
+    assert cache.key(inp, "m", 4, "tiled:512:32:small", [model]) != cache.key(inp, "m", 4, "tiled:512:32:fast", [model])
+
+    # Replacing the model file (new size/mtime) invalidates the old results
+    write(tmp_path / "models" / "m.bin", b"retrained weights")
+    assert cache.key(inp, "m", 4, files=[model]) != base
+
+
+def test_lru_eviction_order(tmp_path):
+    cache = UpscaleCache(tmp_path / "cache", max_bytes=250)
+    a = put_result(cache, tmp_path, "a.jpg", b"a" * 100)
+    b = put_result(cache, tmp_path, "b.jpg", b"b" * 100)
+    # Make a older than b, then use it: b becomes the least recently used
+    os.utime(cache.path(a), (1000, 1000))
+    os.utime(cache.path(b), (2000, 2000))
+    assert cache.get(a, str(tmp_path / "a_hit.png"))
+
+    c = put_result(cache, tmp_path, "c.jpg", b"c" * 100)
+    assert os.path.exists(cache.path(a))
+    assert not os.path.exists(cache.path(b))
+    assert os.path.exists(cache.path(c))
+    assert cache._total == 200
+
+
+def test_put_walks_the_cache_once(tmp_path, monkeypatch):
+    cache = UpscaleCache(tmp_path / "cache", max_bytes=1000)
+    put_result(cache, tmp_path, "old.jpg", b"o" * 100)
+
+    cache = UpscaleCache(tmp_path / "cache", max_bytes=1000)  # fresh instance, total unknown
+    walks = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries", lambda: walks.append(1) or entries())
+    for i in range(5):
+        put_result(cache, tmp_path, f"{i}.jpg", b"x" * 100)
+    assert len(walks) == 1
+    assert cache._total == 600
+
+    # Going over the cap walks once more to evict
+    for i in range(5, 10):
+        put_result(cache, tmp_path, f"{i}.jpg", b"x" * 100)
+    assert cache._total <= 1000
+    assert len(walks) == 2
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = UpscaleCache(tmp_path / "cache", max_bytes=0)
+    put_result(cache, tmp_path, "a.jpg", b"a")
+    assert not (tmp_path / "cache").exists()
+
+
+@pytest.fixture
+def stub_exe(tmp_path, monkeypatch):
+    if os.name == "nt":
+        pytest.skip("the stub wrapper is a shell script")
+    exe = tmp_path / "bin" / "realesrgan-stub"
+    exe.parent.mkdir()
+    exe.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{STUB}" "$@"\n')
+    exe.chmod(0o755)
+    monkeypatch.setenv(methods.EXE_ENV_VAR, str(exe))
+    monkeypatch.setenv("STUB_LOG", str(tmp_path / "runs.jsonl"))
+    return exe
+
+
+def make_input(folder, name):
+    folder.mkdir(exist_ok=True)
+    (folder / name).write_text(name)
+    return str(folder / name)
+
+
+def test_upscale_jobs_reuses_results_until_the_model_changes(tmp_path, stub_exe):
+    cache = UpscaleCache(tmp_path / "cache")
+    inp = make_input(tmp_path / "img", "a.jpg")
+    jobs = [(inp, str(tmp_path / "img" / "a.png"))]
+    runs = tmp_path / "runs.jsonl"
+
+    first = methods.upscale_jobs(jobs, "regular", batch=False, cache=cache)
+    second = methods.upscale_jobs(jobs, "regular", batch=False, cache=cache)
+    assert not first[0].get("cached") and second[0].get("cached")
+    assert len(runs.read_text().splitlines()) == 1
+
+    # A new network file next to the exe: the cached result is stale
+    write(stub_exe.parent / "models" / "realesrgan-x4plus.bin", b"new weights")
+    third = methods.upscale_jobs(jobs, "regular", batch=False, cache=cache)
+    assert not third[0].get("cached")
+    assert len(runs.read_text().splitlines()) == 2
+
+
+def test_legacy_wrappers_do_not_cache(tmp_path, stub_exe, monkeypatch):
+    cache = UpscaleCache(tmp_path / "cache")
+    monkeypatch.setattr(methods, "UPSCALE_CACHE", cache)
+    make_input(tmp_path / "img", "a.jpg")
+
+    results = methods.process_regular_upscale(["a.jpg"], str(tmp_path / "img"), batch=False)
+    assert results[0]["returncode"] == 0
+    assert not (tmp_path / "cache").exists()
+
+    methods.run_upscale(["a.jpg"], str(tmp_path / "img"), "regular", batch=False, cache=None)
+    assert (tmp_path / "cache").exists()
+
+
+def test_default_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setenv(upscale_cache.CACHE_DIR_ENV_VAR, str(tmp_path))
+    assert UpscaleCache().root == str(tmp_path)
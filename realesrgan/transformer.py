@@ -1,10 +1,11 @@
 import os
-import tkinter as tk
-from tkinter import filedialog
-from PIL import Image, ImageOps
-import fbx
+
+from image_mirror import mirror_file
 
 def convert_dae_to_fbx(dae_filename, fbx_filename):
+    # Imported here so the mirror helpers work without the FBX SDK
+    import fbx
+
     # Create an SDK manager
     sdk_manager = fbx.FbxManager.Create()
     
@@ -45,41 +46,12 @@ def convert_dae_to_fbx(dae_filename, fbx_filename):
     sdk_manager.Destroy()
 
 def mirror_image(image_path, output_path):
-    with Image.open(image_path) as img:
-        width, height = img.size
-
-        # Crop the left and right halves
-        left_half = img.crop((0, 0, width // 2, height))
-        right_half = img.crop((width // 2, 0, width, height))
-
-        # Mirror the halves
-        left_half_mirrored = ImageOps.mirror(left_half)
-        right_half_mirrored = ImageOps.mirror(right_half)
-
-        # Create a new image with double the width
-        new_image = Image.new('RGB', (width * 2, height))
-        new_image.paste(left_half_mirrored, (0, 0))
-        new_image.paste(left_half, (width // 2, 0))
-        new_image.paste(right_half, (width, 0))
-        new_image.paste(right_half_mirrored, (width + width // 2, 0))
-
-        # Save the modified image
-        new_image.save(output_path)
+    # [left mirrored | left | right | right mirrored], same mode as the source
+    mirror_file(image_path, output_path, "halves")
 
 def mirror_image_double(image_path, output_path):
-    with Image.open(image_path) as img:
-        width, height = img.size
-
-        # Mirror the image
-        mirrored_img = ImageOps.mirror(img)
-
-        # Create a new image with double the width
-        new_image = Image.new('RGB', (width * 2, height))
-        new_image.paste(img, (0, 0))
-        new_image.paste(mirrored_img, (width, 0))
-
-        # Save the modified image
-        new_image.save(output_path)
+    # [image | image mirrored], same mode as the source
+    mirror_file(image_path, output_path, "double")
 
 def process_directory(directory):
     trans_dir = os.path.join(directory, 'trans')
@@ -99,13 +71,17 @@ def process_directory(directory):
             print(f"Mirrored: {file}")
 
 def select_directory():
+    import tkinter as tk
+    from tkinter import filedialog
+
     root = tk.Tk()
     root.withdraw()
     folder_selected = filedialog.askdirectory()
     return folder_selected
 
-directory = select_directory()
-if directory:
-    process_directory(directory)
-else:
-    print("No directory selected, exiting.")
+if __name__ == "__main__":
+    directory = select_directory()
+    if directory:
+        process_directory(directory)
+    else:
+        print("No directory selected, exiting.")
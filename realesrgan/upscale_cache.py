@@ -0,0 +1,159 @@
+"""
+Content-addressed cache of Real-ESRGAN results.
+
+An entry is keyed on the SHA-256 of the input file plus the model name and
+scale, the size and mtime of the files behind the model (the exe and the
+network's .param/.bin, so replacing them invalidates old results) and, for
+tiled upscales, the tiling settings and PNG profile. Hits are copied to the
+output path instead of running the executable. The cache is capped in size:
+the running total is read from disk once, and only when a put takes it over
+the cap are the least recently used entries (by file mtime, refreshed on every
+hit) evicted.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+# Cache location; defaults to the user's cache folder
+CACHE_DIR_ENV_VAR = "REALESRGAN_CACHE_DIR"
+
+# Size cap of the cache folder in bytes
+CACHE_MAX_BYTES = 4 << 30
+
+
+def default_cache_dir():
+    """$REALESRGAN_CACHE_DIR, else %LOCALAPPDATA%\\realesrgan-cache or ~/.cache/realesrgan."""
+    if os.environ.get(CACHE_DIR_ENV_VAR):
+        return os.environ[CACHE_DIR_ENV_VAR]
+    if os.environ.get("LOCALAPPDATA"):
+        return os.path.join(os.environ["LOCALAPPDATA"], "realesrgan-cache")
+    return os.path.join(os.path.expanduser("~"), ".cache", "realesrgan")
+
+
+def file_stamp(path):
+    """"size:mtime_ns" of a file, or "missing"."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class UpscaleCache:
+    """
+    cache = UpscaleCache()
+    key = cache.key(input_path, "realesrgan-x4plus", 4, files=[exe_path, param_path, bin_path])
+    if not cache.get(key, output_path):
+        ...  # run the exe
+        cache.put(key, output_path)
+    """
+
+    def __init__(self, root=None, max_bytes=CACHE_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None  # bytes on disk, read on the first put
+
+    def key(self, input_path, model, scale, variant="", files=()):
+        """
+        Cache key of one upscale; None if the input cannot be read.
+
+        files: paths whose size and mtime are mixed in (exe, model files)
+        """
+        try:
+            digest = file_digest(input_path)
+        except OSError:
+            return None
+        stamps = ",".join(f"{os.path.basename(path)}={file_stamp(path)}" for path in files)
+        return hashlib.sha256(f"{digest}:{model}:{scale}:{variant}:{stamps}".encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key + ".png")
+
+    def get(self, key, output_path):
+        """Copy the cached result to output_path. Returns False on a miss."""
+        if key is None:
+            return False
+        cached = self.path(key)
+        try:
+            shutil.copyfile(cached, output_path)
+        except FileNotFoundError:
+            return False
+        try:
+            # Mark as recently used
+            os.utime(cached)
+        except OSError:
+            pass
+        return True
+
+    def put(self, key, result_path):
+        """Store a finished upscale (copied, so later edits of result_path do not reach the cache)."""
+        if key is None or self.max_bytes <= 0:
+            return
+        cached = self.path(key)
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(cached))
+        os.close(fd)
+        try:
+            shutil.copyfile(result_path, tmp)
+            size = os.path.getsize(tmp)
+            with self._lock:
+                if self._total is None:
+                    self._total = sum(size for _, size, _ in self.entries())
+                replaced = os.path.getsize(cached) if os.path.exists(cached) else 0
+                os.replace(tmp, cached)
+                self._total += size - replaced
+                over = self._total > self.max_bytes
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        if over:
+            self.evict()
+
+    def entries(self):
+        """(mtime, size, path) of every cached result."""
+        found = []
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".png"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found.append((st.st_mtime, st.st_size, path))
+        return found
+
+    def evict(self):
+        """Remove least recently used results until the cache fits in max_bytes. Returns bytes freed."""
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            for _, size, path in entries:
+                if total - freed <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    freed += size
+                except OSError:
+                    pass
+            self._total = total - freed
+            return freed
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            self._total = 0
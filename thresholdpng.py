@@ -1,23 +1,311 @@
 from PIL import Image
 import os
+import shutil
+import tempfile
+import threading
 import numpy as np
 import subprocess
-from .realesrgan.methods import process_anime_upscale, process_regular_upscale,process_anime_upscale_x2, process_regular_upscale_x2
+from concurrent.futures import ThreadPoolExecutor
+from .realesrgan.image_io import INTERMEDIATE_PROFILE, save_png
+from .realesrgan.methods import MODEL_SCALES, upscale_jobs
 
-def threshold_alpha(image, threshold=0):
+# Upscale options in the order they are applied (regular must be first)
+UPSCALE_OPTIONS = (
+    ('regular_upscale', 'regular'),
+    ('anime_upscale', 'anime'),
+    ('regular_upscale_x2', 'regular_x2'),
+    ('anime_upscale_x2', 'anime_x2'),
+)
+
+# Alpha-preserving mode: alpha is split off before upscaling, resized with one
+# of these methods and thresholded again at this level
+ALPHA_RESIZE_METHODS = ('nearest', 'bicubic')
+ALPHA_RETHRESHOLD = 127
+
+# Threads for the alpha pre-pass (PIL releases the GIL while decoding and encoding)
+ALPHA_WORKERS = min(8, os.cpu_count() or 1)
+
+def _threshold_lut(threshold):
+    return [0] * (threshold + 1) + [255] * (255 - threshold)
+
+
+def has_alpha(image):
+    """True if the image has an alpha band or palette/colorkey transparency."""
+    return 'A' in image.getbands() or 'transparency' in image.info
+
+
+def alpha_is_binary(alpha):
+    """True if an 'L' alpha band only contains 0 and 255 (thresholding would not change it)."""
+    return not any(alpha.histogram()[1:255])
+
+
+def threshold_alpha(image, threshold=0, in_place=False):
     """
     Apply threshold to alpha channel, similar to GIMP's threshold alpha
+
+    The alpha band goes through a lookup table (Image.point), so the only
+    full-size allocation is the result image: the RGBA conversion when the
+    input is not RGBA, a single point() over all bands otherwise. With in_place
+    an RGBA input is modified directly.
     """
     if image.mode != 'RGBA':
         image = image.convert('RGBA')
-        
-    img_array = np.array(image)
-    alpha = img_array[:, :, 3]
-    img_array[:, :, 3] = np.where(alpha > threshold, 255, 0)
-        
-    return Image.fromarray(img_array, 'RGBA')
+        in_place = True
+    if not in_place:
+        return image.point(list(range(256)) * 3 + _threshold_lut(threshold))
+    image.putalpha(image.getchannel('A').point(_threshold_lut(threshold)))
+    return image
+
+def upscale_alpha(alpha, size, method='nearest', threshold=0):
+    """
+    Resize a thresholded alpha channel to size (width, height) without the model.
+
+    nearest: integer index gather, the mask stays binary.
+    bicubic: smooth resize of the binary mask, re-thresholded at ALPHA_RETHRESHOLD
+             so the edges follow the interpolated contour.
+    """
+    mask = np.where(alpha > threshold, 255, 0).astype(np.uint8)
+    width, height = size
+    if method == 'bicubic':
+        resized = np.asarray(Image.fromarray(mask, 'L').resize((width, height), Image.BICUBIC))
+        return np.where(resized > ALPHA_RETHRESHOLD, 255, 0).astype(np.uint8)
+    ys = np.arange(height) * mask.shape[0] // height
+    xs = np.arange(width) * mask.shape[1] // width
+    return mask[ys[:, None], xs[None, :]]
 
-def process_images(folder_path, options):
+
+def plan_pipeline(folder_path, files, options):
+    """
+    Plan the steps of every image once: alpha threshold (PNG only), then the
+    chosen upscales chained in UPSCALE_OPTIONS order, then one final write.
+    With preserve_alpha, PNGs that have alpha instead have it split off before
+    the upscales and merged back (resized and re-thresholded) before the write.
+
+    Args:
+        folder_path (str): Folder containing the images
+        files (list): File names inside folder_path
+        options (dict): Same options as process_images
+
+    Returns:
+        list: One dict per image with source, output, steps, size, out_size,
+              channels and est_bytes (estimated size of the final PNG)
+    """
+    modes = [mode for key, mode in UPSCALE_OPTIONS if options.get(key)]
+    scale = 1
+    for mode in modes:
+        scale *= MODEL_SCALES[mode]
+
+    plans = []
+    for filename in files:
+        source = os.path.join(folder_path, filename)
+        name, ext = os.path.splitext(filename)
+        threshold = ext.lower() == '.png'
+        try:
+            with Image.open(source) as img:
+                size = img.size
+                channels = 4 if threshold else len(img.getbands())
+                alpha = has_alpha(img)
+        except OSError:
+            size, channels, alpha = None, None, False
+        # Only PNGs that have alpha are split (the others report "No alpha" on the threshold step)
+        split = threshold and alpha and bool(modes) and options.get('preserve_alpha')
+        plans.append({
+            'name': filename,
+            'source': source,
+            'output': os.path.join(folder_path, f"{name}.png"),
+            'steps': (['split_alpha'] + modes + ['merge_alpha'] if split
+                      else (['threshold'] if threshold else []) + modes),
+            'size': size,
+            'out_size': (size[0] * scale, size[1] * scale) if size else None,
+            'channels': channels,
+            # Keep the source's compressed bytes per pixel
+            'est_bytes': os.path.getsize(source) * scale * scale,
+        })
+    return plans
+
+
+def print_plan(plans):
+    """Print the planned steps and estimated output sizes (dry run)."""
+    total = 0
+    for plan in plans:
+        steps = " -> ".join(plan['steps'] + ['write']) if plan['steps'] else "nothing to do"
+        if plan['size'] is None:
+            print(f"  {plan['name']}: unreadable, skipped")
+            continue
+        raw = plan['out_size'][0] * plan['out_size'][1] * plan['channels']
+        total += plan['est_bytes']
+        print(f"  {plan['name']}: {plan['size'][0]}x{plan['size'][1]} -> "
+              f"{plan['out_size'][0]}x{plan['out_size'][1]}, ~{plan['est_bytes'] / 2**20:.1f} MB "
+              f"({raw / 2**20:.1f} MB raw) [{steps}]")
+    print(f"{len(plans)} image(s), ~{total / 2**20:.1f} MB estimated output")
+
+
+def prepare_image(index, plan, work, threshold=0, png_profile=None):
+    """
+    First step of one image's pipeline, before any upscale.
+
+    PNGs whose alpha is absent or already binary are left untouched (no re-encode).
+    A final output is encoded with png_profile, intermediates with INTERMEDIATE_PROFILE.
+
+    Returns:
+        tuple: (path to feed the upscales or None on error,
+                path of the split-off alpha (.npy) or None, message to print or None)
+    """
+    name = plan['name']
+    if 'split_alpha' not in plan['steps'] and 'threshold' not in plan['steps']:
+        return plan['source'], None, None
+    try:
+        with Image.open(plan['source']) as img:
+            if not has_alpha(img):
+                return plan['source'], None, f"No alpha, left as is: {name}"
+            rgba = img if img.mode == 'RGBA' else img.convert('RGBA')
+            rgba.load()
+
+        if 'split_alpha' in plan['steps']:
+            rgb_path = os.path.join(work, f"{index:05d}_rgb.png")
+            alpha_path = os.path.join(work, f"{index:05d}_alpha.npy")
+            save_png(rgba.convert('RGB'), rgb_path, INTERMEDIATE_PROFILE)
+            np.save(alpha_path, np.asarray(rgba.getchannel('A')))
+            return rgb_path, alpha_path, f"Alpha split off: {name}"
+
+        if alpha_is_binary(rgba.getchannel('A')):
+            return plan['source'], None, f"Alpha already binary, left as is: {name}"
+        processed = threshold_alpha(rgba, threshold, in_place=True)
+        if len(plan['steps']) == 1:
+            save_png(processed, plan['output'], png_profile)
+            return plan['output'], None, f"Alpha threshold processed: {name}"
+        target = os.path.join(work, f"{index:05d}_threshold.png")
+        save_png(processed, target, INTERMEDIATE_PROFILE)
+        return target, None, f"Alpha threshold processed: {name}"
+    except Exception as e:
+        if 'split_alpha' in plan['steps']:
+            return None, None, f"Error splitting alpha for {name}: {str(e)}"
+        # As before, a failed threshold still lets the image be upscaled
+        return plan['source'], None, f"Error processing alpha for {name}: {str(e)}"
+
+
+def run_pipeline(folder_path, plans, options, control=None, on_event=None):
+    """
+    Run the planned pipelines.
+
+    The alpha pre-pass (prepare_image) runs on a pool of options['alpha_workers']
+    threads (default ALPHA_WORKERS); its messages are printed in file order.
+    Each upscale step runs as one batch over all images. Intermediates go to a
+    temporary folder that is removed at the end. Only the last step writes
+    {name}.png, so each image is written to its final path once.
+
+    Args:
+        control (JobControl): Once cancelled, no further step starts and running
+                              upscales are terminated
+        on_event (callable): Called with one dict per finished step (name, step,
+                             ok, message, done, total), possibly from a worker
+                             thread; done/total count steps over all images
+
+    Returns:
+        bool: False if the run was cancelled
+    """
+    work = tempfile.mkdtemp(prefix=".pipeline_", dir=folder_path)
+    alpha_resize = options.get('alpha_resize') or 'nearest'
+    png_profile = options.get('png_profile')
+    tiling = {
+        'tile_size': options.get('tile_size'),
+        'tile_overlap': options.get('tile_overlap'),
+        'png_profile': png_profile,
+        'control': control,
+        # None = the shared upscale cache, False = always run the exe
+        'cache': None if options.get('use_cache', True) else False,
+    }
+    cancelled = lambda: control is not None and control.cancelled
+    progress = {'done': 0, 'total': sum(len(plan['steps']) for plan in plans if plan['size'] is not None)}
+    lock = threading.Lock()
+
+    def report(i, step, ok, message, skipped=0):
+        # skipped: later steps of this image that will not run, counted as done
+        print(message)
+        with lock:
+            progress['done'] += 1 + skipped
+            event = {'name': plans[i]['name'], 'step': step, 'ok': ok, 'message': message,
+                     'done': progress['done'], 'total': progress['total']}
+        if on_event is not None:
+            on_event(event)
+
+    def prepare(i):
+        if cancelled():
+            return None, None, f"Cancelled: {plans[i]['name']}"
+        return prepare_image(i, plans[i], work, png_profile=png_profile)
+
+    try:
+        current, alpha_files = {}, {}
+        readable = []
+        for i, plan in enumerate(plans):
+            if plan['size'] is None:
+                print(f"Skipping unreadable image: {plan['name']}")
+            else:
+                readable.append(i)
+        workers = max(1, min(options.get('alpha_workers') or ALPHA_WORKERS, len(readable) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i, (path, alpha_path, message) in zip(readable, pool.map(prepare, readable)):
+                steps = plans[i]['steps']
+                if message:
+                    report(i, steps[0], path is not None and not message.startswith("Error"), message,
+                           skipped=len(steps) - 1 if path is None else 0)
+                if path is not None:
+                    current[i] = path
+                if alpha_path is not None:
+                    alpha_files[i] = alpha_path
+
+        modes = [mode for key, mode in UPSCALE_OPTIONS if options.get(key)]
+        for k, mode in enumerate(modes):
+            if cancelled():
+                break
+            last = k == len(modes) - 1
+            active = sorted(current)
+            jobs = [(current[i], plans[i]['output'] if last and i not in alpha_files
+                     else os.path.join(work, f"{i:05d}_{k}_{mode}.png"))
+                    for i in active]
+
+            def upscaled(j, result, mode=mode):
+                i = active[j]
+                steps = plans[i]['steps']
+                if result['returncode'] == 0:
+                    cached = " (cached)" if result.get('cached') else ""
+                    report(i, mode, True, f"Upscaled [{mode}]{cached}: {plans[i]['name']}")
+                elif result.get('cancelled'):
+                    report(i, mode, False, f"Upscale [{mode}] cancelled for {plans[i]['name']}",
+                           skipped=len(steps) - steps.index(mode) - 1)
+                else:
+                    report(i, mode, False,
+                           f"Upscale [{mode}] failed for {plans[i]['name']}, skipping its remaining steps",
+                           skipped=len(steps) - steps.index(mode) - 1)
+
+            results = upscale_jobs(jobs, mode, on_result=upscaled, **tiling)
+            for i, (inp, outp), result in zip(active, jobs, results):
+                if inp.startswith(work):
+                    os.remove(inp)
+                if result['returncode'] != 0:
+                    del current[i]
+                else:
+                    current[i] = outp
+
+        for i in sorted(current):
+            plan = plans[i]
+            if i not in alpha_files or cancelled():
+                continue
+            try:
+                with Image.open(current[i]) as img:
+                    rgb = np.asarray(img.convert('RGB'))
+                alpha = np.load(alpha_files[i])
+                rgba = np.dstack([rgb, upscale_alpha(alpha, (rgb.shape[1], rgb.shape[0]), alpha_resize)])
+                save_png(rgba, plan['output'], png_profile)
+                report(i, 'merge_alpha', True, f"Alpha merged ({alpha_resize}): {plan['name']}")
+            except Exception as e:
+                report(i, 'merge_alpha', False, f"Error merging alpha for {plan['name']}: {str(e)}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return not cancelled()
+
+
+def process_images(folder_path, options, control=None, on_event=None):
     """
     Process images in the selected folder based on chosen options
     
@@ -26,6 +314,18 @@ def process_images(folder_path, options):
         options (dict): Dictionary containing processing options
             - regular_upscale (bool): Whether to apply regular upscaling
             - anime_upscale (bool): Whether to apply anime upscaling
+            - regular_upscale_x2 / anime_upscale_x2 (bool): Same at 2×
+            - tile_size (int): Upscale larger images in tiles (0 = never)
+            - tile_overlap (int): Overlap between tiles in pixels
+            - preserve_alpha (bool): Upscale RGB with the model and alpha with a
+              cheap resize, re-thresholding it afterwards (PNG only)
+            - alpha_resize (str): 'nearest' or 'bicubic' for preserve_alpha
+            - use_cache (bool): Reuse cached upscale results (default True)
+            - alpha_workers (int): Threads for the alpha pre-pass (0 = ALPHA_WORKERS)
+            - png_profile (str): Encoder profile of the final PNGs ('fast',
+              'balanced' or 'archival', see realesrgan.image_io.PNG_PROFILES)
+            - dry_run (bool): Only print the plan and estimated output sizes
+        control, on_event: Cancellation and per-step reports, see run_pipeline
     """
     if not folder_path:
         print("No folder selected")
@@ -33,31 +333,29 @@ def process_images(folder_path, options):
         
     # Get list of files
     files = [f for f in os.listdir(folder_path) if f.lower().endswith(('.png', '.jpg'))]
-    
-    # First process alpha channels for PNG files
-    for filename in files:
-        if filename.lower().endswith('.png'):
-            filepath = os.path.join(folder_path, filename)
-            
-            try:
-                with Image.open(filepath) as img:
-                    processed = threshold_alpha(img, threshold=0)
-                    processed.save(filepath, 'PNG', optimize=True)
-                print(f"Alpha threshold processed: {filename}")
-            except Exception as e:
-                print(f"Error processing alpha for {filename}: {str(e)}")
-    
-    # Process upscaling in order (regular must be first)
-    if options['regular_upscale']:
-        process_regular_upscale(files, folder_path)
-        
-    if options['anime_upscale']:
-        process_anime_upscale(files, folder_path)
+    plans = plan_pipeline(folder_path, files, options)
+
+    if options.get('dry_run'):
+        print("Dry run, nothing will be written:")
+        print_plan(plans)
+        return plans
 
-    if options.get('regular_upscale_x2'):
-        process_regular_upscale_x2(files, folder_path)
+    if run_pipeline(folder_path, plans, options, control, on_event):
+        print("Processing complete!")
+    else:
+        print("Processing cancelled")
+    return plans
 
-    if options.get('anime_upscale_x2'):
-        process_anime_upscale_x2(files, folder_path)
 
-    print("Processing complete!")
\ No newline at end of file
+def process_images_in_background(folder_path, options, control=None, on_event=None):
+    """
+    Run process_images on a daemon thread so the caller (Blender's UI thread)
+    is not blocked. Progress goes to the console as usual.
+
+    Returns:
+        threading.Thread: The started thread
+    """
+    thread = threading.Thread(target=process_images, args=(folder_path, options, control, on_event),
+                              name="thresholdpng", daemon=True)
+    thread.start()
+    return thread